@@ -1,10 +1,195 @@
 """Async PostgreSQL connection pool using asyncpg."""
 
+import asyncio
+import hashlib
+import logging
 import os
+import time
 from pathlib import Path
 import asyncpg
 
-_pool: asyncpg.Pool | None = None
+from app import json_codec, metrics, queries, request_context
+
+logger = logging.getLogger(__name__)
+
+# Channel the schema triggers NOTIFY on whenever an application or its
+# timeline changes. Payload: {"table": ..., "op": ..., "id": <application id>},
+# plus "columns" (changed columns) for application updates and "eventId" for
+# timeline rows.
+CHANGES_CHANNEL = "application_changes"
+
+# Dispatched when notifications may have been missed (listener reconnect).
+RESET_CHANGE = {"table": None, "op": "RESET", "id": None}
+
+# Advisory lock key held while a worker checks and applies db/schema.sql.
+SCHEMA_LOCK_ID = 7_201_601
+
+
+def _env_bool(name: str, default: str) -> bool:
+    return os.getenv(name, default).lower() in ("1", "true", "yes")
+
+
+def _env_float(name: str) -> float | None:
+    value = os.getenv(name, "").strip()
+    return float(value) if value else None
+
+
+# Connections one app instance may open across all its workers, and the
+# per-worker cap used when DB_POOL_MAX_SIZE is not set. Each worker also
+# holds one LISTEN connection outside the pool.
+DB_CONNECTION_BUDGET = int(os.getenv("DB_CONNECTION_BUDGET", "80"))
+DEFAULT_POOL_MAX_SIZE = 10
+
+# Seconds a request may wait for a pooled connection before getting a 503.
+DB_POOL_ACQUIRE_TIMEOUT = float(os.getenv("DB_POOL_ACQUIRE_TIMEOUT", "5"))
+DB_POOL_RETRY_AFTER = int(os.getenv("DB_POOL_RETRY_AFTER", "1"))
+
+# PgBouncer in transaction mode cannot keep named prepared statements on a
+# server connection, so statement caching is turned off.
+DB_PGBOUNCER = _env_bool("DB_PGBOUNCER", "false")
+
+
+def pool_settings() -> dict:
+    """asyncpg.create_pool keyword arguments from the environment.
+
+    Without DB_POOL_MAX_SIZE, DB_CONNECTION_BUDGET is shared between the
+    WEB_CONCURRENCY uvicorn workers, up to DEFAULT_POOL_MAX_SIZE each.
+    """
+    workers = max(1, int(os.getenv("WEB_CONCURRENCY", "1")))
+    max_size = int(os.getenv("DB_POOL_MAX_SIZE", "0")) or max(
+        1, min(DEFAULT_POOL_MAX_SIZE, DB_CONNECTION_BUDGET // workers - 1),
+    )
+    min_size = min(int(os.getenv("DB_POOL_MIN_SIZE", "2")), max_size)
+    return {
+        "min_size": min_size,
+        "max_size": max_size,
+        "max_queries": int(os.getenv("DB_POOL_MAX_QUERIES", "50000")),
+        "max_inactive_connection_lifetime": float(
+            os.getenv("DB_POOL_MAX_INACTIVE_LIFETIME", "300")
+        ),
+        "command_timeout": _env_float("DB_COMMAND_TIMEOUT"),
+        "statement_cache_size": (
+            0 if DB_PGBOUNCER else int(os.getenv("DB_STATEMENT_CACHE_SIZE", "100"))
+        ),
+    }
+
+
+class PoolTimeout(asyncio.TimeoutError):
+    """No pooled connection became free within the acquire timeout."""
+
+
+_pool: "InstrumentedPool | None" = None
+_dsn: str | None = None
+_listener: asyncpg.Connection | None = None
+_listener_task: asyncio.Task | None = None
+_change_handlers: list = []
+
+
+class InstrumentedConnection:
+    """Pooled connection proxy that reports every query to app.metrics and
+    to the current request's stats (app.request_context).
+
+    Anything other than the query methods (transaction(), ...) is passed
+    straight through to the asyncpg connection.
+    """
+
+    __slots__ = ("_conn",)
+
+    def __init__(self, conn: asyncpg.Connection):
+        self._conn = conn
+
+    def __getattr__(self, name):
+        return getattr(self._conn, name)
+
+    async def _timed(self, method, args, kwargs, single: bool = False):
+        started = time.perf_counter()
+        result = None
+        try:
+            result = await method(*args, **kwargs)
+            return result
+        finally:
+            duration = time.perf_counter() - started
+            metrics.record_query(duration)
+            queries.record(args[0] if args else kwargs.get("query"), duration)
+            if isinstance(result, list):
+                rows = len(result)
+            else:
+                rows = int(single and result is not None)
+            request_context.record_query(duration, rows)
+
+    async def execute(self, *args, **kwargs):
+        return await self._timed(self._conn.execute, args, kwargs)
+
+    async def executemany(self, *args, **kwargs):
+        return await self._timed(self._conn.executemany, args, kwargs)
+
+    async def fetch(self, *args, **kwargs):
+        return await self._timed(self._conn.fetch, args, kwargs)
+
+    async def fetchrow(self, *args, **kwargs):
+        return await self._timed(self._conn.fetchrow, args, kwargs, single=True)
+
+    async def fetchval(self, *args, **kwargs):
+        return await self._timed(self._conn.fetchval, args, kwargs, single=True)
+
+    async def copy_records_to_table(self, *args, **kwargs):
+        return await self._timed(self._conn.copy_records_to_table, args, kwargs)
+
+    def cursor(self, *args, **kwargs):
+        # Rows arrive as the caller iterates, so only the query is counted.
+        metrics.record_query(None)
+        queries.record(args[0] if args else kwargs.get("query"), None)
+        request_context.record_query(0.0, 0)
+        return self._conn.cursor(*args, **kwargs)
+
+
+class _InstrumentedAcquire:
+    __slots__ = ("_pool", "_timeout", "_conn")
+
+    def __init__(self, pool: "InstrumentedPool", timeout: float | None):
+        self._pool = pool
+        self._timeout = timeout
+        self._conn = None
+
+    async def __aenter__(self) -> InstrumentedConnection:
+        pool = self._pool
+        pool.waiting += 1
+        started = time.perf_counter()
+        try:
+            self._conn = await pool.pool.acquire(timeout=self._timeout)
+        except asyncio.TimeoutError:
+            raise PoolTimeout(f"no connection free within {self._timeout:g} s") from None
+        finally:
+            pool.waiting -= 1
+            metrics.POOL_ACQUIRE_WAIT.observe(time.perf_counter() - started)
+        return InstrumentedConnection(self._conn)
+
+    async def __aexit__(self, *exc):
+        await self._pool.pool.release(self._conn)
+
+
+class InstrumentedPool:
+    """asyncpg pool wrapper that counts waiters and times acquires and queries."""
+
+    def __init__(self, pool: asyncpg.Pool):
+        self.pool = pool
+        self.waiting = 0
+
+    def __getattr__(self, name):
+        return getattr(self.pool, name)
+
+    def acquire(self, *, timeout: float | None = None) -> _InstrumentedAcquire:
+        return _InstrumentedAcquire(self, timeout or DB_POOL_ACQUIRE_TIMEOUT)
+
+
+metrics.Gauge("db_pool_size", "Open connections in the pool.",
+              lambda: _pool.get_size() if _pool else None)
+metrics.Gauge("db_pool_idle", "Open connections not checked out.",
+              lambda: _pool.get_idle_size() if _pool else None)
+metrics.Gauge("db_pool_max_size", "Pool max_size.",
+              lambda: _pool.get_max_size() if _pool else None)
+metrics.Gauge("db_pool_waiting", "Tasks waiting in pool.acquire().",
+              lambda: _pool.waiting if _pool else None)
 
 
 def _parse_database_url(url: str) -> dict:
@@ -14,29 +199,157 @@ def _parse_database_url(url: str) -> dict:
 
 
 async def init_pool():
-    global _pool
+    global _pool, _dsn
     url = os.getenv("DATABASE_URL", "postgres://localhost:5432/readykids")
-    _pool = await asyncpg.create_pool(**_parse_database_url(url), min_size=2, max_size=10)
+    params = _parse_database_url(url)
+    # LISTEN needs a session of its own, which PgBouncer in transaction mode
+    # does not give, so the listener can connect to Postgres directly.
+    _dsn = _parse_database_url(os.getenv("DATABASE_DIRECT_URL") or url)["dsn"]
+    settings = pool_settings()
+    logger.info("Database pool settings: %s", settings)
+    if not DB_PGBOUNCER and not queries.CACHED_PREPARE:
+        logger.warning("This asyncpg cannot pre-fill its statement cache; "
+                       "hot statements will be prepared on first use")
+    _pool = InstrumentedPool(await asyncpg.create_pool(
+        **params,
+        **settings,
+        init=_init_connection,
+    ))
     await _init_schema()
+    await _start_listener()
+
+
+async def _init_connection(conn):
+    """Register the json/jsonb codecs and prepare the hot app.queries statements."""
+    await conn.set_type_codec(
+        "jsonb",
+        encoder=json_codec.encode_jsonb,
+        decoder=json_codec.decode_jsonb,
+        schema="pg_catalog",
+        format="binary",
+    )
+    await conn.set_type_codec(
+        "json",
+        encoder=json_codec.dumps,
+        decoder=json_codec.loads,
+        schema="pg_catalog",
+        format="binary",
+    )
+    # After the codecs: set_type_codec clears the statement cache.
+    if not DB_PGBOUNCER:
+        await queries.prepare_hot(conn)
 
 
 async def _init_schema():
+    """Apply db/schema.sql unless this exact script has already been applied.
+
+    Every worker calls this at startup. The check and the script run in one
+    transaction under an advisory lock, so the first worker applies any
+    change and the others
+    find the schema current, rather than running the DDL concurrently and
+    taking exclusive table locks on every boot.
+    """
     schema_path = Path(__file__).resolve().parent.parent / "db" / "schema.sql"
     if not schema_path.exists():
         return
     sql = schema_path.read_text()
+    checksum = hashlib.sha256(sql.encode()).hexdigest()
     async with _pool.acquire() as conn:
-        await conn.execute(sql)
+        # One transaction, so the lock, the check and the script share a
+        # server session even behind PgBouncer, and the lock is released on
+        # commit or rollback.
+        async with conn.transaction():
+            await conn.execute("SELECT pg_advisory_xact_lock($1)", SCHEMA_LOCK_ID)
+            applied = None
+            if await conn.fetchval("SELECT to_regclass('schema_version') IS NOT NULL"):
+                applied = await conn.fetchval("SELECT checksum FROM schema_version")
+            if applied == checksum:
+                return
+            await conn.execute(sql)
+            await conn.execute(
+                """INSERT INTO schema_version (checksum) VALUES ($1)
+                   ON CONFLICT (id) DO UPDATE
+                   SET checksum = EXCLUDED.checksum, applied_at = NOW()""",
+                checksum,
+            )
+    logger.info("Applied %s", schema_path.name)
+
+
+def add_change_handler(handler):
+    """Register ``handler(change)`` to be called for every change notification."""
+    _change_handlers.append(handler)
+
+
+def _dispatch_change(change: dict):
+    for handler in _change_handlers:
+        try:
+            handler(change)
+        except Exception:
+            logger.exception("Change handler %r failed", handler)
+
+
+def _on_notification(conn, pid, channel, payload):
+    try:
+        change = json_codec.loads(payload)
+    except ValueError:
+        logger.warning("Ignoring malformed %s payload: %r", channel, payload)
+        return
+    _dispatch_change(change)
+
+
+def _on_listener_terminated(conn):
+    global _listener, _listener_task
+    if conn is not _listener:
+        return
+    logger.warning("Change listener connection lost; reconnecting")
+    _listener = None
+    _dispatch_change(RESET_CHANGE)
+    _listener_task = asyncio.get_running_loop().create_task(_reconnect_listener())
+
+
+async def _start_listener():
+    """Open the single LISTEN connection shared by every change handler."""
+    global _listener
+    conn = await asyncpg.connect(_dsn)
+    await conn.add_listener(CHANGES_CHANNEL, _on_notification)
+    conn.add_termination_listener(_on_listener_terminated)
+    _listener = conn
+
+
+async def _reconnect_listener():
+    delay = 1.0
+    while _pool is not None:
+        try:
+            await _start_listener()
+        except (OSError, asyncpg.PostgresError) as exc:
+            logger.warning("Change listener reconnect failed: %s", exc)
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, 30.0)
+            continue
+        # Anything that changed while disconnected was never delivered.
+        _dispatch_change(RESET_CHANGE)
+        return
+
+
+async def _stop_listener():
+    global _listener, _listener_task
+    if _listener_task:
+        _listener_task.cancel()
+        _listener_task = None
+    if _listener:
+        conn, _listener = _listener, None
+        await conn.close()
 
 
 async def close_pool():
     global _pool
+    await _stop_listener()
     if _pool:
         await _pool.close()
         _pool = None
 
 
-def get_pool() -> asyncpg.Pool:
+def get_pool() -> InstrumentedPool:
     if _pool is None:
         raise RuntimeError("Database pool not initialized")
     return _pool
@@ -0,0 +1,140 @@
+"""Fan-out of application change notifications to Server-Sent Event clients.
+
+Every worker has one ChangeBroadcaster fed by the shared LISTEN connection in
+app.database. Each notification is turned into a change event once, then
+copied into a bounded queue per connected client. A client whose queue fills
+up is dropped instead of slowing everyone else down. It receives a final
+"reset" event and is expected to reconnect and reload.
+"""
+
+import asyncio
+import contextvars
+import logging
+import os
+
+from app import database, json_codec
+from app.services import application_service as svc
+
+logger = logging.getLogger(__name__)
+
+SSE_QUEUE_SIZE = int(os.getenv("SSE_QUEUE_SIZE", "100"))
+SSE_HEARTBEAT_SECONDS = float(os.getenv("SSE_HEARTBEAT_SECONDS", "15"))
+# Notifications waiting to be turned into events. Past this, e.g. during a
+# bulk import, they are discarded and clients are told to reload instead.
+SSE_CHANGE_BACKLOG = int(os.getenv("SSE_CHANGE_BACKLOG", "1000"))
+
+# Queued to a subscriber that has been dropped.
+_DROPPED = object()
+
+
+class ChangeBroadcaster:
+    def __init__(self, queue_size: int = SSE_QUEUE_SIZE, backlog: int = SSE_CHANGE_BACKLOG):
+        self.queue_size = queue_size
+        self.backlog = backlog
+        self._subscribers: set[asyncio.Queue] = set()
+        self._changes: asyncio.Queue | None = None
+        self._worker: asyncio.Task | None = None
+        self.published = 0
+        self.dropped = 0
+        self.overflows = 0
+
+    @property
+    def subscriber_count(self) -> int:
+        return len(self._subscribers)
+
+    def subscribe(self) -> asyncio.Queue:
+        queue = asyncio.Queue(maxsize=self.queue_size + 1)
+        self._subscribers.add(queue)
+        self._ensure_worker()
+        return queue
+
+    def unsubscribe(self, queue: asyncio.Queue):
+        self._subscribers.discard(queue)
+
+    def notify(self, change: dict):
+        """Change handler registered with app.database. Never blocks."""
+        if self._changes is None or not self._subscribers:
+            return
+        if self._changes.full():
+            # A reset makes every client reload, which covers whatever was queued.
+            while not self._changes.empty():
+                self._changes.get_nowait()
+            self._changes.put_nowait(database.RESET_CHANGE)
+            self.overflows += 1
+            logger.warning("Change backlog full; sending reset to change stream clients")
+            return
+        self._changes.put_nowait(change)
+
+    def publish(self, event: dict):
+        self.published += 1
+        for queue in list(self._subscribers):
+            # One slot is reserved so a dropped client can still be told.
+            if queue.qsize() >= self.queue_size:
+                self._drop(queue)
+            else:
+                queue.put_nowait(event)
+
+    def _drop(self, queue: asyncio.Queue):
+        self._subscribers.discard(queue)
+        self.dropped += 1
+        queue.put_nowait(_DROPPED)
+        logger.warning("Dropped slow change stream client")
+
+    def _ensure_worker(self):
+        if self._worker is None or self._worker.done():
+            self._changes = asyncio.Queue(maxsize=self.backlog)
+            # A fresh context: the first subscriber's request must not own the
+            # worker's query accounting for the rest of the process.
+            self._worker = asyncio.get_running_loop().create_task(
+                self._run(), context=contextvars.Context(),
+            )
+
+    async def _run(self):
+        while True:
+            change = await self._changes.get()
+            if not self._subscribers:
+                continue
+            try:
+                event = await svc.build_change_event(database.get_pool(), change)
+            except Exception:
+                logger.exception("Failed to build change event for %r", change)
+                continue
+            if event is not None:
+                self.publish(event)
+
+    async def close(self):
+        if self._worker:
+            self._worker.cancel()
+            self._worker = None
+        for queue in list(self._subscribers):
+            self._drop(queue)
+
+
+broadcaster = ChangeBroadcaster()
+database.add_change_handler(broadcaster.notify)
+
+
+def format_sse(event: dict, event_id: int) -> bytes:
+    return b"id: %d\nevent: change\ndata: %s\n\n" % (event_id, json_codec.dumps(event))
+
+
+async def stream_changes(broadcaster: ChangeBroadcaster = broadcaster,
+                         heartbeat: float = SSE_HEARTBEAT_SECONDS):
+    """Yield SSE frames for one client until it disconnects or is dropped."""
+    queue = broadcaster.subscribe()
+    event_id = 0
+    try:
+        yield b"retry: 3000\n\n"
+        while True:
+            try:
+                event = await asyncio.wait_for(queue.get(), timeout=heartbeat)
+            except asyncio.TimeoutError:
+                yield b": ping\n\n"
+                continue
+            event_id += 1
+            if event is _DROPPED:
+                yield format_sse({"op": "reset"}, event_id)
+                return
+            yield format_sse(event, event_id)
+    finally:
+        broadcaster.unsubscribe(queue)
@@ -0,0 +1,93 @@
+"""Readiness probe for GET /health/ready.
+
+A probe acquires a pooled connection and runs ``SELECT 1``, both under a
+timeout. Its result is cached for READY_CACHE_SECONDS and concurrent callers
+share one probe, so frequent load balancer checks cost at most one query per
+interval. A slow acquire means the pool is saturated, so the worker reports
+itself unready and the orchestrator sends traffic elsewhere.
+"""
+
+import asyncio
+import os
+import time
+from datetime import datetime, timezone
+
+import asyncpg
+
+from app import database
+
+READY_CACHE_SECONDS = float(os.getenv("READY_CACHE_SECONDS", "1"))
+READY_TIMEOUT_SECONDS = float(os.getenv("READY_TIMEOUT_SECONDS", "2"))
+READY_MAX_ACQUIRE_WAIT_MS = float(os.getenv("READY_MAX_ACQUIRE_WAIT_MS", "500"))
+
+_cached: tuple[float, dict] | None = None
+_lock = asyncio.Lock()
+
+
+def _pool_stats(pool) -> dict:
+    size, idle, max_size = pool.get_size(), pool.get_idle_size(), pool.get_max_size()
+    return {
+        "size": size,
+        "idle": idle,
+        "maxSize": max_size,
+        "inUse": size - idle,
+        "waiting": pool.waiting,
+        "utilisation": round((size - idle) / max_size, 2) if max_size else 0.0,
+    }
+
+
+async def _probe() -> dict:
+    try:
+        pool = database.get_pool()
+    except RuntimeError:
+        return {"ready": False, "reasons": ["database pool not initialised"]}
+
+    reasons = []
+    database_check: dict = {"ok": False}
+    started = time.perf_counter()
+    acquired = None
+    try:
+        async with pool.acquire(timeout=READY_TIMEOUT_SECONDS) as conn:
+            acquired = time.perf_counter()
+            await conn.fetchval("SELECT 1", timeout=READY_TIMEOUT_SECONDS)
+            database_check = {
+                "ok": True,
+                "latencyMs": round((time.perf_counter() - acquired) * 1000, 1),
+            }
+    except asyncio.TimeoutError:
+        if acquired is None:
+            reasons.append(f"no pooled connection within {READY_TIMEOUT_SECONDS:g} s")
+        else:
+            reasons.append(f"SELECT 1 did not return within {READY_TIMEOUT_SECONDS:g} s")
+    except (OSError, asyncpg.PostgresError, asyncpg.InterfaceError) as exc:
+        reasons.append(f"database error: {exc.__class__.__name__}")
+
+    acquire_wait_ms = ((acquired or time.perf_counter()) - started) * 1000
+    if acquired is not None and acquire_wait_ms > READY_MAX_ACQUIRE_WAIT_MS:
+        reasons.append(
+            f"pool acquire took {acquire_wait_ms:.0f} ms "
+            f"(limit {READY_MAX_ACQUIRE_WAIT_MS:.0f} ms)"
+        )
+
+    pool_check = _pool_stats(pool)
+    pool_check["acquireWaitMs"] = round(acquire_wait_ms, 1)
+    return {
+        "ready": not reasons,
+        "reasons": reasons,
+        "database": database_check,
+        "pool": pool_check,
+    }
+
+
+async def readiness() -> dict:
+    """Return the cached probe result, running a new probe when it is stale."""
+    global _cached
+    if _cached and time.monotonic() - _cached[0] < READY_CACHE_SECONDS:
+        return _cached[1]
+    async with _lock:
+        if _cached and time.monotonic() - _cached[0] < READY_CACHE_SECONDS:
+            return _cached[1]
+        result = await _probe()
+        result["checkedAt"] = datetime.now(timezone.utc).isoformat()
+        _cached = (time.monotonic(), result)
+        return result
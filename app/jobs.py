@@ -0,0 +1,200 @@
+"""Periodic database jobs run by app.scheduler."""
+
+import os
+
+from app import metrics
+from app.scheduler import scheduler
+from app.services.application_service import VALID_STAGES, escape_html
+
+
+def _parse_windows(value: str) -> list[int]:
+    windows = sorted({int(part) for part in value.split(",") if part.strip()})
+    if not windows or windows[0] < 0:
+        raise ValueError(f"Invalid EXPIRY_ALERT_WINDOWS: {value!r}")
+    return windows
+
+
+# Alert once when a certificate comes within each of these many days of expiry.
+EXPIRY_ALERT_WINDOWS = _parse_windows(os.getenv("EXPIRY_ALERT_WINDOWS", "60,30,7"))
+EXPIRY_SCAN_INTERVAL = float(os.getenv("EXPIRY_SCAN_INTERVAL_SECONDS", "3600"))
+EXPIRY_SCAN_BATCH_SIZE = int(os.getenv("EXPIRY_SCAN_BATCH_SIZE", "1000"))
+
+
+def _parse_sla(value: str) -> dict[str, int]:
+    sla = {}
+    for part in value.split(","):
+        if not part.strip():
+            continue
+        stage, _, days = part.partition("=")
+        if not days.strip().isdigit() or int(days) < 1:
+            raise ValueError(f"Invalid SLA_DAYS_BY_STAGE entry: {part!r}")
+        if stage.strip() not in VALID_STAGES:
+            raise ValueError(f"Unknown stage in SLA_DAYS_BY_STAGE: {stage.strip()!r}")
+        sla[stage.strip()] = int(days)
+    return sla
+
+
+# Days an application may sit in a stage before it is escalated. Stages not
+# listed (approved, registered) have no SLA. An application is escalated once
+# daysInStage exceeds the limit, the same rule as the portal's overdue flag.
+SLA_DAYS_BY_STAGE = _parse_sla(
+    os.getenv("SLA_DAYS_BY_STAGE", "new=14,form-submitted=14,checks=14,review=14")
+)
+SLA_SCAN_INTERVAL = float(os.getenv("SLA_SCAN_INTERVAL_SECONDS", "3600"))
+
+# pg_try_advisory_xact_lock keys, one per job, so only one worker runs each.
+EXPIRY_SCAN_LOCK = 0x524B0001
+SLA_ESCALATION_LOCK = 0x524B0002
+
+
+def expiry_alert_text(row: dict) -> str:
+    label = row["check_key"].replace("_", " ").capitalize()
+    if row["person_id"]:
+        label = f"{label} for connected person {row['person_id']}"
+    return escape_html(
+        f"{label} expires on {row['expiry_date'].isoformat()} "
+        f"(within {row['window_days']} days)"
+    )
+
+
+@metrics.instrumented
+async def scan_expiring_checks(pool, windows: list[int] | None = None,
+                               batch_size: int | None = None) -> dict:
+    """Add an alert timeline event for each certificate entering an expiry window.
+
+    Each check is alerted at most once per window and expiry date, tracked in
+    check_expiry_alerts, so a renewed certificate starts over. Candidates
+    come from the application_checks expiry index in batches of
+    ``batch_size``. Each batch's alerts are written with executemany.
+    """
+    windows = windows or EXPIRY_ALERT_WINDOWS
+    batch_size = batch_size or EXPIRY_SCAN_BATCH_SIZE
+    counts = {"batches": 0, "alerts": 0}
+
+    async with pool.acquire() as conn:
+        async with conn.transaction():
+            locked = await conn.fetchval("SELECT pg_try_advisory_xact_lock($1)", EXPIRY_SCAN_LOCK)
+            if not locked:
+                return {"skipped": True}
+
+            while True:
+                # Alerted rows drop out of the NOT EXISTS, so no offset is needed.
+                rows = await conn.fetch(
+                    """SELECT c.application_id, c.person_id, c.check_key, c.expiry_date,
+                              w.window_days
+                       FROM application_checks c
+                       CROSS JOIN LATERAL (
+                           SELECT min(d) AS window_days FROM unnest($1::int[]) AS d
+                           WHERE d >= c.expiry_date - CURRENT_DATE
+                       ) AS w
+                       WHERE c.expiry_date BETWEEN CURRENT_DATE AND CURRENT_DATE + $2::int
+                         AND NOT EXISTS (
+                             SELECT 1 FROM check_expiry_alerts x
+                             WHERE x.application_id = c.application_id
+                               AND x.person_key = COALESCE(c.person_id, '')
+                               AND x.check_key = c.check_key
+                               AND x.expiry_date = c.expiry_date
+                               AND x.window_days <= w.window_days
+                         )
+                       ORDER BY c.expiry_date, c.application_id
+                       LIMIT $3""",
+                    windows, max(windows), batch_size,
+                )
+                if not rows:
+                    break
+
+                await conn.executemany(
+                    """INSERT INTO check_expiry_alerts
+                           (application_id, person_key, check_key, expiry_date, window_days)
+                       VALUES ($1, $2, $3, $4, $5)
+                       ON CONFLICT DO NOTHING""",
+                    [
+                        (r["application_id"], r["person_id"] or "", r["check_key"],
+                         r["expiry_date"], r["window_days"])
+                        for r in rows
+                    ],
+                )
+                await conn.executemany(
+                    """INSERT INTO timeline_events (application_id, event, type)
+                       VALUES ($1, $2, 'alert')""",
+                    [(r["application_id"], expiry_alert_text(r)) for r in rows],
+                )
+                await conn.execute(
+                    "UPDATE applications SET version = version + 1 WHERE id = ANY($1::text[])",
+                    list({r["application_id"] for r in rows}),
+                )
+
+                counts["batches"] += 1
+                counts["alerts"] += len(rows)
+                if len(rows) < batch_size:
+                    break
+
+    return counts
+
+
+@metrics.instrumented
+async def escalate_overdue_applications(pool, sla: dict[str, int] | None = None) -> dict:
+    """Raise the risk of applications stuck past their stage SLA and log why.
+
+    One statement finds overdue rows through the (stage, last_updated) index,
+    bumps risk one level and appends an alert timeline event for each. An
+    application is escalated once per stall: sla_escalated_at is only reset
+    by a later write, and escalation itself leaves last_updated alone so
+    daysInStage keeps counting.
+    """
+    sla = sla or SLA_DAYS_BY_STAGE
+    if not sla:
+        return {"escalated": 0}
+
+    async with pool.acquire() as conn:
+        async with conn.transaction():
+            locked = await conn.fetchval(
+                "SELECT pg_try_advisory_xact_lock($1)", SLA_ESCALATION_LOCK,
+            )
+            if not locked:
+                return {"skipped": True}
+
+            rows = await conn.fetch(
+                """WITH sla (stage, days) AS (
+                       SELECT * FROM unnest($1::text[], $2::int[])
+                   ),
+                   overdue AS (
+                       SELECT a.id, sla.days
+                       FROM sla
+                       JOIN applications a
+                         ON a.stage = sla.stage
+                        AND a.last_updated < NOW() - make_interval(days => sla.days + 1)
+                       WHERE a.sla_escalated_at IS NULL OR a.sla_escalated_at < a.last_updated
+                       FOR UPDATE OF a SKIP LOCKED
+                   ),
+                   escalated AS (
+                       UPDATE applications a
+                       SET risk = CASE WHEN a.risk IN ('medium', 'high') THEN 'high'
+                                       ELSE 'medium' END,
+                           sla_escalated_at = NOW(),
+                           version = a.version + 1
+                       FROM overdue
+                       WHERE a.id = overdue.id
+                       RETURNING a.id, a.stage, a.risk, overdue.days,
+                                 CURRENT_DATE - a.last_updated::date AS days_in_stage
+                   ),
+                   logged AS (
+                       INSERT INTO timeline_events (application_id, event, type)
+                       SELECT id,
+                              'SLA breached: ' || days_in_stage || ' days in ' || stage
+                              || ' (limit ' || days || '). Risk raised to ' || risk,
+                              'alert'
+                       FROM escalated
+                   )
+                   SELECT id, stage, risk FROM escalated""",
+                list(sla), list(sla.values()),
+            )
+
+    by_stage: dict[str, int] = {}
+    for row in rows:
+        by_stage[row["stage"]] = by_stage.get(row["stage"], 0) + 1
+    return {"escalated": len(rows), "byStage": by_stage}
+
+
+scheduler.add_job("expiry_scan", scan_expiring_checks, EXPIRY_SCAN_INTERVAL)
+scheduler.add_job("sla_escalation", escalate_overdue_applications, SLA_SCAN_INTERVAL)
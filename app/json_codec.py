@@ -0,0 +1,67 @@
+"""JSON encoding shared by the database codecs and API responses.
+
+Backed by orjson when it is installed. Set ``JSON_ENCODER=json`` to force the
+standard library encoder (``auto``, the default, prefers orjson).
+"""
+
+import json
+import logging
+import os
+from datetime import date, datetime
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - exercised only without orjson
+    orjson = None
+
+logger = logging.getLogger(__name__)
+
+JSON_ENCODERS = ("auto", "orjson", "json")
+
+
+def select_backend(requested: str) -> str:
+    requested = requested.lower()
+    if requested not in JSON_ENCODERS:
+        raise ValueError(f"JSON_ENCODER must be one of: {', '.join(JSON_ENCODERS)}")
+    if requested == "json" or orjson is None:
+        if requested == "orjson":
+            logger.warning("JSON_ENCODER=orjson but orjson is not installed; using json")
+        return "json"
+    return "orjson"
+
+
+BACKEND = select_backend(os.getenv("JSON_ENCODER", "auto"))
+_use_orjson = BACKEND == "orjson"
+
+
+def _default(value):
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def dumps(value) -> bytes:
+    """Serialise a value to compact UTF-8 bytes; dates become ISO 8601 strings."""
+    if _use_orjson:
+        return orjson.dumps(value)
+    return json.dumps(
+        value, ensure_ascii=False, separators=(",", ":"), default=_default,
+    ).encode()
+
+
+def loads(data: bytes | str):
+    if _use_orjson:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+# PostgreSQL's binary jsonb wire format is a version byte followed by the text.
+_JSONB_VERSION = b"\x01"
+
+
+def encode_jsonb(value) -> bytes:
+    return _JSONB_VERSION + dumps(value)
+
+
+def decode_jsonb(data: bytes):
+    return loads(data[1:])
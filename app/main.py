@@ -1,44 +1,91 @@
 """FastAPI entry point for the ReadyKids CMA portal."""
 
+import asyncio
 import logging
 import os
-from contextlib import asynccontextmanager
-from pathlib import Path
+from contextlib import asynccontextmanager, suppress
 
 from dotenv import load_dotenv
-from fastapi import FastAPI, Request
-from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import FileResponse, JSONResponse
-from fastapi.staticfiles import StaticFiles
-from starlette.middleware.base import BaseHTTPMiddleware
-
-from app.database import init_pool, close_pool
-from app.routes.applications import router
 
+# Load .env before importing app modules that read settings at import time.
 load_dotenv()
 
+from fastapi import FastAPI, Request  # noqa: E402
+from fastapi.middleware.cors import CORSMiddleware  # noqa: E402
+from fastapi.responses import JSONResponse, Response  # noqa: E402
+from fastapi.staticfiles import StaticFiles  # noqa: E402
+from starlette.datastructures import MutableHeaders  # noqa: E402
+from starlette.types import ASGIApp, Message, Receive, Scope, Send  # noqa: E402
+
+from app import health, jobs, metrics, request_context, static_pages  # noqa: E402,F401
+from app.events import broadcaster  # noqa: E402
+from app.database import DB_POOL_RETRY_AFTER, PoolTimeout, init_pool, close_pool  # noqa: E402
+from app.responses import FastJSONResponse  # noqa: E402
+from app.scheduler import scheduler  # noqa: E402
+from app.routes.applications import router  # noqa: E402
+from app.routes.checks import router as checks_router  # noqa: E402
+from app.routes.stats import router as stats_router  # noqa: E402
+
 logger = logging.getLogger(__name__)
 
-PUBLIC_DIR = Path(__file__).resolve().parent.parent / "public"
+PUBLIC_DIR = static_pages.PUBLIC_DIR
+
+DEV_MODE = os.getenv("APP_ENV", "production").lower() == "development"
+
+
+SECURITY_HEADERS = {
+    "X-Content-Type-Options": "nosniff",
+    "X-Frame-Options": "DENY",
+    "X-XSS-Protection": "1; mode=block",
+}
+
+
+class SecurityHeadersMiddleware:
+    """Pure ASGI middleware that sets SECURITY_HEADERS on http.response.start.
 
+    Unlike BaseHTTPMiddleware it never wraps the response body, so streaming
+    and file responses pass through untouched.
+    """
 
-class SecurityHeadersMiddleware(BaseHTTPMiddleware):
-    async def dispatch(self, request: Request, call_next):
-        response = await call_next(request)
-        response.headers["X-Content-Type-Options"] = "nosniff"
-        response.headers["X-Frame-Options"] = "DENY"
-        response.headers["X-XSS-Protection"] = "1; mode=block"
-        return response
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        async def send_with_headers(message: Message):
+            if message["type"] == "http.response.start":
+                headers = MutableHeaders(scope=message)
+                for name, value in SECURITY_HEADERS.items():
+                    headers[name] = value
+            await send(message)
+
+        await self.app(scope, receive, send_with_headers)
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     await init_pool()
+    static_pages.load_pages()
+    watcher = asyncio.create_task(static_pages.watch_pages()) if DEV_MODE else None
+    scheduler.start()
     yield
+    await scheduler.stop()
+    if watcher:
+        watcher.cancel()
+        with suppress(asyncio.CancelledError):
+            await watcher
+    await broadcaster.close()
     await close_pool()
 
 
-app = FastAPI(title="ReadyKids CMA", lifespan=lifespan)
+app = FastAPI(
+    title="ReadyKids CMA",
+    lifespan=lifespan,
+    default_response_class=FastJSONResponse,
+)
 
 app.add_middleware(
     CORSMiddleware,
@@ -49,6 +96,21 @@ app.add_middleware(
 
 app.add_middleware(SecurityHeadersMiddleware)
 
+app.add_middleware(request_context.RequestContextMiddleware)
+
+# Added last so it is outermost and times the other middleware too.
+app.add_middleware(metrics.MetricsMiddleware)
+
+
+@app.exception_handler(PoolTimeout)
+async def pool_timeout_handler(request: Request, exc: PoolTimeout):
+    logger.warning("Pool exhausted on %s %s: %s", request.method, request.url.path, exc)
+    return JSONResponse(
+        status_code=503,
+        content={"detail": "Service busy, please retry"},
+        headers={"Retry-After": str(DB_POOL_RETRY_AFTER)},
+    )
+
 
 @app.exception_handler(Exception)
 async def global_exception_handler(request: Request, exc: Exception):
@@ -64,18 +126,42 @@ async def health_check():
     return {"status": "ok"}
 
 
+@app.get("/health/live")
+async def liveness_check():
+    """The process is up and serving requests; never touches the database."""
+    return {"status": "ok"}
+
+
+@app.get("/health/ready")
+async def readiness_check():
+    """503 while the database is unreachable or the pool is saturated."""
+    result = await health.readiness()
+    return FastJSONResponse(
+        {"status": "ok" if result["ready"] else "unavailable", **result},
+        status_code=200 if result["ready"] else 503,
+        headers={"Cache-Control": "no-store"},
+    )
+
+
+@app.get("/metrics", include_in_schema=False)
+async def prometheus_metrics():
+    return Response(metrics.render(), media_type=metrics.CONTENT_TYPE)
+
+
 app.include_router(router)
+app.include_router(checks_router)
+app.include_router(stats_router)
 app.mount("/static", StaticFiles(directory=str(PUBLIC_DIR)), name="static")
 
 
 @app.get("/register")
-async def register_page():
-    return FileResponse(PUBLIC_DIR / "childminder-registration-complete.html")
+async def register_page(request: Request):
+    return static_pages.PAGES["register"].response(request)
 
 
 @app.get("/admin")
-async def admin_page():
-    return FileResponse(PUBLIC_DIR / "cma-portal-v2.html")
+async def admin_page(request: Request):
+    return static_pages.PAGES["admin"].response(request)
 
 
 if __name__ == "__main__":
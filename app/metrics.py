@@ -0,0 +1,204 @@
+"""In-process Prometheus metrics, rendered by GET /metrics.
+
+All updates happen on the event loop thread, so samples are plain dict and
+list updates with no locks. Each worker process reports its own figures;
+Prometheus aggregates across workers by instance label.
+"""
+
+import time
+from bisect import bisect_left
+from contextvars import ContextVar
+from functools import wraps
+
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# Seconds. Covers sub-millisecond cache hits up to slow exports.
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+_registry: list = []
+
+# Name of the instrumented service function currently running, used to
+# label queries made through app.database's connection proxy.
+current_function: ContextVar[str] = ContextVar("current_function", default="other")
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(names: tuple[str, ...], values: tuple, extra: str = "") -> str:
+    parts = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+def _number(value) -> str:
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Counter:
+    def __init__(self, name: str, help: str, labels: tuple[str, ...] = ()):
+        self.name = name
+        self.help = help
+        self.label_names = labels
+        self.values: dict[tuple, float] = {}
+        _registry.append(self)
+
+    def inc(self, *labels, amount: float = 1):
+        self.values[labels] = self.values.get(labels, 0) + amount
+
+    def render(self) -> list[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        for labels, value in self.values.items():
+            lines.append(f"{self.name}{_labels(self.label_names, labels)} {_number(value)}")
+        return lines
+
+
+class Histogram:
+    def __init__(self, name: str, help: str, labels: tuple[str, ...] = (),
+                 buckets: tuple[float, ...] = LATENCY_BUCKETS):
+        self.name = name
+        self.help = help
+        self.label_names = labels
+        self.buckets = buckets
+        # labels -> [per-bucket counts (last one is +Inf), sum]
+        self.series: dict[tuple, list] = {}
+        _registry.append(self)
+
+    def observe(self, value: float, *labels):
+        series = self.series.get(labels)
+        if series is None:
+            series = self.series[labels] = [[0] * (len(self.buckets) + 1), 0.0]
+        series[0][bisect_left(self.buckets, value)] += 1
+        series[1] += value
+
+    def render(self) -> list[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        for labels, (counts, total) in self.series.items():
+            cumulative = 0
+            for bound, count in zip((*self.buckets, "+Inf"), counts):
+                cumulative += count
+                le = f'le="{bound}"'
+                lines.append(
+                    f"{self.name}_bucket{_labels(self.label_names, labels, le)} {cumulative}"
+                )
+            lines.append(f"{self.name}_sum{_labels(self.label_names, labels)} {_number(total)}")
+            lines.append(f"{self.name}_count{_labels(self.label_names, labels)} {cumulative}")
+        return lines
+
+
+class Gauge:
+    """Gauge read from ``func()`` at scrape time; None means no sample."""
+
+    def __init__(self, name: str, help: str, func):
+        self.name = name
+        self.help = help
+        self.func = func
+        _registry.append(self)
+
+    def render(self) -> list[str]:
+        value = self.func()
+        if value is None:
+            return []
+        return [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} gauge",
+                f"{self.name} {_number(value)}"]
+
+
+def render() -> str:
+    lines = []
+    for metric in _registry:
+        lines.extend(metric.render())
+    return "\n".join(lines) + "\n"
+
+
+HTTP_REQUESTS = Counter(
+    "http_requests_total", "HTTP responses by route template and status code.",
+    ("method", "route", "status"),
+)
+HTTP_DURATION = Histogram(
+    "http_request_duration_seconds", "Time from request to last response byte.",
+    ("method", "route"),
+)
+SERVICE_DURATION = Histogram(
+    "service_call_duration_seconds", "Duration of application_service calls.", ("function",),
+)
+DB_QUERIES = Counter(
+    "db_queries_total", "Queries sent through the pool, by calling service function.",
+    ("function",),
+)
+DB_QUERY_DURATION = Histogram(
+    "db_query_duration_seconds", "Query round trip time, by calling service function.",
+    ("function",),
+)
+POOL_ACQUIRE_WAIT = Histogram(
+    "db_pool_acquire_wait_seconds", "Time spent waiting for a pooled connection.",
+)
+
+
+def instrumented(func):
+    """Time an async service function and label the queries it makes."""
+    name = func.__name__
+
+    @wraps(func)
+    async def wrapper(*args, **kwargs):
+        token = current_function.set(name)
+        started = time.perf_counter()
+        try:
+            return await func(*args, **kwargs)
+        finally:
+            SERVICE_DURATION.observe(time.perf_counter() - started, name)
+            current_function.reset(token)
+
+    return wrapper
+
+
+def record_query(duration: float | None):
+    """Count one query for the current service function; cursors pass None."""
+    function = current_function.get()
+    DB_QUERIES.inc(function)
+    if duration is not None:
+        DB_QUERY_DURATION.observe(duration, function)
+
+
+class MetricsMiddleware:
+    """Pure ASGI middleware recording status counts and latency per route template.
+
+    The route template (e.g. ``/api/applications/{app_id}``) is read from the
+    scope after routing, so ids never become label values. Requests no route
+    matched are labelled "unmatched", and mounts by their prefix.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        started = time.perf_counter()
+        root_path = scope.get("root_path", "")
+        status = 500
+
+        async def send_with_status(message: Message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            route = scope.get("route")
+            if route is not None:
+                template = route.path
+            elif scope.get("root_path", "") != root_path:
+                template = scope["root_path"] + "/*"
+            else:
+                template = "unmatched"
+            method = scope["method"]
+            HTTP_DURATION.observe(time.perf_counter() - started, method, template)
+            HTTP_REQUESTS.inc(method, template, status)
@@ -0,0 +1,350 @@
+"""Registry of the fixed SQL statements used by application_service.
+
+Each statement is registered under a name. ``hot=True`` statements are
+prepared on every new pooled connection by prepare_hot(), called from the
+pool's init hook, so the first request on a fresh connection does not pay
+for parsing and planning. app.database's connection proxy reports every
+execution to record(), which keeps per-statement counts and timings for
+GET /api/stats/queries.
+
+Statements assembled at call time from filters or optional columns
+(_list_query, _search_query, update_application, find_checks) stay with
+their builders in application_service.
+"""
+
+import inspect
+import logging
+
+import asyncpg
+
+logger = logging.getLogger(__name__)
+
+_names: dict[str, str] = {}
+_hot: list[str] = []
+# name -> [calls, total seconds, max seconds]
+_stats: dict[str, list] = {}
+
+
+def statement(name: str, sql: str, hot: bool = False) -> str:
+    if name in _stats:
+        raise ValueError(f"Duplicate statement name: {name}")
+    _names[sql] = name
+    _stats[name] = [0, 0.0, 0.0]
+    if hot:
+        _hot.append(sql)
+    return sql
+
+
+def version_condition(param: int) -> str:
+    """WHERE condition for an If-Match precondition whose versions are ``$param``."""
+    return f" AND version = ANY(${param}::int[])"
+
+
+def _if_match(sql: str, param: int) -> str:
+    return sql.format(condition=version_condition(param))
+
+
+# Insert column order shared by create_application and the bulk COPY path.
+# stage and risk are left to their column defaults ('new', 'low'), and name is
+# generated, so neither appears here.
+APPLICATION_COLUMNS = (
+    "id", "title", "first_name", "middle_names", "last_name",
+    "email", "phone", "dob", "gender", "right_to_work", "ni_number",
+    "home_address", "premises_type", "premises_address",
+    "premises_details", "local_authority",
+    "registers", "service", "progress",
+    "checks", "connected_persons",
+    "previous_names", "address_history", "qualifications",
+    "employment_history", "references_data",
+    "household", "suitability", "declaration",
+    "start_date", "last_updated", "created_at",
+)
+
+# Columns the database fills in rather than the insert: generated, defaulted,
+# or set by later updates and jobs.
+SERVER_COLUMNS = (
+    "name", "stage", "risk", "ofsted_check",
+    "registration_date", "registration_number", "version", "sla_escalated_at",
+)
+
+# Every column a full application read needs. search_vector is left out: it
+# only serves WHERE clauses, and SELECT * would send it as text with each row.
+APPLICATION_READ_COLUMNS = ", ".join(APPLICATION_COLUMNS + SERVER_COLUMNS)
+
+TIMELINE_COLUMNS = ("application_id", "event", "type", "created_at")
+
+
+# Reads
+
+GET_APPLICATION = statement(
+    "get_application",
+    f"SELECT {APPLICATION_READ_COLUMNS} FROM applications WHERE id = $1",
+    hot=True,
+)
+
+GET_TIMELINE = statement(
+    "get_timeline",
+    """SELECT event, type, created_at FROM timeline_events
+       WHERE application_id = $1 ORDER BY created_at ASC""",
+    hot=True,
+)
+
+GET_TIMELINES = statement(
+    "get_timelines",
+    """SELECT application_id, event, type, created_at FROM timeline_events
+       WHERE application_id = ANY($1::text[])
+       ORDER BY created_at ASC, id ASC""",
+    hot=True,
+)
+
+GET_TIMELINE_EVENT = statement(
+    "get_timeline_event",
+    "SELECT event, type, created_at FROM timeline_events WHERE id = $1",
+    hot=True,
+)
+
+GET_VERSION = statement(
+    "get_version", "SELECT version FROM applications WHERE id = $1",
+)
+
+SYNC_WATERMARK = statement("sync_watermark", "SELECT NOW()")
+
+DELETED_SINCE = statement(
+    "deleted_since",
+    """SELECT id FROM deleted_applications
+       WHERE deleted_at > $1 ORDER BY deleted_at""",
+)
+
+EXPORT_APPLICATIONS = statement(
+    "export_applications",
+    f"SELECT {APPLICATION_READ_COLUMNS} FROM applications ORDER BY created_at, id",
+)
+
+
+# Writes
+
+NEXT_APPLICATION_ID = statement(
+    "next_application_id", "SELECT nextval('application_id_seq') AS val",
+)
+
+RESERVE_APPLICATION_IDS = statement(
+    "reserve_application_ids",
+    "SELECT nextval('application_id_seq') AS val FROM generate_series(1, $1)",
+)
+
+INSERT_APPLICATION = statement(
+    "insert_application",
+    f"INSERT INTO applications ({', '.join(APPLICATION_COLUMNS)}) "
+    f"VALUES ({', '.join(f'${i}' for i in range(1, len(APPLICATION_COLUMNS) + 1))})",
+)
+
+INSERT_TIMELINE_EVENT = statement(
+    "insert_timeline_event",
+    """INSERT INTO timeline_events (application_id, event, type, created_at)
+       VALUES ($1, $2, $3, $4)""",
+)
+
+SYNC_APPLICATION_CHECKS = statement(
+    "sync_application_checks", "SELECT sync_application_checks($1::text[])", hot=True,
+)
+
+# The timeline is part of the application's representation, so a new entry
+# bumps its version (and therefore its ETag) too. No row means no application.
+ADD_TIMELINE_EVENT = statement(
+    "add_timeline_event",
+    """WITH bumped AS (
+           UPDATE applications SET version = version + 1 WHERE id = $1 RETURNING version
+       ),
+       inserted AS (
+           INSERT INTO timeline_events (application_id, event, type)
+           SELECT $1, $2, $3 FROM bumped
+           RETURNING event, type, created_at
+       )
+       SELECT inserted.event, inserted.type, inserted.created_at, bumped.version
+       FROM inserted, bumped""",
+    hot=True,
+)
+
+_UPDATE_CHECK = """UPDATE applications
+   SET checks = jsonb_set(checks, ARRAY[$2::text], (checks -> $2::text) || $3::jsonb),
+       progress = checks_progress(
+           jsonb_set(checks, ARRAY[$2::text], (checks -> $2::text) || $3::jsonb)
+       ),
+       last_updated = NOW(),
+       version = version + 1
+   WHERE id = $1 AND jsonb_typeof(checks -> $2::text) = 'object'{condition}
+   RETURNING checks -> $2::text AS check, progress, version"""
+
+UPDATE_CHECK = statement("update_check", _UPDATE_CHECK.format(condition=""), hot=True)
+UPDATE_CHECK_IF_MATCH = statement(
+    "update_check_if_match", _if_match(_UPDATE_CHECK, 4), hot=True,
+)
+
+_UPDATE_PERSON_CHECK = """UPDATE applications
+   SET connected_persons = (
+           SELECT jsonb_agg(
+               CASE WHEN p ->> 'id' = $2::text
+                    THEN jsonb_set(p, ARRAY['checks', $3::text],
+                                   (p -> 'checks' -> $3::text) || $4::jsonb)
+                    ELSE p END
+               ORDER BY i)
+           FROM jsonb_array_elements(connected_persons) WITH ORDINALITY AS x(p, i)
+       ),
+       last_updated = NOW(),
+       version = version + 1
+   WHERE id = $1
+     AND connected_persons @> jsonb_build_array(jsonb_build_object(
+         'id', $2::text, 'checks', jsonb_build_object($3::text, '{{}}'::jsonb))){condition}
+   RETURNING (
+       SELECT p -> 'checks' -> $3::text
+       FROM jsonb_array_elements(connected_persons) AS p
+       WHERE p ->> 'id' = $2::text
+       LIMIT 1
+   ) AS check, version"""
+
+UPDATE_PERSON_CHECK = statement(
+    "update_person_check", _UPDATE_PERSON_CHECK.format(condition=""), hot=True,
+)
+UPDATE_PERSON_CHECK_IF_MATCH = statement(
+    "update_person_check_if_match", _if_match(_UPDATE_PERSON_CHECK, 5), hot=True,
+)
+
+_DELETE_APPLICATION = "DELETE FROM applications WHERE id = $1{condition}"
+
+DELETE_APPLICATION = statement("delete_application", _DELETE_APPLICATION.format(condition=""))
+DELETE_APPLICATION_IF_MATCH = statement(
+    "delete_application_if_match", _if_match(_DELETE_APPLICATION, 2),
+)
+
+
+# Statistics
+
+PIPELINE_STATS = statement(
+    "pipeline_stats",
+    """SELECT stage, risk, local_authority, applications, progress_sum,
+              updated_epoch_sum, extract(epoch FROM NOW())::float8 AS now_epoch
+       FROM pipeline_stats
+       WHERE applications > 0
+       ORDER BY stage, risk, local_authority""",
+    hot=True,
+)
+
+FUNNEL_DURATIONS = statement(
+    "funnel_durations",
+    """WITH transitions AS (
+           SELECT t.from_stage,
+                  t.created_at - COALESCE(
+                      LAG(t.created_at) OVER (
+                          PARTITION BY t.application_id ORDER BY t.created_at, t.id
+                      ),
+                      a.created_at
+                  ) AS spent
+           FROM timeline_events t
+           JOIN applications a ON a.id = t.application_id
+           WHERE t.type = 'stage'
+       )
+       SELECT from_stage AS stage, count(*) AS transitions,
+              percentile_cont(0.5) WITHIN GROUP (
+                  ORDER BY extract(epoch FROM spent)) / 86400 AS median_days,
+              percentile_cont(0.9) WITHIN GROUP (
+                  ORDER BY extract(epoch FROM spent)) / 86400 AS p90_days
+       FROM transitions
+       WHERE from_stage IS NOT NULL
+       GROUP BY from_stage""",
+)
+
+FUNNEL_FURTHEST_STAGE = statement(
+    "funnel_furthest_stage",
+    """WITH visited AS (
+           SELECT id AS application_id, stage FROM applications
+           UNION ALL
+           SELECT application_id, unnest(ARRAY[from_stage, to_stage])
+           FROM timeline_events WHERE type = 'stage'
+       ),
+       positions AS (
+           SELECT max(array_position($1::text[], stage)) AS position
+           FROM visited
+           GROUP BY application_id
+       )
+       SELECT position, count(*) AS applications
+       FROM positions
+       WHERE position IS NOT NULL
+       GROUP BY position""",
+)
+
+FUNNEL_TIME_TO_REGISTRATION = statement(
+    "funnel_time_to_registration",
+    """SELECT count(*) AS registered,
+              percentile_cont(0.5) WITHIN GROUP (
+                  ORDER BY (registration_date - start_date)::float8) AS median_days,
+              percentile_cont(0.9) WITHIN GROUP (
+                  ORDER BY (registration_date - start_date)::float8) AS p90_days
+       FROM applications
+       WHERE registration_date IS NOT NULL AND start_date IS NOT NULL""",
+)
+
+
+def record(sql, duration: float | None):
+    """Count one execution of ``sql`` if it is a registered statement."""
+    name = _names.get(sql)
+    if name is None:
+        return
+    stats = _stats[name]
+    stats[0] += 1
+    if duration is not None:
+        stats[1] += duration
+        if duration > stats[2]:
+            stats[2] = duration
+
+
+def stats() -> dict:
+    """Per-statement execution counts and timings, busiest first."""
+    hot = {_names[sql] for sql in _hot}
+    result = {}
+    for name, (calls, total, longest) in sorted(
+        _stats.items(), key=lambda item: item[1][1], reverse=True,
+    ):
+        result[name] = {
+            "calls": calls,
+            "totalMs": round(total * 1000, 1),
+            "meanMs": round(total * 1000 / calls, 2) if calls else None,
+            "maxMs": round(longest * 1000, 1),
+            "prepared": name in hot,
+        }
+    return result
+
+
+def _supports_cached_prepare(connection_class) -> bool:
+    """Whether ``connection_class`` has the private _prepare() prepare_hot uses."""
+    prepare = getattr(connection_class, "_prepare", None)
+    if prepare is None:
+        return False
+    try:
+        inspect.signature(prepare).bind(None, "", use_cache=True)
+    except (TypeError, ValueError):
+        return False
+    return True
+
+
+# Checked once against the installed asyncpg. When it no longer matches,
+# statements are prepared lazily on first use, as asyncpg does by default.
+CACHED_PREPARE = _supports_cached_prepare(asyncpg.Connection)
+
+
+async def prepare_hot(conn):
+    """Seed ``conn``'s statement cache with the hot statements.
+
+    asyncpg's public prepare() returns a separate statement that bypasses the
+    cache fetch() and friends look in, so this uses the cache-aware _prepare()
+    they use internally. If that has gone or changed, nothing is prepared
+    here. A statement whose tables do not exist yet, as on a first deploy
+    before schema.sql has run, is skipped and prepared lazily on first use.
+    """
+    if not CACHED_PREPARE:
+        return
+    for sql in _hot:
+        try:
+            await conn._prepare(sql, use_cache=True)
+        except (asyncpg.UndefinedTableError, asyncpg.UndefinedColumnError,
+                asyncpg.UndefinedFunctionError):
+            logger.debug("Not preparing %s: schema not ready", _names[sql])
@@ -0,0 +1,118 @@
+"""Per-request accounting of database, transform and serialization time.
+
+RequestContextMiddleware starts a RequestStats for each HTTP request and
+stores it in a context variable. The pooled connection proxy in app.database,
+the shaping helpers in application_service and FastJSONResponse add to it.
+The totals go out in a Server-Timing header and, above SLOW_REQUEST_MS, in
+a slow-request log line.
+"""
+
+import logging
+import os
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app import json_codec
+
+logger = logging.getLogger(__name__)
+
+# Requests slower than this are logged with their breakdown; 0 disables the log.
+SLOW_REQUEST_MS = float(os.getenv("SLOW_REQUEST_MS", "500"))
+
+
+class RequestStats:
+    __slots__ = ("queries", "rows", "db", "transform", "serialize")
+
+    def __init__(self):
+        self.queries = 0
+        self.rows = 0
+        self.db = 0.0
+        self.transform = 0.0
+        self.serialize = 0.0
+
+    def server_timing(self) -> str:
+        return (
+            f'db;dur={self.db * 1000:.1f};desc="{self.queries} queries, {self.rows} rows", '
+            f"transform;dur={self.transform * 1000:.1f}, "
+            f"serialize;dur={self.serialize * 1000:.1f}"
+        )
+
+
+current_request: ContextVar[RequestStats | None] = ContextVar("current_request", default=None)
+
+
+def record_query(duration: float, rows: int):
+    stats = current_request.get()
+    if stats is not None:
+        stats.queries += 1
+        stats.rows += rows
+        stats.db += duration
+
+
+@contextmanager
+def phase(name: str):
+    """Add the time spent in the block to the current request's ``name`` total.
+
+    Phases must not nest, or the inner one is counted twice.
+    """
+    stats = current_request.get()
+    if stats is None:
+        yield
+        return
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        setattr(stats, name, getattr(stats, name) + time.perf_counter() - started)
+
+
+class RequestContextMiddleware:
+    """Pure ASGI middleware that owns each request's RequestStats."""
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stats = RequestStats()
+        token = current_request.set(stats)
+        started = time.perf_counter()
+        responded = None
+        status = 500
+
+        async def send_with_timing(message: Message):
+            nonlocal responded, status
+            if message["type"] == "http.response.start":
+                responded = time.perf_counter()
+                status = message["status"]
+                MutableHeaders(scope=message).append("Server-Timing", stats.server_timing())
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            current_request.reset(token)
+            # Time to the response headers: SSE streams and exports stay open
+            # long after that without being slow.
+            elapsed_ms = ((responded or time.perf_counter()) - started) * 1000
+            if SLOW_REQUEST_MS and elapsed_ms >= SLOW_REQUEST_MS:
+                route = scope.get("route")
+                logger.warning("Slow request: %s", json_codec.dumps({
+                    "method": scope["method"],
+                    "path": scope["path"],
+                    "route": route.path if route is not None else None,
+                    "status": status,
+                    "durationMs": round(elapsed_ms, 1),
+                    "dbMs": round(stats.db * 1000, 1),
+                    "queries": stats.queries,
+                    "rows": stats.rows,
+                    "transformMs": round(stats.transform * 1000, 1),
+                    "serializeMs": round(stats.serialize * 1000, 1),
+                }).decode())
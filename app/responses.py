@@ -0,0 +1,17 @@
+"""Response classes shared by the app and its routers."""
+
+from fastapi.responses import JSONResponse
+
+from app import json_codec, request_context
+
+
+class FastJSONResponse(JSONResponse):
+    """JSONResponse rendered with the encoder selected in app.json_codec.
+
+    Routes that already hold plain dicts can return this directly to skip
+    FastAPI's jsonable_encoder pass as well.
+    """
+
+    def render(self, content) -> bytes:
+        with request_context.phase("serialize"):
+            return json_codec.dumps(content)
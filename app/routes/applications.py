@@ -1,93 +1,445 @@
 """REST endpoints for application CRUD and timeline events."""
 
+import csv
+import io
+import logging
+import os
 import re
+import tempfile
+from datetime import date, datetime, timezone
 
-from fastapi import APIRouter, HTTPException
+import asyncpg
+from fastapi import APIRouter, Header, HTTPException, Request
+from fastapi.responses import StreamingResponse
+from starlette.concurrency import run_in_threadpool
+from app import events, json_codec
 from app.database import get_pool
+from app.responses import FastJSONResponse
 from app.services import application_service as svc
 
+logger = logging.getLogger(__name__)
+
 router = APIRouter(prefix="/api/applications")
 
 EMAIL_REGEX = re.compile(r"^[a-zA-Z0-9._%+\-]+@[a-zA-Z0-9.\-]+\.[a-zA-Z]{2,}$")
 
-VALID_STAGES = frozenset([
-    "new", "form-submitted", "checks", "review",
-    "approved", "blocked", "registered",
-])
+VALID_STAGES = svc.VALID_STAGES
 
 VALID_TIMELINE_TYPES = frozenset(["action", "complete", "alert", "note"])
 
+VALID_CHECK_STATUSES = frozenset([
+    "not-started", "pending", "complete", "blocked", "expired",
+])
+
 MAX_FIRST_NAME = 200
 MAX_LAST_NAME = 200
 MAX_EMAIL = 254
 MAX_EVENT_LENGTH = 2000
 
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 500
 
-@router.get("/")
-async def list_applications():
-    pool = get_pool()
-    return await svc.get_all_applications(pool)
+# Valid lines of a bulk import are written in COPY batches of this size.
+BULK_IMPORT_BATCH_SIZE = int(os.getenv("BULK_IMPORT_BATCH_SIZE", "1000"))
+# Uploads larger than this are spooled to a temporary file instead of memory.
+BULK_SPOOL_BYTES = 1024 * 1024
+# Larger uploads are refused with 413.
+BULK_MAX_BYTES = int(os.getenv("BULK_MAX_BYTES", str(100 * 1024 * 1024)))
 
+# Export rows are buffered into chunks of about this size before being sent.
+EXPORT_CHUNK_BYTES = 64 * 1024
 
-@router.get("/{app_id}")
-async def get_application(app_id: str):
-    pool = get_pool()
-    app = await svc.get_application(pool, app_id)
-    if not app:
-        raise HTTPException(status_code=404, detail="Application not found")
-    return app
 
+@router.get("/")
+async def list_applications(
+    stage: str | None = None,
+    risk: str | None = None,
+    local_authority: str | None = None,
+    premises_type: str | None = None,
+    limit: int | None = None,
+    cursor: str | None = None,
+    view: str | None = None,
+    fields: str | None = None,
+    since: str | None = None,
+):
+    if stage is not None and stage not in VALID_STAGES:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Invalid stage. Must be one of: {', '.join(sorted(VALID_STAGES))}",
+        )
+
+    filters = {
+        "stage": stage,
+        "risk": risk,
+        "local_authority": local_authority,
+        "premises_type": premises_type.lower() if premises_type else None,
+    }
 
-@router.post("/", status_code=201)
-async def create_application(body: dict):
-    personal = body.get("personal") or {}
+    projection = _parse_projection(view, fields)
 
-    first_name = (personal.get("firstName") or "").strip()
-    last_name = (personal.get("lastName") or "").strip()
-    email = (personal.get("email") or "").strip()
+    pool = get_pool()
+    if since is not None:
+        if limit is not None or cursor is not None or any(filters.values()):
+            raise HTTPException(
+                status_code=400,
+                detail="since cannot be combined with filters or pagination",
+            )
+        return FastJSONResponse(
+            await svc.get_changes_since(pool, _parse_since(since), projection)
+        )
 
-    if not first_name or not last_name or not email:
+    if limit is None and cursor is None:
+        return FastJSONResponse(
+            await svc.get_all_applications(pool, filters, projection)
+        )
+
+    if limit is None:
+        limit = DEFAULT_PAGE_SIZE
+    if limit < 1 or limit > MAX_PAGE_SIZE:
         raise HTTPException(
             status_code=400,
-            detail="First name, last name, and email are required",
+            detail=f"Limit must be between 1 and {MAX_PAGE_SIZE}",
         )
 
-    if len(first_name) > MAX_FIRST_NAME:
+    try:
+        after = svc.decode_cursor(cursor) if cursor else None
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+    items, next_cursor = await svc.get_applications_page(
+        pool, limit, after, filters, projection,
+    )
+    return FastJSONResponse({"items": items, "next": next_cursor})
+
+
+def _parse_since(value: str) -> datetime:
+    try:
+        # A "+" offset sent unescaped in a query string arrives as a space.
+        since = datetime.fromisoformat(value.strip().replace(" ", "+"))
+    except ValueError:
         raise HTTPException(
             status_code=400,
-            detail=f"First name must not exceed {MAX_FIRST_NAME} characters",
+            detail="Invalid since. Must be an ISO 8601 timestamp",
         )
+    if since.tzinfo is None:
+        since = since.replace(tzinfo=timezone.utc)
+    return since
 
-    if len(last_name) > MAX_LAST_NAME:
+
+def _parse_projection(view: str | None, fields: str | None) -> tuple[str, ...] | None:
+    """Resolve ?view= / ?fields= into the tuple of keys to project, or None for full."""
+    if fields:
+        requested = [f.strip() for f in fields.split(",") if f.strip()]
+        unknown = [f for f in requested if f not in svc.FIELD_COLUMNS]
+        if unknown:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Unknown fields: {', '.join(unknown)}. "
+                       f"Must be any of: {', '.join(svc.FIELD_COLUMNS)}",
+            )
+        return tuple(dict.fromkeys(["id", *requested]))
+
+    if view is None or view == "full":
+        return None
+    if view == "summary":
+        return svc.SUMMARY_FIELDS
+    raise HTTPException(
+        status_code=400,
+        detail="Invalid view. Must be one of: full, summary",
+    )
+
+
+@router.get("/stream")
+async def stream_application_changes():
+    """Server-Sent Events feed of per-application changes for live dashboards."""
+    return StreamingResponse(
+        events.stream_changes(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+# Search terms are matched by trigram, so very short ones match almost everything.
+MIN_SEARCH_LENGTH = 2
+MAX_SEARCH_LENGTH = 200
+
+
+@router.get("/search")
+async def search_applications(q: str = "", limit: int = DEFAULT_PAGE_SIZE, cursor: str | None = None):
+    """Ranked name, email, phone, address and connected person search."""
+    q = q.strip()
+    if not MIN_SEARCH_LENGTH <= len(q) <= MAX_SEARCH_LENGTH:
         raise HTTPException(
             status_code=400,
-            detail=f"Last name must not exceed {MAX_LAST_NAME} characters",
+            detail=f"q must be between {MIN_SEARCH_LENGTH} and {MAX_SEARCH_LENGTH} characters",
         )
-
-    if len(email) > MAX_EMAIL:
+    if limit < 1 or limit > MAX_PAGE_SIZE:
         raise HTTPException(
             status_code=400,
-            detail=f"Email must not exceed {MAX_EMAIL} characters",
+            detail=f"Limit must be between 1 and {MAX_PAGE_SIZE}",
         )
+    try:
+        after = svc.decode_search_cursor(cursor) if cursor else None
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
 
-    if not EMAIL_REGEX.match(email):
+    items, next_cursor = await svc.search_applications(get_pool(), q, limit, after)
+    return FastJSONResponse({"items": items, "next": next_cursor})
+
+
+@router.get("/export")
+async def export_applications(format: str = "ndjson"):
+    """Stream every application as NDJSON or flat CSV."""
+    if format not in ("ndjson", "csv"):
         raise HTTPException(
             status_code=400,
-            detail="Invalid email format",
+            detail="Invalid format. Must be one of: csv, ndjson",
         )
 
+    pool = get_pool()
+    filename = f"applications-{date.today():%Y%m%d}.{format}"
+    if format == "csv":
+        body, media_type = _export_csv(pool), "text/csv; charset=utf-8"
+    else:
+        body, media_type = _export_ndjson(pool), "application/x-ndjson"
+    return StreamingResponse(
+        body,
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+    )
+
+
+async def _export_ndjson(pool):
+    chunk = bytearray()
+    async for app in svc.iter_applications(pool):
+        chunk += json_codec.dumps(app)
+        chunk += b"\n"
+        if len(chunk) >= EXPORT_CHUNK_BYTES:
+            yield bytes(chunk)
+            chunk.clear()
+    if chunk:
+        yield bytes(chunk)
+
+
+async def _export_csv(pool):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(svc.CSV_HEADER)
+    async for app in svc.iter_applications(pool):
+        writer.writerow(svc.to_csv_row(app))
+        if buffer.tell() >= EXPORT_CHUNK_BYTES:
+            yield buffer.getvalue().encode()
+            buffer.seek(0)
+            buffer.truncate()
+    yield buffer.getvalue().encode()
+
+
+def _etag(version: int) -> str:
+    return f'"{version}"'
+
+
+def _parse_if_match(header: str | None) -> list[int] | None:
+    """Versions named by an If-Match header, or None when there is no precondition."""
+    if header is None or header.strip() == "*":
+        return None
+    versions = []
+    for tag in header.split(","):
+        tag = tag.strip()
+        if tag.startswith("W/"):
+            # If-Match uses strong comparison, so a weak tag never matches.
+            continue
+        try:
+            versions.append(int(tag.strip('"')))
+        except ValueError:
+            # Not one of ours, so it can never match.
+            continue
+    return versions
+
+
+def _precondition_failed(exc: svc.VersionConflict) -> HTTPException:
+    return HTTPException(
+        status_code=412,
+        detail="Application has been modified. Reload and try again",
+        headers={"ETag": _etag(exc.current_version)},
+    )
+
+
+@router.get("/{app_id}")
+async def get_application(app_id: str):
+    pool = get_pool()
+    app = await svc.get_application(pool, app_id)
+    if not app:
+        raise HTTPException(status_code=404, detail="Application not found")
+    return FastJSONResponse(app, headers={"ETag": _etag(app["version"])})
+
+
+def _text_field(personal: dict, key: str) -> str:
+    value = personal.get(key) or ""
+    if not isinstance(value, str):
+        raise ValueError(f"personal.{key} must be a string")
+    return value.strip()
+
+
+def validate_application(body) -> dict:
+    """Check and normalise a registration body in place.
+
+    Raises ValueError with a client-facing message when the body is invalid.
+    """
+    if not isinstance(body, dict):
+        raise ValueError("Application must be a JSON object")
+
+    personal = body.get("personal") or {}
+    if not isinstance(personal, dict):
+        raise ValueError("personal must be a JSON object")
+
+    first_name = _text_field(personal, "firstName")
+    last_name = _text_field(personal, "lastName")
+    email = _text_field(personal, "email")
+
+    if not first_name or not last_name or not email:
+        raise ValueError("First name, last name, and email are required")
+
+    if len(first_name) > MAX_FIRST_NAME:
+        raise ValueError(f"First name must not exceed {MAX_FIRST_NAME} characters")
+
+    if len(last_name) > MAX_LAST_NAME:
+        raise ValueError(f"Last name must not exceed {MAX_LAST_NAME} characters")
+
+    if len(email) > MAX_EMAIL:
+        raise ValueError(f"Email must not exceed {MAX_EMAIL} characters")
+
+    if not EMAIL_REGEX.match(email):
+        raise ValueError("Invalid email format")
+
+    dob = personal.get("dob")
+    if dob:
+        try:
+            date.fromisoformat(dob)
+        except (TypeError, ValueError):
+            raise ValueError("Invalid date of birth. Must be YYYY-MM-DD")
+
     personal["firstName"] = first_name
     personal["lastName"] = last_name
     personal["email"] = email
     body["personal"] = personal
+    return body
+
+
+@router.post("/", status_code=201)
+async def create_application(body: dict):
+    try:
+        validate_application(body)
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
 
     pool = get_pool()
-    app_id = await svc.create_application(pool, body)
+    try:
+        app_id = await svc.create_application(pool, body)
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
     return {"id": app_id, "message": "Application submitted successfully"}
 
 
+@router.post("/bulk")
+async def bulk_import_applications(request: Request):
+    """Import newline-delimited JSON registrations, one application per line.
+
+    Responds with NDJSON: a result per input line (``{"line", "id"}`` or
+    ``{"line", "error"}``), a ``progress`` line after every batch and a final
+    ``summary``. If a server error stops the import, an ``{"error"}`` line
+    precedes the summary.
+    """
+    too_large = HTTPException(
+        status_code=413, detail=f"Upload must not exceed {BULK_MAX_BYTES} bytes",
+    )
+    declared = request.headers.get("content-length", "")
+    if declared.isdigit() and int(declared) > BULK_MAX_BYTES:
+        raise too_large
+
+    # The upload is read in full before responding, so the response stream
+    # never competes with the request body for the connection. Writes can hit
+    # the disk once the upload is spooled, so they run off the event loop.
+    upload = tempfile.SpooledTemporaryFile(max_size=BULK_SPOOL_BYTES)
+    received = 0
+    try:
+        async for chunk in request.stream():
+            received += len(chunk)
+            if received > BULK_MAX_BYTES:
+                raise too_large
+            await run_in_threadpool(upload.write, chunk)
+    except BaseException:
+        upload.close()
+        raise
+    upload.seek(0)
+
+    return StreamingResponse(
+        _bulk_import(get_pool(), upload),
+        media_type="application/x-ndjson",
+    )
+
+
+async def _bulk_import(pool, upload):
+    counts = {"lines": 0, "created": 0, "failed": 0}
+    batch: list[tuple[int, tuple]] = []
+
+    def result(entry: dict) -> bytes:
+        return json_codec.dumps(entry) + b"\n"
+
+    async def insert(rows: list[tuple]) -> list:
+        """New ids for ``rows``, or the database error for each rejected row."""
+        try:
+            return await svc.bulk_create_applications(pool, rows)
+        except (asyncpg.PostgresError, asyncpg.InterfaceError) as exc:
+            if len(rows) == 1:
+                return [exc]
+        # One bad row rejects the whole COPY, so retry the batch row by row.
+        return [(await insert([row]))[0] for row in rows]
+
+    async def flush():
+        out = []
+        for (line, _), outcome in zip(batch, await insert([values for _, values in batch])):
+            if isinstance(outcome, Exception):
+                counts["failed"] += 1
+                out.append(result({"line": line, "error": f"Rejected by the database: {outcome}"}))
+            else:
+                counts["created"] += 1
+                out.append(result({"line": line, "id": outcome}))
+        batch.clear()
+        out.append(result({"progress": dict(counts)}))
+        return b"".join(out)
+
+    try:
+        try:
+            for line_no, raw in enumerate(upload, start=1):
+                if not raw.strip():
+                    continue
+                counts["lines"] += 1
+                try:
+                    body = validate_application(json_codec.loads(raw))
+                    batch.append((line_no, svc.application_values(body)))
+                except ValueError as exc:
+                    counts["failed"] += 1
+                    yield result({"line": line_no, "error": str(exc)})
+                    continue
+                if len(batch) >= BULK_IMPORT_BATCH_SIZE:
+                    yield await flush()
+            if batch:
+                yield await flush()
+        except Exception:
+            # Earlier batches are committed, so tell the client where the
+            # import stopped rather than cutting the stream off.
+            logger.exception("Bulk import stopped after %d lines", counts["lines"])
+            for line, _ in batch:
+                counts["failed"] += 1
+                yield result({"line": line, "error": "Import stopped before this line was confirmed"})
+            yield result({"error": "Import stopped by a server error; later lines were not read"})
+        yield result({"summary": counts})
+    finally:
+        upload.close()
+
+
 @router.patch("/{app_id}")
-async def update_application(app_id: str, body: dict):
+async def update_application(app_id: str, body: dict, if_match: str | None = Header(None)):
     stage = body.get("stage")
     if stage is not None and stage not in VALID_STAGES:
         raise HTTPException(
@@ -96,7 +448,10 @@ async def update_application(app_id: str, body: dict):
         )
 
     pool = get_pool()
-    updated = await svc.update_application(pool, app_id, body)
+    try:
+        updated = await svc.update_application(pool, app_id, body, _parse_if_match(if_match))
+    except svc.VersionConflict as exc:
+        raise _precondition_failed(exc)
     if not updated:
         raise HTTPException(
             status_code=404,
@@ -105,10 +460,65 @@ async def update_application(app_id: str, body: dict):
     return {"message": "Application updated"}
 
 
+def _validate_check_changes(body: dict):
+    if not body:
+        raise HTTPException(status_code=400, detail="No check fields to update")
+    status = body.get("status")
+    if status is not None and status not in VALID_CHECK_STATUSES:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Invalid status. Must be one of: {', '.join(sorted(VALID_CHECK_STATUSES))}",
+        )
+
+
+@router.patch("/{app_id}/checks/{check_key}")
+async def update_check(
+    app_id: str, check_key: str, body: dict, if_match: str | None = Header(None),
+):
+    """Merge the body into a single applicant check, e.g. ``{"status": "complete"}``."""
+    _validate_check_changes(body)
+
+    pool = get_pool()
+    try:
+        result = await svc.update_check(
+            pool, app_id, check_key, body, _parse_if_match(if_match),
+        )
+    except svc.VersionConflict as exc:
+        raise _precondition_failed(exc)
+    if result is None:
+        raise HTTPException(status_code=404, detail="Application or check not found")
+    return FastJSONResponse(result, headers={"ETag": _etag(result["version"])})
+
+
+@router.patch("/{app_id}/connected-persons/{person_id}/checks/{check_key}")
+async def update_connected_person_check(
+    app_id: str, person_id: str, check_key: str, body: dict,
+    if_match: str | None = Header(None),
+):
+    """Merge the body into a single check of one connected person."""
+    _validate_check_changes(body)
+
+    pool = get_pool()
+    try:
+        result = await svc.update_connected_person_check(
+            pool, app_id, person_id, check_key, body, _parse_if_match(if_match),
+        )
+    except svc.VersionConflict as exc:
+        raise _precondition_failed(exc)
+    if result is None:
+        raise HTTPException(
+            status_code=404, detail="Application, connected person or check not found",
+        )
+    return FastJSONResponse(result, headers={"ETag": _etag(result["version"])})
+
+
 @router.delete("/{app_id}")
-async def delete_application(app_id: str):
+async def delete_application(app_id: str, if_match: str | None = Header(None)):
     pool = get_pool()
-    deleted = await svc.delete_application(pool, app_id)
+    try:
+        deleted = await svc.delete_application(pool, app_id, _parse_if_match(if_match))
+    except svc.VersionConflict as exc:
+        raise _precondition_failed(exc)
     if not deleted:
         raise HTTPException(status_code=404, detail="Application not found")
     return {"message": "Application deleted"}
@@ -135,4 +545,6 @@ async def add_timeline_event(app_id: str, body: dict):
 
     pool = get_pool()
     entry = await svc.add_timeline_event(pool, app_id, event, event_type)
-    return entry
+    if entry is None:
+        raise HTTPException(status_code=404, detail="Application not found")
+    return FastJSONResponse(entry, status_code=201, headers={"ETag": _etag(entry["version"])})
@@ -0,0 +1,39 @@
+"""Compliance queries over individual checks."""
+
+from fastapi import APIRouter, HTTPException
+
+from app.database import get_pool
+from app.routes.applications import MAX_PAGE_SIZE, VALID_CHECK_STATUSES
+from app.services import application_service as svc
+
+router = APIRouter(prefix="/api/checks")
+
+MAX_EXPIRY_WINDOW_DAYS = 3650
+
+
+@router.get("/")
+async def list_checks(
+    key: str | None = None,
+    status: str | None = None,
+    expiring_within: int | None = None,
+    limit: int = MAX_PAGE_SIZE,
+):
+    """Checks across all applications and connected persons, e.g. ``?key=dbs&status=pending``."""
+    if status is not None and status not in VALID_CHECK_STATUSES:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Invalid status. Must be one of: {', '.join(sorted(VALID_CHECK_STATUSES))}",
+        )
+    if expiring_within is not None and not 0 <= expiring_within <= MAX_EXPIRY_WINDOW_DAYS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"expiring_within must be between 0 and {MAX_EXPIRY_WINDOW_DAYS} days",
+        )
+    if limit < 1 or limit > MAX_PAGE_SIZE:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Limit must be between 1 and {MAX_PAGE_SIZE}",
+        )
+
+    pool = get_pool()
+    return await svc.find_checks(pool, key, status, expiring_within, limit)
@@ -0,0 +1,41 @@
+"""Operational and pipeline statistics endpoints."""
+
+from fastapi import APIRouter
+
+from app import queries
+from app.database import get_pool
+from app.scheduler import scheduler
+from app.services import application_service as svc
+
+router = APIRouter(prefix="/api/stats")
+
+
+@router.get("/pipeline")
+async def pipeline_stats():
+    """Counts per stage x risk x local authority, with average progress and days in stage."""
+    return await svc.get_pipeline_stats(get_pool())
+
+
+@router.get("/funnel")
+async def funnel_stats():
+    """Applications reaching each stage, conversion, and median/p90 days per stage."""
+    return await svc.get_funnel_stats(get_pool())
+
+
+@router.get("/cache")
+async def cache_stats():
+    return {
+        "applicationDetail": svc.detail_cache.stats(),
+        "funnel": svc.funnel_cache.stats(),
+    }
+
+
+@router.get("/queries")
+async def query_stats():
+    """Executions, total and worst time per registered statement, busiest first."""
+    return queries.stats()
+
+
+@router.get("/jobs")
+async def job_stats():
+    return scheduler.status()
@@ -0,0 +1,100 @@
+"""Minimal in-process scheduler for periodic database jobs.
+
+Every uvicorn worker runs the same schedule. Jobs that must only run once
+across workers take a Postgres advisory lock themselves and report
+``{"skipped": True}`` when another worker holds it.
+"""
+
+import asyncio
+import logging
+import os
+import time
+from contextlib import suppress
+from datetime import datetime, timezone
+
+from app import database
+
+logger = logging.getLogger(__name__)
+
+SCHEDULER_ENABLED = os.getenv("SCHEDULER_ENABLED", "true").lower() in ("1", "true", "yes")
+
+# Delay before the first run, so startup is not slowed down by the jobs.
+INITIAL_DELAY_SECONDS = 5.0
+
+
+class Job:
+    def __init__(self, name: str, func, interval: float):
+        self.name = name
+        self.func = func
+        self.interval = interval
+        self.runs = 0
+        self.failures = 0
+        self.last_run: dict | None = None
+
+    def status(self) -> dict:
+        return {
+            "interval": self.interval,
+            "runs": self.runs,
+            "failures": self.failures,
+            "lastRun": self.last_run,
+        }
+
+
+class Scheduler:
+    def __init__(self):
+        self.jobs: dict[str, Job] = {}
+        self._tasks: list[asyncio.Task] = []
+
+    def add_job(self, name: str, func, interval: float):
+        """Run ``await func(pool) -> dict`` every ``interval`` seconds."""
+        self.jobs[name] = Job(name, func, interval)
+
+    async def run_job(self, job: Job) -> dict | None:
+        """Run a job once, logging and recording its runtime and counts."""
+        started = time.perf_counter()
+        try:
+            result = await job.func(database.get_pool())
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            job.failures += 1
+            logger.exception("Job %s failed", job.name)
+            return None
+        elapsed_ms = round((time.perf_counter() - started) * 1000, 1)
+        job.runs += 1
+        job.last_run = {
+            "finishedAt": datetime.now(timezone.utc).isoformat(),
+            "durationMs": elapsed_ms,
+            **result,
+        }
+        if result.get("skipped"):
+            logger.debug("Job %s skipped: lock held by another worker", job.name)
+        else:
+            logger.info("Job %s finished in %.1f ms: %s", job.name, elapsed_ms, result)
+        return result
+
+    async def _loop(self, job: Job):
+        await asyncio.sleep(min(INITIAL_DELAY_SECONDS, job.interval))
+        while True:
+            await self.run_job(job)
+            await asyncio.sleep(job.interval)
+
+    def start(self):
+        if not SCHEDULER_ENABLED or self._tasks:
+            return
+        loop = asyncio.get_running_loop()
+        self._tasks = [loop.create_task(self._loop(job)) for job in self.jobs.values()]
+
+    async def stop(self):
+        tasks, self._tasks = self._tasks, []
+        for task in tasks:
+            task.cancel()
+        for task in tasks:
+            with suppress(asyncio.CancelledError):
+                await task
+
+    def status(self) -> dict:
+        return {name: job.status() for name, job in self.jobs.items()}
+
+
+scheduler = Scheduler()
@@ -1,9 +1,39 @@
 """Business logic for application CRUD and data transforms."""
 
+import base64
 import html
 import json
+import os
+import re
 from datetime import datetime, date, timedelta, timezone
 
+from app import database, metrics, queries, request_context
+from app.queries import APPLICATION_COLUMNS, TIMELINE_COLUMNS
+from app.cache import TTLCache
+
+# Allowed values of applications.stage (see the CHECK constraint in schema.sql).
+VALID_STAGES = frozenset([
+    "new", "form-submitted", "checks", "review",
+    "approved", "blocked", "registered",
+])
+
+# Shaped get_application results. Entries are evicted by this worker's writes
+# and by change notifications from every other worker (see app.database).
+detail_cache = TTLCache(
+    max_size=int(os.getenv("DETAIL_CACHE_SIZE", "1000")),
+    ttl=float(os.getenv("DETAIL_CACHE_TTL", "60")),
+)
+
+
+def _evict_on_change(change: dict):
+    if change.get("op") == "RESET":
+        detail_cache.clear()
+    elif change.get("id"):
+        detail_cache.invalidate(change["id"])
+
+
+database.add_change_handler(_evict_on_change)
+
 
 def escape_html(value: str) -> str:
     """Neutralise characters that could be interpreted as HTML/script markup."""
@@ -129,12 +159,6 @@ def build_premises_address(body: dict) -> str | None:
     return ", ".join(p for p in parts if p) or None
 
 
-def _json_or_none(val) -> str | None:
-    if val is None:
-        return None
-    return json.dumps(val)
-
-
 def _format_date(dt) -> str | None:
     if dt is None:
         return None
@@ -153,30 +177,26 @@ def _format_datetime(dt) -> str | None:
     return str(dt)[:16]
 
 
-def _parse_jsonb(val):
-    if val is None:
-        return None
-    if isinstance(val, str):
-        return json.loads(val)
-    return val
-
-
-def to_dashboard_shape(row: dict, timeline: list[dict]) -> dict:
-    now = datetime.now(timezone.utc)
-    last_updated = row.get("last_updated") or now
+def _days_in_stage(last_updated, now: datetime | None = None) -> int:
+    now = now or datetime.now(timezone.utc)
+    last_updated = last_updated or now
     if isinstance(last_updated, date) and not isinstance(last_updated, datetime):
         last_updated = datetime.combine(last_updated, datetime.min.time(), tzinfo=timezone.utc)
     elif isinstance(last_updated, datetime) and last_updated.tzinfo is None:
         last_updated = last_updated.replace(tzinfo=timezone.utc)
-    days_in_stage = max(0, (now - last_updated).days)
+    return max(0, (now - last_updated).days)
 
-    checks = _parse_jsonb(row.get("checks")) or {}
-    connected = _parse_jsonb(row.get("connected_persons")) or []
-    registers = _parse_jsonb(row.get("registers")) or []
-    ofsted = _parse_jsonb(row.get("ofsted_check"))
-    household = _parse_jsonb(row.get("household"))
-    service = _parse_jsonb(row.get("service"))
-    premises_details = _parse_jsonb(row.get("premises_details"))
+
+def to_dashboard_shape(row: dict, timeline: list[dict]) -> dict:
+    days_in_stage = _days_in_stage(row.get("last_updated"))
+
+    checks = row.get("checks") or {}
+    connected = row.get("connected_persons") or []
+    registers = row.get("registers") or []
+    ofsted = row.get("ofsted_check")
+    household = row.get("household")
+    service = row.get("service")
+    premises_details = row.get("premises_details")
 
     result = {
         "id": row["id"],
@@ -191,6 +211,7 @@ def to_dashboard_shape(row: dict, timeline: list[dict]) -> dict:
         "daysInStage": days_in_stage,
         "risk": row.get("risk") or "low",
         "progress": row.get("progress") or 0,
+        "version": row.get("version") or 1,
         "premisesType": row.get("premises_type") or "",
         "premisesAddress": row.get("premises_address") or "",
         "localAuthority": row.get("local_authority") or "",
@@ -223,141 +244,545 @@ def to_dashboard_shape(row: dict, timeline: list[dict]) -> dict:
     return result
 
 
+SUMMARY_FIELDS = (
+    "id", "name", "stage", "risk", "progress", "daysInStage", "localAuthority",
+)
+
+# Dashboard keys that can be projected without decoding any JSONB column,
+# mapped to the column each one is derived from.
+FIELD_COLUMNS = {
+    "id": "id",
+    "name": "name",
+    "email": "email",
+    "phone": "phone",
+    "stage": "stage",
+    "risk": "risk",
+    "progress": "progress",
+    "daysInStage": "last_updated",
+    "lastUpdated": "last_updated",
+    "startDate": "start_date",
+    "registrationDate": "registration_date",
+    "premisesType": "premises_type",
+    "premisesAddress": "premises_address",
+    "localAuthority": "local_authority",
+    "version": "version",
+}
+
+_DATE_FIELDS = frozenset(["lastUpdated", "startDate", "registrationDate"])
+_FIELD_DEFAULTS = {"stage": "new", "risk": "low", "progress": 0, "version": 1}
+
+
+def to_summary_shape(row: dict, fields: tuple[str, ...]) -> dict:
+    """Slim counterpart of to_dashboard_shape for the FIELD_COLUMNS keys."""
+    result = {}
+    for field in fields:
+        val = row.get(FIELD_COLUMNS[field])
+        if field == "daysInStage":
+            result[field] = _days_in_stage(val)
+        elif field in _DATE_FIELDS:
+            result[field] = _format_date(val)
+        else:
+            result[field] = val or _FIELD_DEFAULTS.get(field, "")
+    return result
+
+
+def _summary_columns(fields: tuple[str, ...]) -> str:
+    cols = {"id": None, "created_at": None}
+    for field in fields:
+        cols[FIELD_COLUMNS[field]] = None
+    return ", ".join(cols)
+
+
+def _parse_date(value) -> date | None:
+    """Accept a date or an ISO ``YYYY-MM-DD`` string. Raises ValueError otherwise."""
+    if not value:
+        return None
+    if isinstance(value, date):
+        return value
+    return date.fromisoformat(value)
+
+
+def application_values(body: dict) -> tuple:
+    """Values for a new application row from ``title`` to ``declaration``.
+
+    These are the APPLICATION_COLUMNS between ``id`` and the timestamps; see
+    _application_record. Raises ValueError when part of the body has the wrong
+    type, e.g. a section that is not an object.
+    """
+    try:
+        return _application_values(body)
+    except (AttributeError, TypeError) as exc:
+        raise ValueError("Invalid application data") from exc
+
+
+def _application_values(body: dict) -> tuple:
+    checks = build_checks_from_form(body)
+    connected = build_connected_persons(body)
+    progress = calculate_progress(checks)
+    premises_addr = build_premises_address(body)
+
+    registers = (body.get("service") or {}).get("ageGroups") or []
+
+    premises = body.get("premises") or {}
+    premises_details = {
+        "sameAsHome": premises.get("sameAsHome"),
+        "outdoorSpace": premises.get("outdoorSpace") or None,
+        "pets": premises.get("pets") or None,
+        "petsDetails": premises.get("petsDetails") or None,
+    }
+
+    personal = body.get("personal") or {}
+
+    safe_first = escape_html(personal.get("firstName") or "")
+    safe_last = escape_html(personal.get("lastName") or "")
+    safe_email = escape_html(personal.get("email") or "")
+
+    return (
+        personal.get("title") or None,
+        safe_first,
+        personal.get("middleNames") or None,
+        safe_last,
+        safe_email,
+        personal.get("phone") or None,
+        _parse_date(personal.get("dob")),
+        personal.get("gender") or None,
+        personal.get("rightToWork") or None,
+        personal.get("niNumber") or None,
+        body.get("homeAddress") or {},
+        (premises.get("type") or "domestic").lower(),
+        premises_addr,
+        premises_details,
+        premises.get("localAuthority") or None,
+        registers,
+        body.get("service"),
+        progress,
+        checks,
+        connected,
+        body.get("previousNames"),
+        body.get("addressHistory"),
+        body.get("qualifications"),
+        body.get("employment"),
+        body.get("references"),
+        body.get("household"),
+        body.get("suitability"),
+        body.get("declaration"),
+    )
+
+
+def _application_record(app_id: str, values: tuple, now: datetime) -> tuple:
+    """A full row in APPLICATION_COLUMNS order from application_values()."""
+    return (app_id, *values, now, now, now)
+
+
+def _initial_timeline(app_id: str, now: datetime) -> list[tuple]:
+    """Timeline rows every new application starts with, in TIMELINE_COLUMNS order."""
+    return [
+        (app_id, "Application started", "action", now),
+        (app_id, "Application form submitted", "complete", now + timedelta(seconds=1)),
+    ]
+
+
+async def _sync_checks(conn, app_ids: list[str]):
+    """Rebuild the application_checks rows for ``app_ids`` from their JSONB documents.
+
+    Call inside the transaction that wrote checks or connected_persons.
+    """
+    await conn.execute(queries.SYNC_APPLICATION_CHECKS, app_ids)
+
+
+@metrics.instrumented
 async def create_application(pool, body: dict) -> str:
+    values = application_values(body)
     async with pool.acquire() as conn:
         async with conn.transaction():
-            row = await conn.fetchrow(
-                "SELECT nextval('application_id_seq') AS val"
-            )
+            row = await conn.fetchrow(queries.NEXT_APPLICATION_ID)
             app_id = generate_id(int(row["val"]))
             now = datetime.now()
 
-            checks = build_checks_from_form(body)
-            connected = build_connected_persons(body)
-            progress = calculate_progress(checks)
-            premises_addr = build_premises_address(body)
+            await conn.execute(
+                queries.INSERT_APPLICATION, *_application_record(app_id, values, now),
+            )
 
-            registers = (body.get("service") or {}).get("ageGroups") or []
+            for record in _initial_timeline(app_id, now):
+                await conn.execute(queries.INSERT_TIMELINE_EVENT, *record)
+            await _sync_checks(conn, [app_id])
 
-            premises = body.get("premises") or {}
-            premises_details = {
-                "sameAsHome": premises.get("sameAsHome"),
-                "outdoorSpace": premises.get("outdoorSpace") or None,
-                "pets": premises.get("pets") or None,
-                "petsDetails": premises.get("petsDetails") or None,
-            }
+            return app_id
 
-            personal = body.get("personal") or {}
 
-            safe_first = escape_html(personal.get("firstName") or "")
-            safe_last = escape_html(personal.get("lastName") or "")
-            safe_email = escape_html(personal.get("email") or "")
+@metrics.instrumented
+async def bulk_create_applications(pool, rows: list[tuple]) -> list[str]:
+    """Insert applications from application_values() in one transaction using COPY.
 
-            await conn.execute(
-                """INSERT INTO applications (
-                    id, title, first_name, middle_names, last_name,
-                    email, phone, dob, gender, right_to_work, ni_number,
-                    home_address, premises_type, premises_address,
-                    premises_details, local_authority,
-                    registers, service, stage, risk, progress,
-                    checks, connected_persons,
-                    previous_names, address_history, qualifications,
-                    employment_history, references_data,
-                    household, suitability, declaration,
-                    start_date, last_updated, created_at
-                ) VALUES (
-                    $1, $2, $3, $4, $5,
-                    $6, $7, $8, $9, $10, $11,
-                    $12, $13, $14,
-                    $15, $16,
-                    $17, $18, 'new', 'low', $19,
-                    $20, $21,
-                    $22, $23, $24,
-                    $25, $26,
-                    $27, $28, $29,
-                    $30, $31, $31
-                )""",
-                app_id,
-                personal.get("title") or None,
-                safe_first,
-                personal.get("middleNames") or None,
-                safe_last,
-                safe_email,
-                personal.get("phone") or None,
-                personal.get("dob") or None,
-                personal.get("gender") or None,
-                personal.get("rightToWork") or None,
-                personal.get("niNumber") or None,
-                json.dumps(body.get("homeAddress") or {}),
-                (premises.get("type") or "domestic").lower(),
-                premises_addr,
-                json.dumps(premises_details),
-                premises.get("localAuthority") or None,
-                json.dumps(registers),
-                _json_or_none(body.get("service")),
-                progress,
-                json.dumps(checks),
-                json.dumps(connected),
-                _json_or_none(body.get("previousNames")),
-                _json_or_none(body.get("addressHistory")),
-                _json_or_none(body.get("qualifications")),
-                _json_or_none(body.get("employment")),
-                _json_or_none(body.get("references")),
-                _json_or_none(body.get("household")),
-                _json_or_none(body.get("suitability")),
-                _json_or_none(body.get("declaration")),
-                now,
-                now,
-            )
+    Ids are reserved with a single sequence call. Returns the new ids in the
+    same order as ``rows``. Database errors propagate and nothing is written.
+    """
+    if not rows:
+        return []
+    async with pool.acquire() as conn:
+        async with conn.transaction():
+            id_rows = await conn.fetch(queries.RESERVE_APPLICATION_IDS, len(rows))
+            app_ids = [generate_id(int(row["val"])) for row in id_rows]
+            now = datetime.now()
 
-            await conn.execute(
-                """INSERT INTO timeline_events (application_id, event, type, created_at)
-                   VALUES ($1, 'Application started', 'action', $2)""",
-                app_id, now,
+            await conn.copy_records_to_table(
+                "applications",
+                records=[
+                    _application_record(app_id, values, now)
+                    for app_id, values in zip(app_ids, rows)
+                ],
+                columns=APPLICATION_COLUMNS,
             )
-            await conn.execute(
-                """INSERT INTO timeline_events (application_id, event, type, created_at)
-                   VALUES ($1, 'Application form submitted', 'complete', $2)""",
-                app_id, now + timedelta(seconds=1),
+            await conn.copy_records_to_table(
+                "timeline_events",
+                records=[
+                    record for app_id in app_ids for record in _initial_timeline(app_id, now)
+                ],
+                columns=TIMELINE_COLUMNS,
             )
+            await _sync_checks(conn, app_ids)
+    return app_ids
 
-            return app_id
 
+LIST_FILTERS = {
+    "stage": "stage",
+    "risk": "risk",
+    "local_authority": "local_authority",
+    "premises_type": "premises_type",
+}
 
-async def get_all_applications(pool) -> list[dict]:
-    async with pool.acquire() as conn:
-        rows = await conn.fetch(
-            "SELECT * FROM applications ORDER BY created_at DESC"
+
+def encode_cursor(created_at: datetime, app_id: str) -> str:
+    """Build an opaque keyset cursor pointing just after the given row."""
+    raw = json.dumps([created_at.isoformat(), app_id], separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> tuple[datetime, str]:
+    """Reverse encode_cursor. Raises ValueError for malformed cursors."""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        created_at, app_id = json.loads(base64.urlsafe_b64decode(padded))
+        return datetime.fromisoformat(created_at), str(app_id)
+    except Exception as exc:
+        raise ValueError("Invalid cursor") from exc
+
+
+def _list_query(filters: dict | None, after: tuple[datetime, str] | None = None,
+                limit: int | None = None,
+                fields: tuple[str, ...] | None = None,
+                since: datetime | None = None) -> tuple[str, list]:
+    clauses = []
+    vals = []
+    for key, val in (filters or {}).items():
+        col = LIST_FILTERS.get(key)
+        if not col or val is None:
+            continue
+        vals.append(val)
+        clauses.append(f"{col} = ${len(vals)}")
+
+    if after is not None:
+        vals.extend(after)
+        clauses.append(f"(created_at, id) < (${len(vals) - 1}, ${len(vals)})")
+
+    if since is not None:
+        # Timeline inserts do not touch last_updated, so look at both.
+        vals.append(since)
+        n = len(vals)
+        clauses.append(
+            f"(last_updated > ${n} OR id IN "
+            f"(SELECT application_id FROM timeline_events WHERE created_at > ${n}))"
         )
-        result = []
-        for row in rows:
-            tl = await conn.fetch(
-                """SELECT event, type, created_at FROM timeline_events
-                   WHERE application_id = $1 ORDER BY created_at ASC""",
-                row["id"],
-            )
-            result.append(
-                to_dashboard_shape(dict(row), [dict(t) for t in tl])
-            )
-        return result
 
+    columns = _summary_columns(fields) if fields else queries.APPLICATION_READ_COLUMNS
+    sql = f"SELECT {columns} FROM applications"
+    if clauses:
+        sql += " WHERE " + " AND ".join(clauses)
+    sql += " ORDER BY created_at DESC, id DESC"
+    if limit is not None:
+        vals.append(limit)
+        sql += f" LIMIT ${len(vals)}"
+    return sql, vals
+
+
+async def _shape_rows(conn, rows, fields: tuple[str, ...] | None = None) -> list[dict]:
+    if not rows:
+        return []
+    if fields:
+        with request_context.phase("transform"):
+            return [to_summary_shape(row, fields) for row in rows]
+    timelines = await _fetch_timelines(conn, [row["id"] for row in rows])
+    with request_context.phase("transform"):
+        return [
+            to_dashboard_shape(dict(row), timelines.get(row["id"], []))
+            for row in rows
+        ]
+
+
+@metrics.instrumented
+async def get_all_applications(
+    pool, filters: dict | None = None, fields: tuple[str, ...] | None = None,
+) -> list[dict]:
+    """List applications in full dashboard shape, or projected to ``fields``."""
+    sql, vals = _list_query(filters, fields=fields)
+    async with pool.acquire() as conn:
+        rows = await conn.fetch(sql, *vals)
+        return await _shape_rows(conn, rows, fields)
+
+
+@metrics.instrumented
+async def get_applications_page(
+    pool, limit: int, after: tuple[datetime, str] | None = None,
+    filters: dict | None = None, fields: tuple[str, ...] | None = None,
+) -> tuple[list[dict], str | None]:
+    """Return one keyset page ordered by (created_at, id) plus the next cursor."""
+    sql, vals = _list_query(filters, after, limit + 1, fields)
+    async with pool.acquire() as conn:
+        rows = await conn.fetch(sql, *vals)
+        has_more = len(rows) > limit
+        rows = rows[:limit]
+        items = await _shape_rows(conn, rows, fields)
+
+    next_cursor = None
+    if has_more:
+        last = rows[-1]
+        next_cursor = encode_cursor(last["created_at"], last["id"])
+    return items, next_cursor
+
+
+# How far before the client's watermark to look again. Rows written by a
+# transaction that started before the watermark but committed after it still
+# carry a timestamp below the watermark. Re-sending a few rows is harmless
+# because clients upsert by id.
+SYNC_OVERLAP = timedelta(seconds=5)
+
+
+def format_watermark(ts: datetime) -> str:
+    """UTC ISO 8601 with a Z suffix, so it can go in a query string unescaped."""
+    return ts.astimezone(timezone.utc).isoformat().replace("+00:00", "Z")
+
+
+@metrics.instrumented
+async def get_changes_since(
+    pool, since: datetime, fields: tuple[str, ...] | None = None,
+) -> dict:
+    """Applications changed after ``since``, tombstones for deleted ids and the next watermark."""
+    lower = since - SYNC_OVERLAP
+    sql, vals = _list_query(None, fields=fields, since=lower)
+    async with pool.acquire() as conn:
+        # Taken first, so anything committed while we read is picked up next time.
+        watermark = await conn.fetchval(queries.SYNC_WATERMARK)
+        rows = await conn.fetch(sql, *vals)
+        deleted = await conn.fetch(queries.DELETED_SINCE, lower)
+        items = await _shape_rows(conn, rows, fields)
+    return {
+        "items": items,
+        "deleted": [row["id"] for row in deleted],
+        "watermark": format_watermark(watermark),
+    }
+
+
+# Keys returned for each search hit.
+SEARCH_FIELDS = ("id", "name", "email", "stage", "risk", "localAuthority")
+
+_SEARCH_TOKEN = re.compile(r"\w+")
+
+
+def search_tsquery(q: str) -> str | None:
+    """Prefix-match every word of ``q``, e.g. "jan smi" -> "jan:* & smi:*".
+
+    Only word characters reach to_tsquery, so user input cannot inject
+    tsquery operators. Returns None when ``q`` has no words.
+    """
+    tokens = _SEARCH_TOKEN.findall(q.lower())
+    return " & ".join(f"{token}:*" for token in tokens) or None
+
+
+def encode_search_cursor(rank: float, app_id: str) -> str:
+    """Opaque keyset cursor pointing just after the given search hit."""
+    raw = json.dumps([rank, app_id], separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_search_cursor(cursor: str) -> tuple[float, str]:
+    """Reverse encode_search_cursor. Raises ValueError for malformed cursors."""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        rank, app_id = json.loads(base64.urlsafe_b64decode(padded))
+        return float(rank), str(app_id)
+    except Exception as exc:
+        raise ValueError("Invalid cursor") from exc
+
+
+def _search_query(q: str, after: tuple[float, str] | None = None,
+                  limit: int = 50) -> tuple[str, list]:
+    """Ranked search over search_vector plus trigram matching on name and email.
+
+    The three predicates are ORed so the planner can combine the GIN indexes
+    in one bitmap scan. Full-text hits rank by ts_rank; typos that only match
+    by trigram still rank by word similarity.
+    """
+    vals: list = [q, search_tsquery(q)]
+    sql = f"""SELECT {_summary_columns(SEARCH_FIELDS)}, rank
+              FROM (
+                  SELECT *,
+                         (COALESCE(ts_rank(search_vector, to_tsquery('simple', $2)), 0)
+                          + GREATEST(word_similarity($1, name),
+                                     word_similarity($1, email)))::float8 AS rank
+                  FROM applications
+                  WHERE search_vector @@ to_tsquery('simple', $2)
+                     OR $1 <% name
+                     OR $1 <% email
+              ) AS hits"""
+    if after is not None:
+        vals.extend(after)
+        sql += " WHERE (rank, id) < ($3, $4)"
+    vals.append(limit)
+    sql += f" ORDER BY rank DESC, id DESC LIMIT ${len(vals)}"
+    return sql, vals
+
+
+@metrics.instrumented
+async def search_applications(
+    pool, q: str, limit: int, after: tuple[float, str] | None = None,
+) -> tuple[list[dict], str | None]:
+    """One page of slim search hits, best match first, plus the next cursor."""
+    sql, vals = _search_query(q, after, limit + 1)
+    async with pool.acquire() as conn:
+        rows = await conn.fetch(sql, *vals)
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+
+    next_cursor = None
+    if has_more:
+        last = rows[-1]
+        next_cursor = encode_search_cursor(last["rank"], last["id"])
+    with request_context.phase("transform"):
+        items = [to_summary_shape(row, SEARCH_FIELDS) for row in rows]
+    return items, next_cursor
 
+
+# Rows fetched per round trip by the export cursor.
+EXPORT_PREFETCH = int(os.getenv("EXPORT_PREFETCH", "500"))
+
+# Check keys every application starts with; each gets a status and date column in CSV.
+EXPORT_CHECK_KEYS = tuple(build_checks_from_form({}))
+
+
+def to_export_shape(row: dict) -> dict:
+    """Dashboard shape without the timeline, as written to NDJSON exports."""
+    result = to_dashboard_shape(row, [])
+    del result["timeline"]
+    return result
+
+
+def _check_columns(checks: dict) -> list:
+    values = []
+    for key in EXPORT_CHECK_KEYS:
+        check = checks.get(key) or {}
+        values.append(check.get("status") or "")
+        values.append(check.get("date") or "")
+    return values
+
+
+CSV_HEADER = (
+    "id", "name", "email", "phone", "dob", "stage", "risk", "progress",
+    "localAuthority", "premisesType", "premisesAddress",
+    "startDate", "registrationDate", "registrationNumber", "lastUpdated",
+    *(f"{key}_{part}" for key in EXPORT_CHECK_KEYS for part in ("status", "date")),
+    "connectedPersonsCount", "connectedPersonsNames",
+)
+
+
+def to_csv_row(app: dict) -> list:
+    """Flatten an export-shaped application into CSV_HEADER order."""
+    connected = app.get("connectedPersons") or []
+    return [
+        app["id"], app["name"], app["email"], app["phone"], app["dob"] or "",
+        app["stage"], app["risk"], app["progress"],
+        app["localAuthority"], app["premisesType"], app["premisesAddress"],
+        app["startDate"] or "", app["registrationDate"] or "",
+        app.get("registrationNumber") or "", app["lastUpdated"] or "",
+        *_check_columns(app.get("checks") or {}),
+        len(connected),
+        "; ".join(p.get("name") or "" for p in connected),
+    ]
+
+
+async def iter_applications(pool):
+    """Yield every application in export shape, oldest first.
+
+    Rows come from a server-side cursor, so only EXPORT_PREFETCH of them are
+    held in memory at a time regardless of table size.
+    """
+    async with pool.acquire() as conn:
+        async with conn.transaction():
+            async for row in conn.cursor(
+                queries.EXPORT_APPLICATIONS, prefetch=EXPORT_PREFETCH,
+            ):
+                yield to_export_shape(dict(row))
+
+
+async def _fetch_timelines(conn, app_ids: list[str]) -> dict[str, list[dict]]:
+    """Fetch the timelines for many applications in one round trip."""
+    tl = await conn.fetch(queries.GET_TIMELINES, app_ids)
+    grouped: dict[str, list[dict]] = {}
+    for t in tl:
+        grouped.setdefault(t["application_id"], []).append(dict(t))
+    return grouped
+
+
+@metrics.instrumented
 async def get_application(pool, app_id: str) -> dict | None:
+    """Return the shaped application, served from detail_cache when possible.
+
+    The cached dict is shared between callers and must not be mutated.
+    """
+    cached = detail_cache.get(app_id)
+    if cached is not None:
+        return cached
+
+    token = detail_cache.token()
     async with pool.acquire() as conn:
-        row = await conn.fetchrow(
-            "SELECT * FROM applications WHERE id = $1", app_id
-        )
+        row = await conn.fetchrow(queries.GET_APPLICATION, app_id)
         if not row:
             return None
-        tl = await conn.fetch(
-            """SELECT event, type, created_at FROM timeline_events
-               WHERE application_id = $1 ORDER BY created_at ASC""",
-            app_id,
-        )
-        return to_dashboard_shape(dict(row), [dict(t) for t in tl])
+        tl = await conn.fetch(queries.GET_TIMELINE, app_id)
+    with request_context.phase("transform"):
+        shaped = to_dashboard_shape(dict(row), [dict(t) for t in tl])
+    detail_cache.set(app_id, shaped, token)
+    return shaped
+
+
+class VersionConflict(Exception):
+    """Raised when an If-Match precondition names a version that is no longer current."""
+
+    def __init__(self, current_version: int):
+        super().__init__(f"Application is at version {current_version}")
+        self.current_version = current_version
 
 
-async def update_application(pool, app_id: str, updates: dict) -> bool:
+async def _raise_if_conflict(conn, app_id: str, if_match: list[int] | None):
+    """After a write matched no row, tell a version mismatch apart from a missing row.
+
+    Only runs on the failure path, so successful writes stay one round trip.
+    """
+    if if_match is None:
+        return
+    current = await conn.fetchval(queries.GET_VERSION, app_id)
+    if current is not None:
+        raise VersionConflict(current)
+
+
+@metrics.instrumented
+async def update_application(
+    pool, app_id: str, updates: dict, if_match: list[int] | None = None,
+) -> bool:
+    """Apply ``updates`` and bump the version.
+
+    Raises VersionConflict if ``if_match`` is given and the current version is
+    not in it.
+    """
     allowed = {
         "stage": "stage",
         "risk": "risk",
@@ -373,7 +798,6 @@ async def update_application(pool, app_id: str, updates: dict) -> bool:
         "registrationNumber": "registration_number",
     }
 
-    json_cols = {"checks", "connected_persons", "ofsted_check"}
     sets = []
     vals = []
     idx = 1
@@ -383,37 +807,386 @@ async def update_application(pool, app_id: str, updates: dict) -> bool:
         if not col:
             continue
         sets.append(f"{col} = ${idx}")
-        vals.append(json.dumps(val) if col in json_cols else val)
+        vals.append(val)
         idx += 1
 
     if not sets:
         return False
 
     sets.append("last_updated = NOW()")
+    sets.append("version = version + 1")
     vals.append(app_id)
+    condition = ""
+    if if_match is not None:
+        vals.append(if_match)
+        condition = queries.version_condition(len(vals))
+
+    touches_checks = any(
+        allowed.get(key) in ("checks", "connected_persons") for key in updates
+    )
 
     async with pool.acquire() as conn:
-        result = await conn.execute(
-            f"UPDATE applications SET {', '.join(sets)} WHERE id = ${idx} RETURNING id",
-            *vals,
-        )
-        return result != "UPDATE 0"
+        async with conn.transaction():
+            result = await conn.execute(
+                f"UPDATE applications SET {', '.join(sets)} WHERE id = ${idx}{condition} RETURNING id",
+                *vals,
+            )
+            if result == "UPDATE 0":
+                await _raise_if_conflict(conn, app_id, if_match)
+            elif touches_checks:
+                await _sync_checks(conn, [app_id])
+    detail_cache.invalidate(app_id)
+    return result != "UPDATE 0"
 
 
-async def delete_application(pool, app_id: str) -> bool:
+@metrics.instrumented
+async def update_check(
+    pool, app_id: str, check_key: str, changes: dict, if_match: list[int] | None = None,
+) -> dict | None:
+    """Merge ``changes`` into one applicant check and recompute progress.
+
+    The check is patched in place with jsonb_set and progress is derived from
+    the patched document in the same UPDATE, so concurrent edits to other
+    checks are never lost. Returns ``{"check", "progress", "version"}``, or
+    None if the application or check does not exist.
+    """
+    if if_match is None:
+        sql, vals = queries.UPDATE_CHECK, [app_id, check_key, changes]
+    else:
+        sql, vals = queries.UPDATE_CHECK_IF_MATCH, [app_id, check_key, changes, if_match]
     async with pool.acquire() as conn:
-        result = await conn.execute(
-            "DELETE FROM applications WHERE id = $1", app_id
-        )
-        return "DELETE 1" in result
+        async with conn.transaction():
+            row = await conn.fetchrow(sql, *vals)
+            if row is None:
+                await _raise_if_conflict(conn, app_id, if_match)
+            else:
+                await _sync_checks(conn, [app_id])
+    detail_cache.invalidate(app_id)
+    if row is None:
+        return None
+    return {"check": row["check"], "progress": row["progress"], "version": row["version"]}
+
 
+@metrics.instrumented
+async def update_connected_person_check(
+    pool, app_id: str, person_id: str, check_key: str, changes: dict,
+    if_match: list[int] | None = None,
+) -> dict | None:
+    """Merge ``changes`` into one check of one connected person.
 
-async def add_timeline_event(pool, app_id: str, event: str, event_type: str = "action") -> dict:
+    Only that element of the connected_persons array is rewritten. Progress
+    counts the applicant's own checks only, so it is left untouched. Returns
+    ``{"check", "version"}``, or None if the application, person or check
+    does not exist.
+    """
+    vals = [app_id, person_id, check_key, changes]
+    if if_match is None:
+        sql = queries.UPDATE_PERSON_CHECK
+    else:
+        sql = queries.UPDATE_PERSON_CHECK_IF_MATCH
+        vals.append(if_match)
+    async with pool.acquire() as conn:
+        async with conn.transaction():
+            row = await conn.fetchrow(sql, *vals)
+            if row is None:
+                await _raise_if_conflict(conn, app_id, if_match)
+            else:
+                await _sync_checks(conn, [app_id])
+    detail_cache.invalidate(app_id)
+    if row is None:
+        return None
+    return {"check": row["check"], "version": row["version"]}
+
+
+@metrics.instrumented
+async def delete_application(pool, app_id: str, if_match: list[int] | None = None) -> bool:
+    async with pool.acquire() as conn:
+        if if_match is None:
+            result = await conn.execute(queries.DELETE_APPLICATION, app_id)
+        else:
+            result = await conn.execute(queries.DELETE_APPLICATION_IF_MATCH, app_id, if_match)
+        if "DELETE 1" not in result:
+            await _raise_if_conflict(conn, app_id, if_match)
+    detail_cache.invalidate(app_id)
+    return "DELETE 1" in result
+
+
+@metrics.instrumented
+async def add_timeline_event(
+    pool, app_id: str, event: str, event_type: str = "action",
+) -> dict | None:
+    """Append a timeline entry and bump the version.
+
+    Returns ``{"event", "type", "created_at", "version"}``, or None if the
+    application does not exist.
+    """
     safe_event = escape_html(event)
     async with pool.acquire() as conn:
-        row = await conn.fetchrow(
-            """INSERT INTO timeline_events (application_id, event, type)
-               VALUES ($1, $2, $3) RETURNING *""",
-            app_id, safe_event, event_type,
+        row = await conn.fetchrow(queries.ADD_TIMELINE_EVENT, app_id, safe_event, event_type)
+    detail_cache.invalidate(app_id)
+    return dict(row) if row else None
+
+
+@metrics.instrumented
+async def find_checks(
+    pool, key: str | None = None, status: str | None = None,
+    expiring_within: int | None = None, limit: int = 500,
+) -> list[dict]:
+    """Compliance lookup over application_checks, soonest expiry first.
+
+    ``expiring_within`` keeps checks whose expiry date falls between today and
+    that many days from now.
+    """
+    clauses = []
+    vals = []
+    if key is not None:
+        vals.append(key)
+        clauses.append(f"c.check_key = ${len(vals)}")
+    if status is not None:
+        vals.append(status)
+        clauses.append(f"c.status = ${len(vals)}")
+    if expiring_within is not None:
+        vals.append(expiring_within)
+        clauses.append(
+            f"c.expiry_date BETWEEN CURRENT_DATE AND CURRENT_DATE + ${len(vals)}::int"
         )
-        return dict(row)
+    where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+    vals.append(limit)
+
+    async with pool.acquire() as conn:
+        rows = await conn.fetch(
+            f"""SELECT c.application_id, a.name, a.stage, c.person_id, c.check_key,
+                       c.status, c.date, c.expiry_date
+                FROM application_checks c
+                JOIN applications a ON a.id = c.application_id
+                {where}
+                ORDER BY c.expiry_date NULLS LAST, c.application_id, c.check_key
+                LIMIT ${len(vals)}""",
+            *vals,
+        )
+    return [
+        {
+            "applicationId": row["application_id"],
+            "name": row["name"] or "",
+            "stage": row["stage"] or "new",
+            "personId": row["person_id"],
+            "key": row["check_key"],
+            "status": row["status"],
+            "date": _format_date(row["date"]),
+            "expiryDate": _format_date(row["expiry_date"]),
+        }
+        for row in rows
+    ]
+
+
+def _rollup(buckets: list[dict], key: str) -> dict:
+    totals: dict[str, int] = {}
+    for bucket in buckets:
+        totals[bucket[key]] = totals.get(bucket[key], 0) + bucket["count"]
+    return totals
+
+
+@metrics.instrumented
+async def get_pipeline_stats(pool) -> dict:
+    """Dashboard header figures from the trigger-maintained pipeline_stats table.
+
+    Cost depends on the number of stage x risk x local authority buckets,
+    not on the number of applications.
+    """
+    async with pool.acquire() as conn:
+        rows = await conn.fetch(queries.PIPELINE_STATS)
+
+    buckets = []
+    total = progress_sum = age_sum = 0
+    for row in rows:
+        count = row["applications"]
+        age = count * row["now_epoch"] - row["updated_epoch_sum"]
+        total += count
+        progress_sum += row["progress_sum"]
+        age_sum += age
+        buckets.append({
+            "stage": row["stage"],
+            "risk": row["risk"],
+            "localAuthority": row["local_authority"],
+            "count": count,
+            "averageProgress": round(row["progress_sum"] / count, 1),
+            "averageDaysInStage": round(max(0.0, age / count / 86400), 1),
+        })
+
+    return {
+        "total": total,
+        "byStage": _rollup(buckets, "stage"),
+        "byRisk": _rollup(buckets, "risk"),
+        "averageProgress": round(progress_sum / total, 1) if total else 0.0,
+        "averageDaysInStage": round(max(0.0, age_sum / total / 86400), 1) if total else 0.0,
+        "buckets": buckets,
+    }
+
+
+# Stage order of the registration funnel.
+FUNNEL_STAGES = ("new", "form-submitted", "checks", "review", "approved", "registered")
+
+# The funnel scans every stage transition, so one result is shared per worker
+# until a stage or registration date changes (see _evict_funnel).
+funnel_cache = TTLCache(max_size=1, ttl=float(os.getenv("FUNNEL_CACHE_TTL", "300")))
+
+_FUNNEL_COLUMNS = frozenset(["stage", "start_date", "registration_date"])
+
+
+def _evict_funnel(change: dict):
+    op = change.get("op")
+    if op == "RESET":
+        funnel_cache.clear()
+    elif change.get("table") == "applications" and (
+        op in ("INSERT", "DELETE") or _FUNNEL_COLUMNS.intersection(change.get("columns") or ())
+    ):
+        funnel_cache.clear()
+
+
+database.add_change_handler(_evict_funnel)
+
+
+def _round_days(value) -> float | None:
+    return round(value, 1) if value is not None else None
+
+
+@metrics.instrumented
+async def get_funnel_stats(pool) -> dict:
+    """Stage conversion and time-in-stage percentiles, computed in SQL.
+
+    Time in a stage runs from the transition into it (or the application's
+    creation) to the next 'stage' timeline event; LAG over the
+    (application_id, created_at) index pairs them up. An application has
+    reached every stage up to the furthest one it has been in, so rejected
+    or reopened applications still count towards earlier stages.
+    """
+    cached = funnel_cache.get("funnel")
+    if cached is not None:
+        return cached
+    token = funnel_cache.token()
+
+    async with pool.acquire() as conn:
+        durations = await conn.fetch(queries.FUNNEL_DURATIONS)
+        furthest = await conn.fetch(queries.FUNNEL_FURTHEST_STAGE, list(FUNNEL_STAGES))
+        registration = await conn.fetchrow(queries.FUNNEL_TIME_TO_REGISTRATION)
+
+    by_stage = {row["stage"]: row for row in durations}
+    at_position = {row["position"]: row["applications"] for row in furthest}
+    reached, total = [], 0
+    for position in range(len(FUNNEL_STAGES), 0, -1):
+        total += at_position.get(position, 0)
+        reached.append(total)
+    reached.reverse()
+
+    stages = []
+    for i, stage in enumerate(FUNNEL_STAGES):
+        row = by_stage.get(stage)
+        following = reached[i + 1] if i + 1 < len(reached) else None
+        stages.append({
+            "stage": stage,
+            "reached": reached[i],
+            "conversionToNext": (
+                round(following / reached[i], 3) if following is not None and reached[i] else None
+            ),
+            "transitions": row["transitions"] if row else 0,
+            "medianDays": _round_days(row["median_days"]) if row else None,
+            "p90Days": _round_days(row["p90_days"]) if row else None,
+        })
+
+    result = {
+        "stages": stages,
+        "timeToRegistration": {
+            "registered": registration["registered"],
+            "medianDays": _round_days(registration["median_days"]),
+            "p90Days": _round_days(registration["p90_days"]),
+        },
+        "generatedAt": datetime.now(timezone.utc).isoformat(),
+    }
+    funnel_cache.set("funnel", result, token)
+    return result
+
+
+# Dashboard keys derived from each applications column, used to turn a
+# change notification's column list into a compact set of changed fields.
+COLUMN_KEYS = {
+    "first_name": ("name",),
+    "last_name": ("name",),
+    "email": ("email",),
+    "phone": ("phone",),
+    "dob": ("dob",),
+    "ni_number": ("niNumber",),
+    "stage": ("stage",),
+    "risk": ("risk",),
+    "progress": ("progress",),
+    "start_date": ("startDate",),
+    "registration_date": ("registrationDate",),
+    "registration_number": ("registrationNumber",),
+    "last_updated": ("lastUpdated", "daysInStage"),
+    "premises_type": ("premisesType",),
+    "premises_address": ("premisesAddress",),
+    "premises_details": ("premisesDetails",),
+    "local_authority": ("localAuthority",),
+    "registers": ("registers",),
+    "checks": ("checks",),
+    "connected_persons": ("connectedPersons",),
+    "ofsted_check": ("ofstedCheck",),
+    "household": ("household",),
+    "service": ("service",),
+    "version": ("version",),
+}
+
+
+@metrics.instrumented
+async def build_change_event(pool, change: dict) -> dict | None:
+    """Turn a change notification into the event sent to dashboard streams.
+
+    Returns None when the change has nothing a dashboard displays.
+    """
+    op = change.get("op")
+    app_id = change.get("id")
+    if op == "RESET":
+        return {"op": "reset"}
+    if not app_id:
+        return None
+
+    if change.get("table") == "timeline_events":
+        if op != "INSERT" or not change.get("eventId"):
+            return None
+        if "event" in change:
+            row = {
+                "event": change["event"],
+                "type": change.get("type"),
+                "created_at": datetime.fromisoformat(change["createdAt"]).astimezone(timezone.utc),
+            }
+        else:
+            async with pool.acquire() as conn:
+                row = await conn.fetchrow(queries.GET_TIMELINE_EVENT, change["eventId"])
+            if not row:
+                return None
+        entry = to_dashboard_shape({"id": app_id}, [dict(row)])["timeline"]
+        return {"id": app_id, "op": "timeline", "timeline": entry}
+
+    if op == "DELETE":
+        return {"id": app_id, "op": "delete"}
+
+    keys = {}
+    if op == "UPDATE":
+        for col in change.get("columns") or []:
+            for key in COLUMN_KEYS.get(col, ()):
+                keys[key] = None
+        if not keys:
+            return None
+
+    async with pool.acquire() as conn:
+        row = await conn.fetchrow(queries.GET_APPLICATION, app_id)
+    if not row:
+        return None
+    shaped = to_dashboard_shape(dict(row), [])
+
+    if op == "INSERT":
+        return {"id": app_id, "op": "insert", "application": shaped}
+    return {
+        "id": app_id,
+        "op": "update",
+        "changes": {key: shaped.get(key) for key in keys},
+    }
@@ -0,0 +1,139 @@
+"""Portal HTML pages held in memory, pre-compressed and served with strong ETags."""
+
+import asyncio
+import gzip
+import hashlib
+import logging
+from pathlib import Path
+
+from fastapi import Request, Response
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+logger = logging.getLogger(__name__)
+
+PUBLIC_DIR = Path(__file__).resolve().parent.parent / "public"
+
+# Browsers must revalidate, which is a cheap 304 thanks to the ETag.
+CACHE_CONTROL = "no-cache"
+
+# Preferred order when the client accepts several encodings equally.
+ENCODING_PREFERENCE = ("br", "gzip", "identity")
+
+
+def _parse_accept_encoding(header: str) -> dict[str, float]:
+    accepted = {}
+    for part in header.split(","):
+        name, _, params = part.strip().partition(";")
+        name = name.strip().lower()
+        if not name:
+            continue
+        q = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        accepted[name] = q
+    return accepted
+
+
+def negotiate_encoding(header: str | None, available) -> str:
+    """Pick the best encoding in ``available`` for an Accept-Encoding header."""
+    if not header:
+        return "identity"
+    accepted = _parse_accept_encoding(header)
+    wildcard = accepted.get("*", 0.0)
+    best, best_q = "identity", 0.0
+    for encoding in ENCODING_PREFERENCE:
+        if encoding not in available:
+            continue
+        q = accepted.get(encoding, wildcard if encoding != "identity" else 1.0)
+        if q > best_q:
+            best, best_q = encoding, q
+    return best
+
+
+class StaticPage:
+    """One file from public/, with gzip and (if available) brotli variants."""
+
+    def __init__(self, path: Path, media_type: str = "text/html; charset=utf-8"):
+        self.path = path
+        self.media_type = media_type
+        self.variants: dict[str, bytes] = {}
+        self.digest = ""
+        self.mtime = 0.0
+
+    def load(self):
+        raw = self.path.read_bytes()
+        variants = {"identity": raw, "gzip": gzip.compress(raw, compresslevel=9, mtime=0)}
+        if brotli is not None:
+            variants["br"] = brotli.compress(raw, quality=11)
+        self.mtime = self.path.stat().st_mtime
+        self.digest = hashlib.sha256(raw).hexdigest()[:32]
+        self.variants = variants
+
+    def etag(self, encoding: str) -> str:
+        if encoding == "identity":
+            return f'"{self.digest}"'
+        return f'"{self.digest}-{encoding}"'
+
+    def matches(self, if_none_match: str | None) -> bool:
+        """True if any tag in If-None-Match names this content, in any encoding."""
+        if not if_none_match:
+            return False
+        for tag in if_none_match.split(","):
+            tag = tag.strip()
+            if tag == "*":
+                return True
+            if tag.startswith("W/"):
+                tag = tag[2:]
+            if tag.strip('"').split("-", 1)[0] == self.digest:
+                return True
+        return False
+
+    def response(self, request: Request) -> Response:
+        if not self.variants:
+            self.load()
+
+        encoding = negotiate_encoding(request.headers.get("accept-encoding"), self.variants)
+        headers = {
+            "ETag": self.etag(encoding),
+            "Cache-Control": CACHE_CONTROL,
+            "Vary": "Accept-Encoding",
+        }
+        if encoding != "identity":
+            headers["Content-Encoding"] = encoding
+
+        if self.matches(request.headers.get("if-none-match")):
+            return Response(status_code=304, headers=headers)
+        return Response(self.variants[encoding], media_type=self.media_type, headers=headers)
+
+
+PAGES = {
+    "register": StaticPage(PUBLIC_DIR / "childminder-registration-complete.html"),
+    "admin": StaticPage(PUBLIC_DIR / "cma-portal-v2.html"),
+}
+
+
+def load_pages():
+    for page in PAGES.values():
+        page.load()
+
+
+async def watch_pages(interval: float = 1.0):
+    """Reload pages whose file changed on disk. Only started in development."""
+    while True:
+        await asyncio.sleep(interval)
+        for page in PAGES.values():
+            try:
+                changed = page.path.stat().st_mtime != page.mtime
+            except FileNotFoundError:
+                continue
+            if changed:
+                page.load()
+                logger.info("Reloaded %s", page.path.name)
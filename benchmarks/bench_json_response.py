@@ -0,0 +1,54 @@
+"""Benchmark: rendering the full application list with each response path.
+
+Compares FastAPI's default path (``jsonable_encoder`` + Starlette's stdlib
+``JSONResponse``) with ``FastJSONResponse`` returned directly from the route,
+on a list built from the seeded applications via ``to_dashboard_shape``.
+
+    python benchmarks/bench_json_response.py [applications]
+"""
+
+import sys
+import timeit
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from fastapi.encoders import jsonable_encoder  # noqa: E402
+from fastapi.responses import JSONResponse  # noqa: E402
+
+from app import json_codec  # noqa: E402
+from app.responses import FastJSONResponse  # noqa: E402
+from app.services.application_service import to_dashboard_shape  # noqa: E402
+from benchmarks.seed_data import load_seed_rows, seed_timeline  # noqa: E402
+
+
+def build_payload(count: int) -> list[dict]:
+    rows = load_seed_rows()
+    timeline = seed_timeline()
+    return [to_dashboard_shape(rows[i % len(rows)], timeline) for i in range(count)]
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+    payload = build_payload(count)
+    size = len(FastJSONResponse(payload).body)
+
+    paths = {
+        "jsonable_encoder + JSONResponse": lambda: JSONResponse(jsonable_encoder(payload)),
+        f"FastJSONResponse ({json_codec.BACKEND})": lambda: FastJSONResponse(payload),
+    }
+
+    print(f"{count} applications, {size / 1024:.0f} KiB response body")
+    results = {}
+    for name, render in paths.items():
+        rounds = 20
+        best = min(timeit.repeat(render, number=rounds, repeat=5)) / rounds
+        results[name] = best
+        print(f"{name:40s} {best * 1e3:8.2f} ms/response {1 / best:8.1f} responses/s")
+
+    baseline, fast = results.values()
+    print(f"speed-up: {baseline / fast:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,56 @@
+"""Microbenchmark: JSONB encode/decode cost per seeded application row.
+
+Compares the old service-layer path (``json.dumps`` on write, text column
+decoded then ``json.loads`` on read) with the binary codecs installed on the
+pool by ``app.database._init_connection``. Uses the JSONB literals from
+``db/seed.sql`` so no database is needed.
+
+    python benchmarks/bench_jsonb_codecs.py
+"""
+
+import json
+import sys
+import timeit
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from app import json_codec  # noqa: E402
+from benchmarks.seed_data import JSONB_COLUMNS, load_seed_rows  # noqa: E402
+
+ROUNDS = 2000
+
+
+def legacy_round_trip(docs, wire):
+    for doc in docs:
+        json.dumps(doc).encode()
+    for raw in wire:
+        json.loads(raw.decode())
+
+
+def codec_round_trip(docs, wire):
+    for doc in docs:
+        json_codec.encode_jsonb(doc)
+    for raw in wire:
+        json_codec.decode_jsonb(raw)
+
+
+def main():
+    rows = load_seed_rows()
+    docs = [row[c] for row in rows for c in JSONB_COLUMNS if c in row]
+    text_wire = [json.dumps(d).encode() for d in docs]
+    binary_wire = [b"\x01" + raw for raw in text_wire]
+
+    legacy = timeit.timeit(lambda: legacy_round_trip(docs, text_wire), number=ROUNDS)
+    codec = timeit.timeit(lambda: codec_round_trip(docs, binary_wire), number=ROUNDS)
+
+    per_row = lambda total: total / ROUNDS / len(rows) * 1e6  # noqa: E731
+    print(f"seed rows: {len(rows)}, jsonb documents: {len(docs)}, backend: {json_codec.BACKEND}")
+    print(f"legacy json.dumps/json.loads : {per_row(legacy):8.2f} us/row")
+    print(f"pool jsonb codecs            : {per_row(codec):8.2f} us/row")
+    print(f"saving                       : {per_row(legacy - codec):8.2f} us/row "
+          f"({legacy / codec:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+"""Benchmark: per-request cost of MetricsMiddleware and of recording a sample.
+
+Times Histogram.observe and Counter.inc directly, then calls a minimal ASGI
+app with and without MetricsMiddleware in front of it. No HTTP client is
+involved, so the difference is the middleware's own cost.
+
+    python benchmarks/bench_metrics.py [requests]
+"""
+
+import asyncio
+import sys
+import time
+import timeit
+from pathlib import Path
+from types import SimpleNamespace
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from app import metrics  # noqa: E402
+
+ROUTE = SimpleNamespace(path="/api/applications/{app_id}")
+
+
+async def endpoint(scope, receive, send):
+    # Stands in for routing, which records the matched route in the scope.
+    scope["route"] = ROUTE
+    await send({"type": "http.response.start", "status": 200, "headers": []})
+    await send({"type": "http.response.body", "body": b"{}"})
+
+
+async def receive():
+    return {"type": "http.request", "body": b"", "more_body": False}
+
+
+async def send(message):
+    pass
+
+
+async def measure(app, requests: int) -> float:
+    started = time.perf_counter()
+    for _ in range(requests):
+        await app({"type": "http", "method": "GET", "path": "/api/applications/RK-1",
+                   "root_path": ""}, receive, send)
+    return (time.perf_counter() - started) / requests
+
+
+async def main():
+    requests = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+
+    rounds = 200_000
+    observe = min(timeit.repeat(
+        lambda: metrics.HTTP_DURATION.observe(0.003, "GET", "/bench"), number=rounds, repeat=5,
+    )) / rounds
+    inc = min(timeit.repeat(
+        lambda: metrics.HTTP_REQUESTS.inc("GET", "/bench", 200), number=rounds, repeat=5,
+    )) / rounds
+    print(f"Histogram.observe {observe * 1e9:6.0f} ns   Counter.inc {inc * 1e9:6.0f} ns")
+
+    instrumented = metrics.MetricsMiddleware(endpoint)
+    bare, measured = [], []
+    for _ in range(5):
+        bare.append(await measure(endpoint, requests))
+        measured.append(await measure(instrumented, requests))
+    print(f"without middleware {min(bare) * 1e6:6.2f} us/request")
+    print(f"with middleware    {min(measured) * 1e6:6.2f} us/request")
+    print(f"overhead           {(min(measured) - min(bare)) * 1e6:6.2f} us/request")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,111 @@
+"""Benchmark: GET /api/applications/search query latency at scale.
+
+Unlike the other benchmarks this one needs a database with db/schema.sql
+applied (``DATABASE_URL``). Synthetic applications are COPYed in inside a
+transaction that is rolled back at the end, so the database is left as it was.
+Prints p50/p95 per query shape and the plan of the first one.
+
+    python benchmarks/bench_search.py [applications] [repeats]
+"""
+
+import asyncio
+import os
+import random
+import statistics
+import sys
+import time
+from datetime import datetime
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import asyncpg  # noqa: E402
+
+from app import database  # noqa: E402
+from app.services.application_service import (  # noqa: E402
+    APPLICATION_COLUMNS,
+    _application_record,
+    _search_query,
+    application_values,
+)
+
+FIRST_NAMES = ("Jane", "Amira", "Oliver", "Priya", "Tom", "Chloe", "Kwame", "Sian", "Lukas", "Mei")
+LAST_NAMES = ("Smith", "Okafor", "Jones", "Patel", "Williams", "Nowak", "Brown", "Evans", "Khan", "Li")
+STREETS = ("High Street", "Station Road", "Church Lane", "Mill Road", "Park Avenue")
+TOWNS = ("Leeds", "Bristol", "Cardiff", "York", "Bath")
+
+# One query per matching path: full name, prefix, typo, email, connected person, address.
+QUERIES = ("Priya Patel", "oliv", "Wiliams", "kwame.nowak", "Chloe Evans", "Mill Road York")
+
+
+def synthetic_body(i: int, rng: random.Random) -> dict:
+    first, last = rng.choice(FIRST_NAMES), rng.choice(LAST_NAMES)
+    partner_first, partner_last = rng.choice(FIRST_NAMES), rng.choice(LAST_NAMES)
+    return {
+        "personal": {
+            "firstName": first,
+            "lastName": f"{last}{i}" if i % 10 == 0 else last,
+            "email": f"{first.lower()}.{last.lower()}{i}@example.com",
+            "phone": f"07700 {i % 1_000_000:06d}",
+        },
+        "premises": {
+            "sameAsHome": False,
+            "address": {
+                "line1": f"{rng.randint(1, 200)} {rng.choice(STREETS)}",
+                "town": rng.choice(TOWNS),
+                "postcode": "LS1 1AA",
+            },
+        },
+        "household": {"adults": [
+            {"firstName": partner_first, "lastName": partner_last, "relationship": "Partner"},
+        ]},
+    }
+
+
+async def load(conn, count: int):
+    rng = random.Random(42)
+    now = datetime.now()
+    records = [
+        _application_record(f"BENCH-{i:07d}", application_values(synthetic_body(i, rng)), now)
+        for i in range(count)
+    ]
+    await conn.copy_records_to_table("applications", records=records, columns=APPLICATION_COLUMNS)
+    await conn.execute("ANALYZE applications")
+
+
+async def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    repeats = int(sys.argv[2]) if len(sys.argv) > 2 else 50
+    url = os.getenv("DATABASE_URL", "postgres://localhost:5432/readykids")
+    conn = await asyncpg.connect(**database._parse_database_url(url))
+    await database._init_connection(conn)
+
+    tr = conn.transaction()
+    await tr.start()
+    try:
+        started = time.perf_counter()
+        await load(conn, count)
+        print(f"loaded {count} applications in {time.perf_counter() - started:.1f} s")
+
+        plan_sql, plan_vals = _search_query(QUERIES[0], limit=51)
+        plan = await conn.fetch(f"EXPLAIN (ANALYZE, BUFFERS) {plan_sql}", *plan_vals)
+        print("\n".join(row[0] for row in plan))
+        print()
+
+        for q in QUERIES:
+            sql, vals = _search_query(q, limit=51)
+            timings = []
+            for _ in range(repeats):
+                started = time.perf_counter()
+                rows = await conn.fetch(sql, *vals)
+                timings.append((time.perf_counter() - started) * 1000)
+            p95 = statistics.quantiles(timings, n=20)[-1]
+            print(f"{q!r:20s} {len(rows):3d} hits  p50 {statistics.median(timings):7.2f} ms"
+                  f"  p95 {p95:7.2f} ms")
+    finally:
+        await tr.rollback()
+        await conn.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,93 @@
+"""Benchmark: per-request latency of the security headers middleware.
+
+Builds two copies of the app's routes, one behind the previous
+BaseHTTPMiddleware implementation and one behind the pure ASGI
+SecurityHeadersMiddleware, and drives /health and /api/applications/{id}
+in-process through httpx. The service layer is stubbed with a seeded
+application so no database is needed.
+
+    python benchmarks/bench_security_headers.py [requests]
+"""
+
+import asyncio
+import statistics
+import sys
+import time
+from pathlib import Path
+from unittest.mock import MagicMock, patch
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import httpx  # noqa: E402
+from fastapi import FastAPI, Request  # noqa: E402
+from starlette.middleware.base import BaseHTTPMiddleware  # noqa: E402
+
+from app.main import SecurityHeadersMiddleware  # noqa: E402
+from app.responses import FastJSONResponse  # noqa: E402
+from app.routes.applications import router  # noqa: E402
+from app.services.application_service import to_dashboard_shape  # noqa: E402
+from benchmarks.seed_data import load_seed_rows, seed_timeline  # noqa: E402
+
+
+class LegacySecurityHeadersMiddleware(BaseHTTPMiddleware):
+    async def dispatch(self, request: Request, call_next):
+        response = await call_next(request)
+        response.headers["X-Content-Type-Options"] = "nosniff"
+        response.headers["X-Frame-Options"] = "DENY"
+        response.headers["X-XSS-Protection"] = "1; mode=block"
+        return response
+
+
+def build_app(middleware) -> FastAPI:
+    app = FastAPI(default_response_class=FastJSONResponse)
+    app.add_middleware(middleware)
+
+    @app.get("/health")
+    async def health_check():
+        return {"status": "ok"}
+
+    app.include_router(router)
+    return app
+
+
+async def measure(app: FastAPI, path: str, requests: int) -> list[float]:
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        for _ in range(50):
+            await client.get(path)
+        timings = []
+        for _ in range(requests):
+            start = time.perf_counter()
+            response = await client.get(path)
+            timings.append(time.perf_counter() - start)
+            assert response.headers["x-frame-options"] == "DENY"
+    return timings
+
+
+async def main():
+    requests = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    seeded = to_dashboard_shape(load_seed_rows()[0], seed_timeline())
+
+    async def get_application(pool, app_id):
+        return seeded
+
+    apps = {
+        "BaseHTTPMiddleware": build_app(LegacySecurityHeadersMiddleware),
+        "pure ASGI": build_app(SecurityHeadersMiddleware),
+    }
+    with patch("app.routes.applications.get_pool", MagicMock()), \
+            patch("app.services.application_service.get_application", get_application):
+        for path in ("/health", f"/api/applications/{seeded['id']}"):
+            print(path)
+            medians = {}
+            for name, app in apps.items():
+                timings = await measure(app, path, requests)
+                medians[name] = statistics.median(timings)
+                p95 = statistics.quantiles(timings, n=20)[-1]
+                print(f"  {name:20s} median {medians[name] * 1e6:8.1f} us  p95 {p95 * 1e6:8.1f} us")
+            legacy, asgi = medians.values()
+            print(f"  saved {(legacy - asgi) * 1e6:.1f} us/request ({(1 - asgi / legacy) * 100:.0f}%)")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,53 @@
+"""Load the applications in db/seed.sql as Python rows for offline benchmarks."""
+
+import json
+import re
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+
+# JSONB literals appear in this column order in each seeded application.
+JSONB_COLUMNS = ("registers", "checks", "connected_persons", "ofsted_check")
+
+_ROW_START = re.compile(r"^\('(RK-[\d-]+)', '([^']*)', '([^']*)', '([^']*)'")
+
+
+def load_seed_rows() -> list[dict]:
+    """Return one dict per seeded application with its JSONB columns decoded."""
+    rows = []
+    in_applications = False
+    for line in (ROOT / "db" / "seed.sql").read_text().splitlines():
+        line = line.strip()
+        if line.startswith("INSERT INTO"):
+            in_applications = line.startswith("INSERT INTO applications")
+        if not in_applications:
+            continue
+        match = _ROW_START.match(line)
+        if match:
+            app_id, first, last, email = match.groups()
+            rows.append({
+                "id": app_id,
+                "name": f"{first} {last}",
+                "email": email,
+                "stage": "checks",
+                "risk": "low",
+                "progress": 50,
+                "local_authority": "Bristol",
+                "last_updated": datetime.now(timezone.utc),
+            })
+            continue
+        literal = line.rstrip(",")
+        if rows and literal[:2] in ("'{", "'[") and literal.endswith("'"):
+            row = rows[-1]
+            column = next(c for c in JSONB_COLUMNS if c not in row)
+            row[column] = json.loads(literal[1:-1].replace("''", "'"))
+    return rows
+
+
+def seed_timeline(count: int = 6) -> list[dict]:
+    start = datetime(2024, 9, 1, 9, 0, tzinfo=timezone.utc)
+    return [
+        {"event": f"Timeline entry {i}", "type": "action", "created_at": start + timedelta(days=i)}
+        for i in range(count)
+    ]
@@ -50,14 +50,360 @@ CREATE TABLE IF NOT EXISTS applications (
     created_at          TIMESTAMPTZ DEFAULT NOW()
 );
 
+-- Optimistic concurrency: bumped by every write, exposed as the ETag.
+ALTER TABLE applications ADD COLUMN IF NOT EXISTS version INT NOT NULL DEFAULT 1;
+
 CREATE TABLE IF NOT EXISTS timeline_events (
     id              SERIAL PRIMARY KEY,
     application_id  TEXT NOT NULL REFERENCES applications(id) ON DELETE CASCADE,
     event           TEXT NOT NULL,
     type            TEXT DEFAULT 'action'
-                    CHECK (type IN ('action','complete','alert','note')),
+                    CHECK (type IN ('action','complete','alert','note','stage')),
     created_at      TIMESTAMPTZ DEFAULT NOW()
 );
 
-CREATE INDEX IF NOT EXISTS idx_timeline_app_id ON timeline_events(application_id);
-CREATE INDEX IF NOT EXISTS idx_applications_stage ON applications(stage);
+-- Structured stage transitions (type 'stage'), written by the
+-- applications_log_stage_change trigger below.
+ALTER TABLE timeline_events ADD COLUMN IF NOT EXISTS from_stage TEXT;
+ALTER TABLE timeline_events ADD COLUMN IF NOT EXISTS to_stage TEXT;
+
+-- Databases created before the 'stage' type existed need the check widened.
+DO $$
+BEGIN
+    IF NOT EXISTS (
+        SELECT 1 FROM pg_constraint
+        WHERE conname = 'timeline_events_type_check'
+          AND pg_get_constraintdef(oid) LIKE '%stage%'
+    ) THEN
+        ALTER TABLE timeline_events DROP CONSTRAINT IF EXISTS timeline_events_type_check;
+        ALTER TABLE timeline_events ADD CONSTRAINT timeline_events_type_check
+            CHECK (type IN ('action','complete','alert','note','stage'));
+    END IF;
+END;
+$$;
+
+-- Per-application timeline reads and the funnel's window functions. Supersedes
+-- the old single-column application_id index.
+DROP INDEX IF EXISTS idx_timeline_app_id;
+CREATE INDEX IF NOT EXISTS idx_timeline_app_created ON timeline_events(application_id, created_at);
+
+-- Keyset pagination on (created_at, id), one composite index per list filter.
+-- The stage composite supersedes the old single-column stage index.
+DROP INDEX IF EXISTS idx_applications_stage;
+CREATE INDEX IF NOT EXISTS idx_applications_created ON applications(created_at DESC, id DESC);
+CREATE INDEX IF NOT EXISTS idx_applications_stage_created ON applications(stage, created_at DESC, id DESC);
+CREATE INDEX IF NOT EXISTS idx_applications_risk_created ON applications(risk, created_at DESC, id DESC);
+CREATE INDEX IF NOT EXISTS idx_applications_la_created ON applications(local_authority, created_at DESC, id DESC);
+CREATE INDEX IF NOT EXISTS idx_applications_premises_created ON applications(premises_type, created_at DESC, id DESC);
+
+-- Search (GET /api/applications/search): a weighted tsvector over the applicant's
+-- name, email, phone, premises address and connected person names, plus trigram
+-- indexes on name and email for typo-tolerant matches. The 'simple' config is
+-- used because names and addresses should not be stemmed.
+CREATE EXTENSION IF NOT EXISTS pg_trgm;
+
+ALTER TABLE applications ADD COLUMN IF NOT EXISTS search_vector TSVECTOR GENERATED ALWAYS AS (
+    setweight(to_tsvector('simple', first_name || ' ' || last_name), 'A') ||
+    setweight(to_tsvector('simple', COALESCE(email, '')), 'A') ||
+    setweight(to_tsvector('simple', COALESCE(phone, '')), 'B') ||
+    setweight(jsonb_to_tsvector('simple',
+        jsonb_path_query_array(COALESCE(connected_persons, '[]'), '$[*].name'), '["string"]'), 'B') ||
+    setweight(to_tsvector('simple', COALESCE(premises_address, '')), 'C')
+) STORED;
+
+CREATE INDEX IF NOT EXISTS idx_applications_search ON applications USING GIN (search_vector);
+CREATE INDEX IF NOT EXISTS idx_applications_name_trgm ON applications USING GIN (name gin_trgm_ops);
+CREATE INDEX IF NOT EXISTS idx_applications_email_trgm ON applications USING GIN (email gin_trgm_ops);
+
+-- Change notifications: every write to an application or its timeline NOTIFYs
+-- application_changes with the affected application id, so each worker's
+-- listener can evict exactly that entry from its read cache. Updates also list
+-- the changed columns and timeline rows carry their event id, which the SSE
+-- stream uses to build compact change events.
+CREATE OR REPLACE FUNCTION notify_application_change() RETURNS trigger AS $$
+DECLARE
+    row_data RECORD;
+    payload  JSONB;
+    changed  JSONB;
+BEGIN
+    IF TG_OP = 'DELETE' THEN
+        row_data := OLD;
+    ELSE
+        row_data := NEW;
+    END IF;
+
+    IF TG_TABLE_NAME = 'timeline_events' THEN
+        payload := jsonb_build_object(
+            'table', TG_TABLE_NAME, 'op', TG_OP,
+            'id', row_data.application_id, 'eventId', row_data.id
+        );
+        -- New entries travel with the notification so listeners need no
+        -- lookup. Long ones are left out to stay under pg_notify's 8000 bytes.
+        IF TG_OP = 'INSERT' AND octet_length(row_data.event) <= 4000 THEN
+            payload := payload || jsonb_build_object(
+                'event', row_data.event, 'type', row_data.type,
+                'createdAt', row_data.created_at
+            );
+        END IF;
+    ELSE
+        payload := jsonb_build_object('table', TG_TABLE_NAME, 'op', TG_OP, 'id', row_data.id);
+        IF TG_OP = 'UPDATE' THEN
+            SELECT jsonb_agg(n.key) INTO changed
+            FROM jsonb_each(to_jsonb(NEW)) AS n
+            WHERE n.value IS DISTINCT FROM to_jsonb(OLD) -> n.key;
+            payload := payload || jsonb_build_object('columns', COALESCE(changed, '[]'::jsonb));
+        END IF;
+    END IF;
+
+    PERFORM pg_notify('application_changes', payload::text);
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE TRIGGER applications_notify_change
+    AFTER INSERT OR UPDATE OR DELETE ON applications
+    FOR EACH ROW EXECUTE FUNCTION notify_application_change();
+
+CREATE OR REPLACE TRIGGER timeline_events_notify_change
+    AFTER INSERT OR UPDATE OR DELETE ON timeline_events
+    FOR EACH ROW EXECUTE FUNCTION notify_application_change();
+
+-- Delta sync (GET /api/applications?since=...): tombstones for deleted
+-- applications, kept for 30 days. A client older than that should reload.
+CREATE TABLE IF NOT EXISTS deleted_applications (
+    id          TEXT PRIMARY KEY,
+    deleted_at  TIMESTAMPTZ NOT NULL DEFAULT NOW()
+);
+
+CREATE INDEX IF NOT EXISTS idx_deleted_applications_at ON deleted_applications(deleted_at);
+CREATE INDEX IF NOT EXISTS idx_applications_last_updated ON applications(last_updated);
+CREATE INDEX IF NOT EXISTS idx_timeline_created ON timeline_events(created_at);
+
+CREATE OR REPLACE FUNCTION log_application_delete() RETURNS trigger AS $$
+BEGIN
+    INSERT INTO deleted_applications (id, deleted_at) VALUES (OLD.id, NOW())
+    ON CONFLICT (id) DO UPDATE SET deleted_at = EXCLUDED.deleted_at;
+    DELETE FROM deleted_applications WHERE deleted_at < NOW() - INTERVAL '30 days';
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE TRIGGER applications_log_delete
+    AFTER DELETE ON applications
+    FOR EACH ROW EXECUTE FUNCTION log_application_delete();
+
+-- Mirror of calculate_progress() in application_service: percentage of checks
+-- whose status is complete. float8 round() rounds half to even like Python's
+-- round(), and the division happens before the multiplication in both.
+CREATE OR REPLACE FUNCTION checks_progress(checks JSONB) RETURNS INT AS $$
+    SELECT COALESCE(
+        round((count(*) FILTER (WHERE value ->> 'status' = 'complete'))::float8
+              / NULLIF(count(*), 0) * 100)::int,
+        0)
+    FROM jsonb_each(COALESCE(checks, '{}'::jsonb));
+$$ LANGUAGE sql IMMUTABLE;
+
+-- Checks normalised out of applications.checks and connected_persons[].checks
+-- so compliance queries ("pending DBS", "first aid expiring within 60 days")
+-- can use indexes. The JSONB documents stay the source of truth; the service
+-- calls sync_application_checks() in the same transaction as every write that
+-- touches them. person_id is NULL for the applicant's own checks.
+CREATE TABLE IF NOT EXISTS application_checks (
+    application_id  TEXT NOT NULL REFERENCES applications(id) ON DELETE CASCADE,
+    person_id       TEXT,
+    check_key       TEXT NOT NULL,
+    status          TEXT,
+    date            DATE,
+    expiry_date     DATE,
+    details         JSONB
+);
+
+CREATE UNIQUE INDEX IF NOT EXISTS idx_application_checks_key
+    ON application_checks(application_id, COALESCE(person_id, ''), check_key);
+CREATE INDEX IF NOT EXISTS idx_application_checks_status ON application_checks(check_key, status);
+CREATE INDEX IF NOT EXISTS idx_application_checks_expiry ON application_checks(expiry_date);
+
+-- Dates in the JSONB documents are free text; anything unparseable is NULL.
+CREATE OR REPLACE FUNCTION try_date(value TEXT) RETURNS DATE AS $$
+BEGIN
+    IF value IS NULL OR value !~ '^\d{4}-\d{2}-\d{2}' THEN
+        RETURN NULL;
+    END IF;
+    RETURN left(value, 10)::date;
+EXCEPTION WHEN others THEN
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql IMMUTABLE;
+
+CREATE OR REPLACE FUNCTION sync_application_checks(ids TEXT[]) RETURNS void AS $$
+BEGIN
+    DELETE FROM application_checks WHERE application_id = ANY(ids);
+
+    INSERT INTO application_checks
+        (application_id, person_id, check_key, status, date, expiry_date, details)
+    SELECT a.id, NULL, c.key, c.value ->> 'status',
+           try_date(c.value ->> 'date'), try_date(c.value ->> 'expiryDate'),
+           c.value - 'status' - 'date' - 'expiryDate'
+    FROM applications a
+    CROSS JOIN LATERAL jsonb_each(
+        CASE WHEN jsonb_typeof(a.checks) = 'object' THEN a.checks ELSE '{}' END
+    ) AS c
+    WHERE a.id = ANY(ids) AND jsonb_typeof(c.value) = 'object'
+    UNION ALL
+    SELECT a.id, p ->> 'id', c.key, c.value ->> 'status',
+           try_date(c.value ->> 'date'), try_date(c.value ->> 'expiryDate'),
+           c.value - 'status' - 'date' - 'expiryDate'
+    FROM applications a
+    CROSS JOIN LATERAL jsonb_array_elements(
+        CASE WHEN jsonb_typeof(a.connected_persons) = 'array' THEN a.connected_persons ELSE '[]' END
+    ) AS p
+    CROSS JOIN LATERAL jsonb_each(
+        CASE WHEN jsonb_typeof(p -> 'checks') = 'object' THEN p -> 'checks' ELSE '{}' END
+    ) AS c
+    WHERE a.id = ANY(ids) AND p ->> 'id' IS NOT NULL AND jsonb_typeof(c.value) = 'object'
+    ON CONFLICT DO NOTHING;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Backfill applications written before application_checks existed.
+SELECT sync_application_checks(ARRAY(
+    SELECT a.id FROM applications a
+    WHERE NOT EXISTS (SELECT 1 FROM application_checks c WHERE c.application_id = a.id)
+));
+
+-- Expiry alerts already raised by the scheduled expiry scan (app/jobs.py): one
+-- per check, expiry date and alert window. person_key is '' for the applicant.
+CREATE TABLE IF NOT EXISTS check_expiry_alerts (
+    application_id  TEXT NOT NULL REFERENCES applications(id) ON DELETE CASCADE,
+    person_key      TEXT NOT NULL DEFAULT '',
+    check_key       TEXT NOT NULL,
+    expiry_date     DATE NOT NULL,
+    window_days     INT NOT NULL,
+    created_at      TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+    PRIMARY KEY (application_id, person_key, check_key, expiry_date, window_days)
+);
+
+-- SLA escalation job (app/jobs.py): finds applications past their stage SLA
+-- by (stage, last_updated) and marks when each was last escalated.
+ALTER TABLE applications ADD COLUMN IF NOT EXISTS sla_escalated_at TIMESTAMPTZ;
+CREATE INDEX IF NOT EXISTS idx_applications_stage_updated ON applications(stage, last_updated);
+
+-- Pipeline summary for GET /api/stats/pipeline: one row per stage x risk x
+-- local authority, kept current by statement-level triggers on applications.
+-- Average days in stage is derived from the sum of last_updated epochs.
+CREATE TABLE IF NOT EXISTS pipeline_stats (
+    stage               TEXT NOT NULL,
+    risk                TEXT NOT NULL,
+    local_authority     TEXT NOT NULL,
+    applications        BIGINT NOT NULL DEFAULT 0,
+    progress_sum        BIGINT NOT NULL DEFAULT 0,
+    updated_epoch_sum   DOUBLE PRECISION NOT NULL DEFAULT 0,
+    PRIMARY KEY (stage, risk, local_authority)
+);
+
+-- Buckets are upserted in key order in a single statement, so concurrent
+-- writers moving applications between the same buckets cannot deadlock.
+CREATE OR REPLACE FUNCTION pipeline_stats_apply() RETURNS trigger AS $$
+BEGIN
+    IF TG_OP = 'INSERT' THEN
+        INSERT INTO pipeline_stats AS s
+            (stage, risk, local_authority, applications, progress_sum, updated_epoch_sum)
+        SELECT COALESCE(stage, 'new'), COALESCE(risk, 'low'), COALESCE(local_authority, ''),
+               count(*), sum(COALESCE(progress, 0)),
+               sum(extract(epoch FROM COALESCE(last_updated, NOW())))
+        FROM new_rows GROUP BY 1, 2, 3 ORDER BY 1, 2, 3
+        ON CONFLICT (stage, risk, local_authority) DO UPDATE SET
+            applications = s.applications + EXCLUDED.applications,
+            progress_sum = s.progress_sum + EXCLUDED.progress_sum,
+            updated_epoch_sum = s.updated_epoch_sum + EXCLUDED.updated_epoch_sum;
+    ELSIF TG_OP = 'DELETE' THEN
+        INSERT INTO pipeline_stats AS s
+            (stage, risk, local_authority, applications, progress_sum, updated_epoch_sum)
+        SELECT COALESCE(stage, 'new'), COALESCE(risk, 'low'), COALESCE(local_authority, ''),
+               -count(*), -sum(COALESCE(progress, 0)),
+               -sum(extract(epoch FROM COALESCE(last_updated, NOW())))
+        FROM old_rows GROUP BY 1, 2, 3 ORDER BY 1, 2, 3
+        ON CONFLICT (stage, risk, local_authority) DO UPDATE SET
+            applications = s.applications + EXCLUDED.applications,
+            progress_sum = s.progress_sum + EXCLUDED.progress_sum,
+            updated_epoch_sum = s.updated_epoch_sum + EXCLUDED.updated_epoch_sum;
+    ELSE
+        INSERT INTO pipeline_stats AS s
+            (stage, risk, local_authority, applications, progress_sum, updated_epoch_sum)
+        SELECT stage, risk, la, sum(n), sum(p), sum(e)
+        FROM (
+            SELECT COALESCE(stage, 'new') AS stage, COALESCE(risk, 'low') AS risk,
+                   COALESCE(local_authority, '') AS la, 1 AS n, COALESCE(progress, 0) AS p,
+                   extract(epoch FROM COALESCE(last_updated, NOW()))::float8 AS e
+            FROM new_rows
+            UNION ALL
+            SELECT COALESCE(stage, 'new'), COALESCE(risk, 'low'),
+                   COALESCE(local_authority, ''), -1, -COALESCE(progress, 0),
+                   -extract(epoch FROM COALESCE(last_updated, NOW()))::float8
+            FROM old_rows
+        ) AS delta
+        GROUP BY 1, 2, 3
+        -- Writes that leave every bucket unchanged (e.g. version bumps) lock nothing.
+        HAVING sum(n) <> 0 OR sum(p) <> 0 OR sum(e) <> 0
+        ORDER BY 1, 2, 3
+        ON CONFLICT (stage, risk, local_authority) DO UPDATE SET
+            applications = s.applications + EXCLUDED.applications,
+            progress_sum = s.progress_sum + EXCLUDED.progress_sum,
+            updated_epoch_sum = s.updated_epoch_sum + EXCLUDED.updated_epoch_sum;
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION rebuild_pipeline_stats() RETURNS void AS $$
+BEGIN
+    DELETE FROM pipeline_stats;
+    INSERT INTO pipeline_stats
+        (stage, risk, local_authority, applications, progress_sum, updated_epoch_sum)
+    SELECT COALESCE(stage, 'new'), COALESCE(risk, 'low'), COALESCE(local_authority, ''),
+           count(*), sum(COALESCE(progress, 0)),
+           sum(extract(epoch FROM COALESCE(last_updated, NOW())))
+    FROM applications GROUP BY 1, 2, 3;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Transition tables need one trigger per event.
+CREATE OR REPLACE TRIGGER applications_pipeline_stats_insert
+    AFTER INSERT ON applications REFERENCING NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION pipeline_stats_apply();
+CREATE OR REPLACE TRIGGER applications_pipeline_stats_update
+    AFTER UPDATE ON applications REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION pipeline_stats_apply();
+CREATE OR REPLACE TRIGGER applications_pipeline_stats_delete
+    AFTER DELETE ON applications REFERENCING OLD TABLE AS old_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION pipeline_stats_apply();
+
+-- First deploy: summarise the applications that already exist.
+SELECT rebuild_pipeline_stats() WHERE NOT EXISTS (SELECT 1 FROM pipeline_stats);
+
+-- Every stage change is recorded as a structured 'stage' timeline event, which
+-- GET /api/stats/funnel reads instead of parsing event text.
+CREATE OR REPLACE FUNCTION log_stage_change() RETURNS trigger AS $$
+BEGIN
+    INSERT INTO timeline_events (application_id, event, type, from_stage, to_stage)
+    VALUES (
+        NEW.id,
+        'Stage changed from ' || COALESCE(OLD.stage, 'new') || ' to ' || NEW.stage,
+        'stage', OLD.stage, NEW.stage
+    );
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE TRIGGER applications_log_stage_change
+    AFTER UPDATE OF stage ON applications
+    FOR EACH ROW WHEN (OLD.stage IS DISTINCT FROM NEW.stage)
+    EXECUTE FUNCTION log_stage_change();
+
+-- Checksum of the last version of this script applied at startup. Workers skip
+-- the script while it matches (see app.database._init_schema).
+CREATE TABLE IF NOT EXISTS schema_version (
+    id          BOOLEAN PRIMARY KEY DEFAULT TRUE CHECK (id),
+    checksum    TEXT NOT NULL,
+    applied_at  TIMESTAMPTZ NOT NULL DEFAULT NOW()
+);
@@ -183,3 +183,9 @@ INSERT INTO timeline_events (application_id, event, type, created_at) VALUES
 ('RK-2024-00133', 'Follow-up sent to Liverpool LA', 'action', '2024-12-10 14:00:00+00'),
 ('RK-2024-00133', 'Follow-up sent to Reference 2', 'action', '2024-12-16 09:00:00+00')
 ON CONFLICT DO NOTHING;
+
+-- Normalised checks for the seeded applications (see application_checks in schema.sql)
+SELECT sync_application_checks(ARRAY(
+    SELECT a.id FROM applications a
+    WHERE NOT EXISTS (SELECT 1 FROM application_checks c WHERE c.application_id = a.id)
+));
@@ -25,3 +25,15 @@ def mock_pool():
     pool.acquire.return_value.__aexit__ = AsyncMock(return_value=None)
 
     return pool
+
+
+@pytest.fixture(autouse=True)
+def clear_detail_cache():
+    """Start every test with empty application detail and funnel caches."""
+    from app.services.application_service import detail_cache, funnel_cache
+
+    detail_cache.clear()
+    funnel_cache.clear()
+    yield
+    detail_cache.clear()
+    funnel_cache.clear()
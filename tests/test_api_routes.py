@@ -36,6 +36,141 @@ class TestHealthEndpoint:
         assert "1; mode=block" == response.headers["X-XSS-Protection"]
 
 
+@pytest.mark.asyncio
+class TestSecurityHeadersMiddleware:
+    """Test the pure ASGI security headers middleware."""
+
+    async def test_headers_added_without_buffering_body(self):
+        """Test that headers are injected and body chunks pass through one by one."""
+        from app.main import SecurityHeadersMiddleware
+
+        async def streaming_app(scope, receive, send):
+            await send({"type": "http.response.start", "status": 200,
+                        "headers": [(b"content-type", b"text/plain")]})
+            await send({"type": "http.response.body", "body": b"chunk-1", "more_body": True})
+            await send({"type": "http.response.body", "body": b"chunk-2", "more_body": False})
+
+        sent = []
+
+        async def send(message):
+            sent.append(message)
+
+        middleware = SecurityHeadersMiddleware(streaming_app)
+        await middleware({"type": "http", "headers": []}, AsyncMock(), send)
+
+        assert ["http.response.start", "http.response.body", "http.response.body"] == [
+            m["type"] for m in sent
+        ]
+        assert [b"chunk-1", b"chunk-2"] == [m["body"] for m in sent[1:]]
+        headers = dict(sent[0]["headers"])
+        assert b"text/plain" == headers[b"content-type"]
+        assert b"nosniff" == headers[b"x-content-type-options"]
+        assert b"DENY" == headers[b"x-frame-options"]
+        assert b"1; mode=block" == headers[b"x-xss-protection"]
+
+    async def test_overrides_existing_header(self):
+        """Test that a route cannot weaken the configured headers."""
+        from app.main import SecurityHeadersMiddleware
+
+        async def inner(scope, receive, send):
+            await send({"type": "http.response.start", "status": 200,
+                        "headers": [(b"x-frame-options", b"SAMEORIGIN")]})
+
+        sent = []
+
+        async def send(message):
+            sent.append(message)
+
+        await SecurityHeadersMiddleware(inner)({"type": "http", "headers": []}, AsyncMock(), send)
+
+        assert [(b"x-frame-options", b"DENY")] == [
+            h for h in sent[0]["headers"] if h[0] == b"x-frame-options"
+        ]
+
+    async def test_non_http_scope_passthrough(self):
+        """Test that lifespan and websocket scopes are forwarded untouched."""
+        from app.main import SecurityHeadersMiddleware
+
+        inner = AsyncMock()
+        scope = {"type": "lifespan"}
+        receive, send = AsyncMock(), AsyncMock()
+
+        await SecurityHeadersMiddleware(inner)(scope, receive, send)
+
+        inner.assert_awaited_once_with(scope, receive, send)
+
+
+class TestCacheStatsEndpoint:
+    """Test GET /api/stats/cache."""
+
+    def test_cache_stats(self, client):
+        """Test that detail cache counters are exposed."""
+        response = client.get("/api/stats/cache")
+        assert 200 == response.status_code
+        stats = response.json()["applicationDetail"]
+        assert {"size", "maxSize", "ttl", "hits", "misses", "hitRate",
+                "evictions", "invalidations"} == set(stats)
+
+
+class TestPipelineStatsEndpoint:
+    """Test GET /api/stats/pipeline."""
+
+    def test_pipeline_stats(self, client):
+        """Test that the summary comes straight from the service."""
+        summary = {"total": 0, "byStage": {}, "byRisk": {}, "averageProgress": 0.0,
+                   "averageDaysInStage": 0.0, "buckets": []}
+        with patch("app.routes.stats.get_pool") as mock_get_pool, \
+                patch("app.services.application_service.get_pipeline_stats") as mock_stats:
+            mock_get_pool.return_value = AsyncMock()
+            mock_stats.return_value = summary
+
+            response = client.get("/api/stats/pipeline")
+            assert 200 == response.status_code
+            assert summary == response.json()
+
+
+class TestFunnelStatsEndpoint:
+    """Test GET /api/stats/funnel."""
+
+    def test_funnel_stats(self, client):
+        """Test that the funnel comes straight from the service."""
+        funnel = {"stages": [], "timeToRegistration": {"registered": 0, "medianDays": None,
+                                                       "p90Days": None},
+                  "generatedAt": "2026-01-01T00:00:00+00:00"}
+        with patch("app.routes.stats.get_pool") as mock_get_pool, \
+                patch("app.services.application_service.get_funnel_stats") as mock_funnel:
+            mock_get_pool.return_value = AsyncMock()
+            mock_funnel.return_value = funnel
+
+            response = client.get("/api/stats/funnel")
+            assert 200 == response.status_code
+            assert funnel == response.json()
+
+
+class TestListChecks:
+    """Test GET /api/checks/."""
+
+    def test_list_checks(self, client):
+        """Test that filters are validated and forwarded."""
+        with patch("app.routes.checks.get_pool") as mock_get_pool, \
+                patch("app.services.application_service.find_checks") as mock_find:
+            mock_get_pool.return_value = AsyncMock()
+            mock_find.return_value = [{"applicationId": "RK-2026-00001", "key": "dbs"}]
+
+            response = client.get(
+                "/api/checks/", params={"key": "dbs", "status": "pending", "expiring_within": 60},
+            )
+            assert 200 == response.status_code
+            assert [{"applicationId": "RK-2026-00001", "key": "dbs"}] == response.json()
+            assert ("dbs", "pending", 60, 500) == mock_find.call_args[0][1:]
+
+    def test_list_checks_invalid(self, client):
+        """Test that bad status, window and limit values are rejected."""
+        for params in ({"status": "done"}, {"expiring_within": -1}, {"limit": 0}):
+            response = client.get("/api/checks/", params=params)
+            assert 400 == response.status_code
+
+
 class TestListApplications:
     """Test GET /api/applications/ endpoint."""
 
@@ -91,6 +226,307 @@ class TestListApplications:
             assert "DENY" == response.headers["X-Frame-Options"]
 
 
+class TestFastJSONResponse:
+    """Test the app-wide JSON response class."""
+
+    def test_list_bypasses_jsonable_encoder(self, client, mock_get_pool):
+        """Test that the list route serialises its dicts directly."""
+        mock_get_pool.return_value = AsyncMock()
+
+        with patch("app.services.application_service.get_all_applications") as mock_get_all, \
+                patch("fastapi.routing.jsonable_encoder") as mock_encoder:
+            mock_get_all.return_value = [{"id": "RK-2026-00001", "name": "Zoë"}]
+
+            response = client.get("/api/applications/")
+            assert 200 == response.status_code
+            assert "application/json" == response.headers["content-type"]
+            assert '[{"id":"RK-2026-00001","name":"Zoë"}]' == response.text
+            assert not mock_encoder.called
+
+    def test_default_response_class_encodes_datetimes(self, client, mock_get_pool):
+        """Test that routes returning raw rows still serialise through the default class."""
+        from datetime import datetime, timezone
+
+        mock_get_pool.return_value = AsyncMock()
+
+        with patch("app.services.application_service.add_timeline_event") as mock_add:
+            mock_add.return_value = {
+                "event": "Note",
+                "type": "note",
+                "created_at": datetime(2026, 1, 1, 9, 0, tzinfo=timezone.utc),
+                "version": 2,
+            }
+
+            response = client.post(
+                "/api/applications/RK-2026-00001/timeline", json={"event": "Note", "type": "note"},
+            )
+            assert 201 == response.status_code
+            assert "2026-01-01T09:00:00+00:00" == response.json()["created_at"]
+
+
+class TestListApplicationsPagination:
+    """Test filtering and keyset pagination on GET /api/applications/."""
+
+    def test_list_applications_passes_filters(self, client, mock_get_pool):
+        """Test that query filters are forwarded to the service."""
+        mock_get_pool.return_value = AsyncMock()
+
+        with patch("app.services.application_service.get_all_applications") as mock_get_all:
+            mock_get_all.return_value = []
+
+            response = client.get(
+                "/api/applications/",
+                params={"stage": "checks", "risk": "high", "local_authority": "Leeds",
+                        "premises_type": "Domestic"},
+            )
+            assert 200 == response.status_code
+            filters = mock_get_all.call_args[0][1]
+            assert "checks" == filters["stage"]
+            assert "high" == filters["risk"]
+            assert "Leeds" == filters["local_authority"]
+            assert "domestic" == filters["premises_type"]
+
+    def test_list_applications_invalid_stage_filter(self, client, mock_get_pool):
+        """Test that an unknown stage filter is rejected."""
+        response = client.get("/api/applications/", params={"stage": "bogus"})
+        assert 400 == response.status_code
+        assert "Invalid stage" in response.json()["detail"]
+
+    def test_list_applications_page(self, client, mock_get_pool):
+        """Test that a limit switches to the paginated envelope."""
+        mock_get_pool.return_value = AsyncMock()
+
+        with patch("app.services.application_service.get_applications_page") as mock_page:
+            mock_page.return_value = ([{"id": "RK-2026-00001"}], "abc")
+
+            response = client.get("/api/applications/", params={"limit": 1})
+            assert 200 == response.status_code
+            assert {"items": [{"id": "RK-2026-00001"}], "next": "abc"} == response.json()
+            assert 1 == mock_page.call_args[0][1]
+            assert mock_page.call_args[0][2] is None
+
+    def test_list_applications_cursor_decoded(self, client, mock_get_pool):
+        """Test that a valid cursor is decoded before reaching the service."""
+        from datetime import datetime, timezone
+        from app.services.application_service import encode_cursor
+
+        mock_get_pool.return_value = AsyncMock()
+        created = datetime(2026, 1, 5, 10, 30, tzinfo=timezone.utc)
+        cursor = encode_cursor(created, "RK-2026-00007")
+
+        with patch("app.services.application_service.get_applications_page") as mock_page:
+            mock_page.return_value = ([], None)
+
+            response = client.get("/api/applications/", params={"cursor": cursor})
+            assert 200 == response.status_code
+            assert {"items": [], "next": None} == response.json()
+            assert 50 == mock_page.call_args[0][1]
+            assert (created, "RK-2026-00007") == mock_page.call_args[0][2]
+
+    def test_list_applications_invalid_cursor(self, client, mock_get_pool):
+        """Test that a malformed cursor returns 400."""
+        response = client.get("/api/applications/", params={"limit": 10, "cursor": "not-a-cursor"})
+        assert 400 == response.status_code
+        assert "Invalid cursor" == response.json()["detail"]
+
+    def test_list_applications_limit_out_of_range(self, client, mock_get_pool):
+        """Test that limits outside the allowed range are rejected."""
+        for limit in (0, 501):
+            response = client.get("/api/applications/", params={"limit": limit})
+            assert 400 == response.status_code
+            assert "Limit must be between 1 and 500" == response.json()["detail"]
+
+
+class TestSearchApplications:
+    """Test GET /api/applications/search."""
+
+    def test_search(self, client, mock_get_pool):
+        """Test that the trimmed query and page size reach the service."""
+        mock_get_pool.return_value = AsyncMock()
+        hit = {"id": "RK-2026-00001", "name": "Jane Smith", "email": "jane@example.com",
+               "stage": "checks", "risk": "low", "localAuthority": "Leeds"}
+
+        with patch("app.services.application_service.search_applications") as mock_search:
+            mock_search.return_value = ([hit], "abc")
+
+            response = client.get("/api/applications/search", params={"q": " jane ", "limit": 10})
+            assert 200 == response.status_code
+            assert {"items": [hit], "next": "abc"} == response.json()
+            assert ("jane", 10, None) == mock_search.call_args[0][1:]
+
+    def test_search_cursor(self, client, mock_get_pool):
+        """Test that a cursor from a previous page is decoded."""
+        from app.services.application_service import encode_search_cursor
+
+        mock_get_pool.return_value = AsyncMock()
+        with patch("app.services.application_service.search_applications") as mock_search:
+            mock_search.return_value = ([], None)
+
+            client.get("/api/applications/search",
+                       params={"q": "jane", "cursor": encode_search_cursor(0.75, "RK-2026-00009")})
+            assert (0.75, "RK-2026-00009") == mock_search.call_args[0][3]
+
+    def test_search_invalid_params(self, client, mock_get_pool):
+        """Test that short queries, bad limits and bad cursors return 400."""
+        for params in ({"q": " j "}, {"q": "x" * 201}, {"q": "jane", "limit": 0},
+                       {"q": "jane", "cursor": "not-a-cursor"}):
+            response = client.get("/api/applications/search", params=params)
+            assert 400 == response.status_code
+
+
+class TestListApplicationsSince:
+    """Test delta sync with ?since= on GET /api/applications/."""
+
+    def test_since_returns_changes(self, client, mock_get_pool):
+        """Test that since is parsed and the delta envelope returned."""
+        from datetime import datetime, timezone
+
+        mock_get_pool.return_value = AsyncMock()
+        delta = {"items": [], "deleted": ["RK-2026-00001"], "watermark": "2026-03-01T12:00:00Z"}
+
+        with patch("app.services.application_service.get_changes_since") as mock_changes:
+            mock_changes.return_value = delta
+
+            response = client.get("/api/applications/", params={"since": "2026-03-01T11:00:00Z"})
+            assert 200 == response.status_code
+            assert delta == response.json()
+            assert datetime(2026, 3, 1, 11, tzinfo=timezone.utc) == mock_changes.call_args[0][1]
+
+    def test_naive_since_is_utc(self, client, mock_get_pool):
+        """Test that a timestamp without an offset is read as UTC."""
+        from datetime import datetime, timezone
+
+        mock_get_pool.return_value = AsyncMock()
+
+        with patch("app.services.application_service.get_changes_since") as mock_changes:
+            mock_changes.return_value = {"items": [], "deleted": [], "watermark": ""}
+
+            client.get("/api/applications/", params={"since": "2026-03-01T11:00:00"})
+            assert datetime(2026, 3, 1, 11, tzinfo=timezone.utc) == mock_changes.call_args[0][1]
+
+    def test_invalid_since(self, client, mock_get_pool):
+        """Test that an unparseable timestamp returns 400."""
+        response = client.get("/api/applications/", params={"since": "yesterday"})
+        assert 400 == response.status_code
+        assert "Invalid since" in response.json()["detail"]
+
+    def test_since_with_pagination(self, client, mock_get_pool):
+        """Test that since cannot be combined with filters or a limit."""
+        for extra in ({"limit": 10}, {"stage": "checks"}):
+            response = client.get(
+                "/api/applications/", params={"since": "2026-03-01T11:00:00Z", **extra},
+            )
+            assert 400 == response.status_code
+
+
+class TestListApplicationsProjection:
+    """Test ?view= and ?fields= on GET /api/applications/."""
+
+    def test_summary_view(self, client, mock_get_pool):
+        """Test that view=summary requests the pipeline fields."""
+        mock_get_pool.return_value = AsyncMock()
+
+        with patch("app.services.application_service.get_all_applications") as mock_get_all:
+            mock_get_all.return_value = []
+
+            response = client.get("/api/applications/", params={"view": "summary"})
+            assert 200 == response.status_code
+            assert (
+                "id", "name", "stage", "risk", "progress", "daysInStage", "localAuthority",
+            ) == mock_get_all.call_args[0][2]
+
+    def test_full_view_is_default(self, client, mock_get_pool):
+        """Test that no view or view=full keeps the full shape."""
+        mock_get_pool.return_value = AsyncMock()
+
+        with patch("app.services.application_service.get_all_applications") as mock_get_all:
+            mock_get_all.return_value = []
+
+            client.get("/api/applications/", params={"view": "full"})
+            assert mock_get_all.call_args[0][2] is None
+
+    def test_fields_always_include_id(self, client, mock_get_pool):
+        """Test that a sparse fieldset always leads with id."""
+        mock_get_pool.return_value = AsyncMock()
+
+        with patch("app.services.application_service.get_applications_page") as mock_page:
+            mock_page.return_value = ([], None)
+
+            response = client.get(
+                "/api/applications/", params={"fields": "stage, name,stage", "limit": 5},
+            )
+            assert 200 == response.status_code
+            assert ("id", "stage", "name") == mock_page.call_args[0][4]
+
+    def test_unknown_field(self, client, mock_get_pool):
+        """Test that unknown fields are rejected."""
+        response = client.get("/api/applications/", params={"fields": "name,checks"})
+        assert 400 == response.status_code
+        assert "Unknown fields: checks" in response.json()["detail"]
+
+    def test_invalid_view(self, client, mock_get_pool):
+        """Test that unknown views are rejected."""
+        response = client.get("/api/applications/", params={"view": "compact"})
+        assert 400 == response.status_code
+        assert "Invalid view" in response.json()["detail"]
+
+
+class TestExportApplications:
+    """Test GET /api/applications/export."""
+
+    @staticmethod
+    def _apps():
+        async def gen(pool):
+            yield {
+                "id": "RK-2026-00001", "name": "John Doe", "email": "john@example.com",
+                "phone": "", "dob": "1990-01-15", "stage": "checks", "risk": "low",
+                "progress": 9, "localAuthority": "Leeds", "premisesType": "domestic",
+                "premisesAddress": "1 High St, Leeds", "startDate": "2026-01-01",
+                "registrationDate": None, "lastUpdated": "2026-01-02",
+                "checks": {"dbs": {"status": "complete", "date": "2026-01-02"}},
+                "connectedPersons": [{"name": "Ann Doe"}, {"name": "Bob Doe"}],
+            }
+        return gen
+
+    def test_export_ndjson(self, client, mock_get_pool):
+        """Test that the default export is one JSON object per line."""
+        import json
+
+        with patch("app.services.application_service.iter_applications", self._apps()):
+            response = client.get("/api/applications/export")
+            assert 200 == response.status_code
+            assert "application/x-ndjson" == response.headers["content-type"]
+            assert "attachment" in response.headers["content-disposition"]
+            lines = response.text.splitlines()
+            assert 1 == len(lines)
+            assert "RK-2026-00001" == json.loads(lines[0])["id"]
+
+    def test_export_csv(self, client, mock_get_pool):
+        """Test the flat CSV column mapping."""
+        import csv
+        import io
+
+        with patch("app.services.application_service.iter_applications", self._apps()):
+            response = client.get("/api/applications/export", params={"format": "csv"})
+            assert 200 == response.status_code
+            assert response.headers["content-type"].startswith("text/csv")
+
+            header, row = list(csv.reader(io.StringIO(response.text)))
+            record = dict(zip(header, row))
+            assert "RK-2026-00001" == record["id"]
+            assert "complete" == record["dbs_status"]
+            assert "2026-01-02" == record["dbs_date"]
+            assert "" == record["insurance_status"]
+            assert "2" == record["connectedPersonsCount"]
+            assert "Ann Doe; Bob Doe" == record["connectedPersonsNames"]
+
+    def test_export_invalid_format(self, client, mock_get_pool):
+        """Test that unknown formats are rejected."""
+        response = client.get("/api/applications/export", params={"format": "xlsx"})
+        assert 400 == response.status_code
+        assert "Invalid format" in response.json()["detail"]
+
+
 class TestGetApplication:
     """Test GET /api/applications/{app_id} endpoint."""
 
@@ -105,6 +541,7 @@ class TestGetApplication:
                 "name": "John Doe",
                 "email": "john@example.com",
                 "stage": "new",
+                "version": 3,
             }
 
             response = client.get("/api/applications/RK-2026-00001")
@@ -112,6 +549,7 @@ class TestGetApplication:
             data = response.json()
             assert "RK-2026-00001" == data["id"]
             assert "John Doe" == data["name"]
+            assert '"3"' == response.headers["ETag"]
 
     def test_get_application_not_found(self, client, mock_get_pool):
         """Test getting a non-existent application."""
@@ -327,6 +765,159 @@ class TestCreateApplication:
         response = client.post("/api/applications/", json={})
         assert 400 == response.status_code
 
+    def test_create_application_wrong_types(self, client, mock_get_pool):
+        """Test that wrongly typed sections are rejected with 400, not a 500."""
+        response = client.post("/api/applications/", json={"personal": ["John"]})
+        assert 400 == response.status_code
+
+        body = {"personal": {"firstName": "John", "lastName": "Doe", "email": "john@example.com"},
+                "service": "childminding"}
+        response = client.post("/api/applications/", json=body)
+        assert 400 == response.status_code
+        assert "Invalid application data" == response.json()["detail"]
+
+
+class TestBulkImportApplications:
+    """Test POST /api/applications/bulk NDJSON import."""
+
+    @staticmethod
+    def _line(first="John", email="john@example.com", **personal):
+        import json
+
+        return json.dumps({"personal": {
+            "firstName": first, "lastName": "Doe", "email": email, **personal,
+        }})
+
+    @staticmethod
+    def _report(response):
+        import json
+
+        return [json.loads(line) for line in response.text.splitlines()]
+
+    def test_bulk_import_reports_each_line(self, client, mock_get_pool):
+        """Test that valid lines are created and invalid ones reported."""
+        mock_get_pool.return_value = AsyncMock()
+        body = "\n".join([
+            self._line(),
+            "{not json",
+            "",
+            self._line(email="bad-email"),
+            self._line(first="Jane", dob="1990-02-30"),
+            self._line(first="Jane", email="jane@example.com"),
+        ])
+
+        with patch("app.services.application_service.bulk_create_applications") as mock_bulk:
+            mock_bulk.return_value = ["RK-2026-00200", "RK-2026-00201"]
+
+            response = client.post("/api/applications/bulk", content=body)
+            assert 200 == response.status_code
+            assert "application/x-ndjson" == response.headers["content-type"]
+
+            report = self._report(response)
+            assert {"line": 2, "error": report[0]["error"]} == report[0]
+            assert {"line": 4, "error": "Invalid email format"} == report[1]
+            assert 5 == report[2]["line"]
+            assert "Invalid date of birth" in report[2]["error"]
+            assert {"line": 1, "id": "RK-2026-00200"} == report[3]
+            assert {"line": 6, "id": "RK-2026-00201"} == report[4]
+            assert {"summary": {"lines": 5, "created": 2, "failed": 3}} == report[-1]
+
+            rows = mock_bulk.call_args[0][1]
+            assert ["John", "Jane"] == [row[1] for row in rows]
+
+    def test_bulk_import_batches_with_progress(self, client, mock_get_pool):
+        """Test that rows are written in batches with a progress line after each."""
+        mock_get_pool.return_value = AsyncMock()
+        body = "\n".join(self._line(email=f"user{i}@example.com") for i in range(5))
+
+        with patch("app.routes.applications.BULK_IMPORT_BATCH_SIZE", 2), \
+                patch("app.services.application_service.bulk_create_applications") as mock_bulk:
+            mock_bulk.side_effect = lambda pool, bodies: [f"RK-{i}" for i in range(len(bodies))]
+
+            report = self._report(client.post("/api/applications/bulk", content=body))
+
+            assert [2, 2, 1] == [len(c[0][1]) for c in mock_bulk.call_args_list]
+            progress = [entry["progress"] for entry in report if "progress" in entry]
+            assert [2, 4, 5] == [p["created"] for p in progress]
+
+    def test_bulk_import_database_error_retries_rows(self, client, mock_get_pool):
+        """Test that a rejected COPY is retried row by row so valid lines still import."""
+        import asyncpg
+
+        mock_get_pool.return_value = AsyncMock()
+        body = "\n".join([self._line(), self._line(first="Bad"), self._line(first="Jane")])
+
+        def bulk(pool, rows):
+            if any(row[1] == "Bad" for row in rows):
+                raise asyncpg.CheckViolationError("violates check constraint")
+            return [f"RK-{row[1]}" for row in rows]
+
+        with patch("app.services.application_service.bulk_create_applications") as mock_bulk:
+            mock_bulk.side_effect = bulk
+
+            report = self._report(client.post("/api/applications/bulk", content=body))
+
+            assert [3, 1, 1, 1] == [len(c[0][1]) for c in mock_bulk.call_args_list]
+            assert {"line": 1, "id": "RK-John"} == report[0]
+            assert 2 == report[1]["line"]
+            assert report[1]["error"].startswith("Rejected by the database")
+            assert {"line": 3, "id": "RK-Jane"} == report[2]
+            assert {"summary": {"lines": 3, "created": 2, "failed": 1}} == report[-1]
+
+    def test_bulk_import_wrong_types_reported_per_line(self, client, mock_get_pool):
+        """Test that valid JSON with the wrong shape fails its own line only."""
+        import json
+
+        mock_get_pool.return_value = AsyncMock()
+        body = "\n".join([
+            json.dumps({"personal": "x"}),
+            json.dumps({"personal": {"firstName": 5, "lastName": "Doe", "email": "a@b.co"}}),
+            json.dumps({**json.loads(self._line()), "premises": "x"}),
+            self._line(),
+        ])
+
+        with patch("app.services.application_service.bulk_create_applications") as mock_bulk:
+            mock_bulk.return_value = ["RK-2026-00200"]
+
+            report = self._report(client.post("/api/applications/bulk", content=body))
+
+            assert {"line": 1, "error": "personal must be a JSON object"} == report[0]
+            assert {"line": 2, "error": "personal.firstName must be a string"} == report[1]
+            assert {"line": 3, "error": "Invalid application data"} == report[2]
+            assert {"line": 4, "id": "RK-2026-00200"} == report[3]
+            assert {"summary": {"lines": 4, "created": 1, "failed": 3}} == report[-1]
+
+    def test_bulk_import_too_large(self, client, mock_get_pool):
+        """Test that uploads over BULK_MAX_BYTES get 413 without touching the database."""
+        mock_get_pool.return_value = AsyncMock()
+        body = "\n".join(self._line(email=f"user{i}@example.com") for i in range(5))
+
+        with patch("app.routes.applications.BULK_MAX_BYTES", 100), \
+                patch("app.services.application_service.bulk_create_applications") as mock_bulk:
+            response = client.post("/api/applications/bulk", content=body)
+            assert 413 == response.status_code
+
+            def chunks():
+                for i in range(5):
+                    yield (self._line(email=f"user{i}@example.com") + "\n").encode()
+
+            response = client.post("/api/applications/bulk", content=chunks())
+            assert 413 == response.status_code
+            assert not mock_bulk.called
+
+    def test_bulk_import_server_error_still_summarises(self, client, mock_get_pool):
+        """Test that an unexpected error ends the stream with an error and a summary."""
+        mock_get_pool.return_value = AsyncMock()
+
+        with patch("app.services.application_service.bulk_create_applications") as mock_bulk:
+            mock_bulk.side_effect = OSError("connection reset")
+
+            report = self._report(client.post("/api/applications/bulk", content=self._line()))
+
+            assert 1 == report[0]["line"]
+            assert "error" in report[1] and "line" not in report[1]
+            assert {"summary": {"lines": 1, "created": 0, "failed": 1}} == report[-1]
+
 
 class TestUpdateApplication:
     """Test PATCH /api/applications/{app_id} endpoint."""
@@ -400,6 +991,148 @@ class TestUpdateApplication:
             assert 200 == response.status_code
 
 
+class TestUpdateCheck:
+    """Test PATCH endpoints for individual checks."""
+
+    def test_update_check_success(self, client, mock_get_pool):
+        """Test patching one applicant check."""
+        mock_get_pool.return_value = AsyncMock()
+
+        with patch("app.services.application_service.update_check") as mock_update:
+            mock_update.return_value = {
+                "check": {"status": "complete"}, "progress": 18, "version": 4,
+            }
+
+            response = client.patch(
+                "/api/applications/RK-2026-00001/checks/dbs", json={"status": "complete"},
+            )
+            assert 200 == response.status_code
+            assert {"check": {"status": "complete"}, "progress": 18, "version": 4} == response.json()
+            assert '"4"' == response.headers["ETag"]
+            assert ("RK-2026-00001", "dbs", {"status": "complete"}, None) == \
+                mock_update.call_args[0][1:]
+
+    def test_update_check_not_found(self, client, mock_get_pool):
+        """Test that an unknown check returns 404."""
+        mock_get_pool.return_value = AsyncMock()
+
+        with patch("app.services.application_service.update_check") as mock_update:
+            mock_update.return_value = None
+
+            response = client.patch(
+                "/api/applications/RK-2026-00001/checks/bogus", json={"status": "complete"},
+            )
+            assert 404 == response.status_code
+
+    def test_update_check_invalid_status(self, client, mock_get_pool):
+        """Test that unknown statuses and empty bodies are rejected."""
+        response = client.patch(
+            "/api/applications/RK-2026-00001/checks/dbs", json={"status": "done"},
+        )
+        assert 400 == response.status_code
+        assert "Invalid status" in response.json()["detail"]
+
+        response = client.patch("/api/applications/RK-2026-00001/checks/dbs", json={})
+        assert 400 == response.status_code
+
+    def test_update_connected_person_check(self, client, mock_get_pool):
+        """Test patching one check of a connected person."""
+        mock_get_pool.return_value = AsyncMock()
+
+        with patch("app.services.application_service.update_connected_person_check") as mock_update:
+            mock_update.return_value = {"check": {"status": "pending"}, "version": 2}
+
+            response = client.patch(
+                "/api/applications/RK-2026-00001/connected-persons/CP-001/checks/la_check",
+                json={"status": "pending"},
+                headers={"If-Match": '"1"'},
+            )
+            assert 200 == response.status_code
+            assert {"check": {"status": "pending"}, "version": 2} == response.json()
+            assert ("RK-2026-00001", "CP-001", "la_check", {"status": "pending"}, [1]) == \
+                mock_update.call_args[0][1:]
+
+
+class TestIfMatch:
+    """Test optimistic concurrency with If-Match on PATCH and DELETE."""
+
+    def test_patch_passes_if_match_versions(self, client, mock_get_pool):
+        """Test that If-Match tags are parsed into versions for the service."""
+        mock_get_pool.return_value = AsyncMock()
+
+        with patch("app.services.application_service.update_application") as mock_update:
+            mock_update.return_value = True
+
+            response = client.patch(
+                "/api/applications/RK-2026-00001", json={"risk": "high"},
+                headers={"If-Match": '"3", "4"'},
+            )
+            assert 200 == response.status_code
+            assert [3, 4] == mock_update.call_args[0][3]
+
+    def test_patch_weak_etag_never_matches(self, client, mock_get_pool):
+        """Test that weak tags fail If-Match, which needs strong comparison."""
+        from app.services.application_service import VersionConflict
+
+        mock_get_pool.return_value = AsyncMock()
+
+        with patch("app.services.application_service.update_application") as mock_update:
+            mock_update.side_effect = VersionConflict(4)
+
+            response = client.patch(
+                "/api/applications/RK-2026-00001", json={"risk": "high"},
+                headers={"If-Match": 'W/"4"'},
+            )
+            assert 412 == response.status_code
+            assert [] == mock_update.call_args[0][3]
+
+    def test_patch_without_if_match(self, client, mock_get_pool):
+        """Test that a missing or wildcard If-Match means no precondition."""
+        mock_get_pool.return_value = AsyncMock()
+
+        with patch("app.services.application_service.update_application") as mock_update:
+            mock_update.return_value = True
+
+            client.patch("/api/applications/RK-2026-00001", json={"risk": "high"})
+            assert mock_update.call_args[0][3] is None
+            client.patch(
+                "/api/applications/RK-2026-00001", json={"risk": "high"},
+                headers={"If-Match": "*"},
+            )
+            assert mock_update.call_args[0][3] is None
+
+    def test_patch_version_conflict(self, client, mock_get_pool):
+        """Test that a stale version returns 412 with the current ETag."""
+        from app.services.application_service import VersionConflict
+
+        mock_get_pool.return_value = AsyncMock()
+
+        with patch("app.services.application_service.update_application") as mock_update:
+            mock_update.side_effect = VersionConflict(5)
+
+            response = client.patch(
+                "/api/applications/RK-2026-00001", json={"risk": "high"},
+                headers={"If-Match": '"3"'},
+            )
+            assert 412 == response.status_code
+            assert '"5"' == response.headers["ETag"]
+
+    def test_delete_version_conflict(self, client, mock_get_pool):
+        """Test that DELETE honours If-Match too."""
+        from app.services.application_service import VersionConflict
+
+        mock_get_pool.return_value = AsyncMock()
+
+        with patch("app.services.application_service.delete_application") as mock_delete:
+            mock_delete.side_effect = VersionConflict(2)
+
+            response = client.delete(
+                "/api/applications/RK-2026-00001", headers={"If-Match": '"1"'},
+            )
+            assert 412 == response.status_code
+            assert [1] == mock_delete.call_args[0][2]
+
+
 class TestDeleteApplication:
     """Test DELETE /api/applications/{app_id} endpoint."""
 
@@ -438,10 +1171,10 @@ class TestAddTimelineEvent:
 
         with patch("app.services.application_service.add_timeline_event") as mock_add:
             mock_add.return_value = {
-                "id": 1,
-                "application_id": "RK-2026-00001",
                 "event": "DBS check completed",
                 "type": "complete",
+                "created_at": None,
+                "version": 4,
             }
 
             body = {"event": "DBS check completed", "type": "complete"}
@@ -449,6 +1182,19 @@ class TestAddTimelineEvent:
             assert 201 == response.status_code
             data = response.json()
             assert "DBS check completed" == data["event"]
+            assert '"4"' == response.headers["ETag"]
+
+    def test_add_timeline_event_missing_application(self, client, mock_get_pool):
+        """Test adding a timeline event to an application that does not exist."""
+        mock_get_pool.return_value = AsyncMock()
+
+        with patch("app.services.application_service.add_timeline_event") as mock_add:
+            mock_add.return_value = None
+
+            response = client.post(
+                "/api/applications/RK-2026-99999/timeline", json={"event": "Note"},
+            )
+            assert 404 == response.status_code
 
     def test_add_timeline_event_missing_event(self, client, mock_get_pool):
         """Test adding timeline event with missing event text."""
@@ -476,7 +1222,9 @@ class TestAddTimelineEvent:
         mock_get_pool.return_value = mock_pool
 
         with patch("app.services.application_service.add_timeline_event") as mock_add:
-            mock_add.return_value = {"id": 1, "event": "A" * 2000, "type": "action"}
+            mock_add.return_value = {
+                "event": "A" * 2000, "type": "action", "created_at": None, "version": 2,
+            }
 
             body = {"event": "A" * 2000, "type": "action"}
             response = client.post("/api/applications/RK-2026-00001/timeline", json=body)
@@ -490,7 +1238,9 @@ class TestAddTimelineEvent:
         valid_types = ["action", "complete", "alert", "note"]
 
         with patch("app.services.application_service.add_timeline_event") as mock_add:
-            mock_add.return_value = {"id": 1, "event": "Test", "type": "action"}
+            mock_add.return_value = {
+                "event": "Test", "type": "action", "created_at": None, "version": 2,
+            }
 
             for event_type in valid_types:
                 body = {"event": "Test event", "type": event_type}
@@ -510,7 +1260,9 @@ class TestAddTimelineEvent:
         mock_get_pool.return_value = mock_pool
 
         with patch("app.services.application_service.add_timeline_event") as mock_add:
-            mock_add.return_value = {"id": 1, "event": "Test", "type": "action"}
+            mock_add.return_value = {
+                "event": "Test", "type": "action", "created_at": None, "version": 2,
+            }
 
             body = {"event": "Test event"}
             response = client.post("/api/applications/RK-2026-00001/timeline", json=body)
@@ -0,0 +1,169 @@
+"""Tests for the in-process TTL/LRU cache and its change-notification wiring."""
+
+import pytest
+from datetime import datetime
+from unittest.mock import MagicMock
+
+from app import cache as cache_module
+from app import database
+from app.cache import TTLCache
+from app.services.application_service import detail_cache, get_application, update_application
+
+
+class TestTTLCache:
+    """Test TTLCache behaviour."""
+
+    def test_get_set(self):
+        """Test a basic hit and miss."""
+        cache = TTLCache(max_size=2, ttl=60)
+        assert cache.get("a") is None
+        cache.set("a", 1)
+        assert 1 == cache.get("a")
+        assert (1, 1) == (cache.hits, cache.misses)
+
+    def test_lru_eviction(self):
+        """Test that the least recently used entry is evicted first."""
+        cache = TTLCache(max_size=2, ttl=60)
+        cache.set("a", 1)
+        cache.set("b", 2)
+        cache.get("a")
+        cache.set("c", 3)
+        assert cache.get("b") is None
+        assert 1 == cache.get("a")
+        assert 1 == cache.evictions
+
+    def test_ttl_expiry(self, monkeypatch):
+        """Test that entries expire after the TTL."""
+        now = [1000.0]
+        monkeypatch.setattr(cache_module.time, "monotonic", lambda: now[0])
+        cache = TTLCache(max_size=2, ttl=10)
+        cache.set("a", 1)
+        now[0] += 9
+        assert 1 == cache.get("a")
+        now[0] += 2
+        assert cache.get("a") is None
+        assert 0 == cache.stats()["size"]
+
+    def test_stale_fill_is_dropped(self):
+        """Test that a fill started before an invalidation is not cached."""
+        cache = TTLCache(max_size=2, ttl=60)
+        token = cache.token()
+        cache.invalidate("a")
+        cache.set("a", "stale", token)
+        assert cache.get("a") is None
+
+        token = cache.token()
+        cache.set("a", "fresh", token)
+        assert "fresh" == cache.get("a")
+
+    def test_zero_size_disables_cache(self):
+        """Test that max_size=0 turns caching off."""
+        cache = TTLCache(max_size=0, ttl=60)
+        cache.set("a", 1)
+        assert cache.get("a") is None
+
+    def test_stats(self):
+        """Test the exposed counters."""
+        cache = TTLCache(max_size=5, ttl=30)
+        cache.set("a", 1)
+        cache.get("a")
+        cache.get("b")
+        cache.invalidate("a")
+        assert {
+            "size": 0,
+            "maxSize": 5,
+            "ttl": 30,
+            "hits": 1,
+            "misses": 1,
+            "hitRate": 0.5,
+            "evictions": 0,
+            "invalidations": 1,
+        } == cache.stats()
+
+
+APP_ROW = {
+    "id": "RK-2026-00001",
+    "name": "John Doe",
+    "stage": "new",
+    "last_updated": datetime.now(),
+}
+
+
+@pytest.mark.asyncio
+class TestDetailCache:
+    """Test caching in get_application."""
+
+    async def test_second_read_is_served_from_cache(self, mock_pool):
+        """Test that a cache hit issues no queries."""
+        connection = mock_pool.acquire.return_value.__aenter__.return_value
+        connection.fetchrow.return_value = APP_ROW
+        connection.fetch.return_value = []
+
+        first = await get_application(mock_pool, "RK-2026-00001")
+        second = await get_application(mock_pool, "RK-2026-00001")
+
+        assert first is second
+        assert 1 == connection.fetchrow.call_count
+        assert 1 == connection.fetch.call_count
+
+    async def test_missing_application_is_not_cached(self, mock_pool):
+        """Test that 404s are not cached."""
+        connection = mock_pool.acquire.return_value.__aenter__.return_value
+        connection.fetchrow.return_value = None
+
+        await get_application(mock_pool, "RK-2026-99999")
+        await get_application(mock_pool, "RK-2026-99999")
+
+        assert 2 == connection.fetchrow.call_count
+
+    async def test_local_write_invalidates(self, mock_pool):
+        """Test that this worker's own update evicts the entry."""
+        connection = mock_pool.acquire.return_value.__aenter__.return_value
+        connection.fetchrow.return_value = APP_ROW
+        connection.fetch.return_value = []
+        connection.execute.return_value = "UPDATE 1"
+
+        await get_application(mock_pool, "RK-2026-00001")
+        await update_application(mock_pool, "RK-2026-00001", {"stage": "checks"})
+        await get_application(mock_pool, "RK-2026-00001")
+
+        assert 2 == connection.fetchrow.call_count
+
+
+class TestChangeNotifications:
+    """Test LISTEN/NOTIFY dispatch into the detail cache."""
+
+    def test_notification_evicts_application(self):
+        """Test that a NOTIFY payload evicts exactly the named application."""
+        detail_cache.set("RK-2026-00001", {"id": "RK-2026-00001"})
+        detail_cache.set("RK-2026-00002", {"id": "RK-2026-00002"})
+
+        database._on_notification(
+            None, 1, database.CHANGES_CHANNEL,
+            '{"table":"timeline_events","op":"INSERT","id":"RK-2026-00001"}',
+        )
+
+        assert detail_cache.get("RK-2026-00001") is None
+        assert detail_cache.get("RK-2026-00002") is not None
+
+    def test_malformed_payload_is_ignored(self):
+        """Test that garbage payloads do not raise."""
+        detail_cache.set("RK-2026-00001", {"id": "RK-2026-00001"})
+        database._on_notification(None, 1, database.CHANGES_CHANNEL, "not json")
+        assert detail_cache.get("RK-2026-00001") is not None
+
+    def test_failing_handler_does_not_block_others(self, monkeypatch):
+        """Test that one failing handler does not stop the rest."""
+        calls = []
+        monkeypatch.setattr(database, "_change_handlers", [
+            MagicMock(side_effect=RuntimeError("boom")),
+            calls.append,
+        ])
+        database._dispatch_change({"op": "UPDATE", "id": "RK-2026-00001"})
+        assert [{"op": "UPDATE", "id": "RK-2026-00001"}] == calls
+
+    def test_reset_clears_cache(self):
+        """Test that a listener reset drops every entry."""
+        detail_cache.set("RK-2026-00001", {"id": "RK-2026-00001"})
+        database._dispatch_change(database.RESET_CHANGE)
+        assert 0 == detail_cache.stats()["size"]
@@ -2,7 +2,7 @@
 
 import pytest
 from datetime import datetime, date, timezone
-from app.services.application_service import to_dashboard_shape
+from app.services.application_service import to_dashboard_shape, to_summary_shape
 
 
 class TestToDashboardShape:
@@ -110,7 +110,7 @@ class TestToDashboardShape:
         assert result["daysInStage"] >= 4  # At least 4 days
 
     def test_to_dashboard_shape_with_json_fields(self):
-        """Test transformation with JSON fields."""
+        """Test transformation with JSONB fields decoded by the pool codecs."""
         row = {
             "id": "RK-2026-00001",
             "name": "Test User",
@@ -126,13 +126,13 @@ class TestToDashboardShape:
             "premises_type": "domestic",
             "premises_address": None,
             "local_authority": None,
-            "checks": '{"dbs": {"status": "complete"}}',
-            "connected_persons": '[{"name": "John Doe"}]',
-            "registers": '["0-5", "5-8"]',
-            "ofsted_check": '{"status": "approved"}',
-            "household": '{"adults": []}',
-            "service": '{"type": "childminding"}',
-            "premises_details": '{"outdoor_space": "garden"}',
+            "checks": {"dbs": {"status": "complete"}},
+            "connected_persons": [{"name": "John Doe"}],
+            "registers": ["0-5", "5-8"],
+            "ofsted_check": {"status": "approved"},
+            "household": {"adults": []},
+            "service": {"type": "childminding"},
+            "premises_details": {"outdoor_space": "garden"},
         }
 
         result = to_dashboard_shape(row, [])
@@ -305,3 +305,47 @@ class TestToDashboardShape:
 
         # Should handle naive datetime and calculate days
         assert result["daysInStage"] >= 0
+
+
+class TestToSummaryShape:
+    """Test the slim summary transformation."""
+
+    def test_to_summary_shape_matches_dashboard_values(self):
+        """Test that projected fields equal their full-shape counterparts."""
+        row = {
+            "id": "RK-2026-00001",
+            "name": "John Doe",
+            "email": None,
+            "stage": "review",
+            "risk": "medium",
+            "progress": 80,
+            "start_date": date(2026, 2, 1),
+            "last_updated": datetime(2026, 2, 10, 10, 0, 0, tzinfo=timezone.utc),
+            "local_authority": "Bristol",
+        }
+        fields = (
+            "id", "name", "email", "stage", "risk", "progress",
+            "daysInStage", "startDate", "lastUpdated", "localAuthority",
+        )
+
+        full = to_dashboard_shape(row, [])
+        summary = to_summary_shape(row, fields)
+
+        assert list(fields) == list(summary)
+        assert {f: full[f] for f in fields} == summary
+
+    def test_to_summary_shape_defaults(self):
+        """Test defaults for missing values."""
+        result = to_summary_shape(
+            {"id": "RK-2026-00001"},
+            ("id", "name", "stage", "risk", "progress", "registrationDate"),
+        )
+
+        assert {
+            "id": "RK-2026-00001",
+            "name": "",
+            "stage": "new",
+            "risk": "low",
+            "progress": 0,
+            "registrationDate": None,
+        } == result
@@ -0,0 +1,124 @@
+"""Tests for pool configuration and acquire timeouts in app.database."""
+
+import asyncio
+import pytest
+from unittest.mock import AsyncMock, MagicMock, patch
+from fastapi.testclient import TestClient
+
+from app import database
+from app.main import app
+
+
+class TestPoolSettings:
+    """Test pool_settings()."""
+
+    def test_defaults(self, monkeypatch):
+        """Test the settings used with no pool variables set."""
+        for name in ("WEB_CONCURRENCY", "DB_POOL_MAX_SIZE", "DB_POOL_MIN_SIZE",
+                     "DB_COMMAND_TIMEOUT", "DB_STATEMENT_CACHE_SIZE"):
+            monkeypatch.delenv(name, raising=False)
+
+        settings = database.pool_settings()
+
+        assert 2 == settings["min_size"]
+        assert 10 == settings["max_size"]
+        assert 100 == settings["statement_cache_size"]
+        assert settings["command_timeout"] is None
+        assert 300.0 == settings["max_inactive_connection_lifetime"]
+
+    def test_budget_shared_between_workers(self, monkeypatch):
+        """Test that more workers get smaller pools within the connection budget."""
+        monkeypatch.delenv("DB_POOL_MAX_SIZE", raising=False)
+        monkeypatch.setattr(database, "DB_CONNECTION_BUDGET", 80)
+
+        monkeypatch.setenv("WEB_CONCURRENCY", "4")
+        assert 10 == database.pool_settings()["max_size"]
+        monkeypatch.setenv("WEB_CONCURRENCY", "16")
+        assert 4 == database.pool_settings()["max_size"]
+        monkeypatch.setenv("WEB_CONCURRENCY", "100")
+        assert {"min_size": 1, "max_size": 1} == {
+            k: database.pool_settings()[k] for k in ("min_size", "max_size")
+        }
+
+    def test_explicit_values(self, monkeypatch):
+        """Test that explicit sizes and timeouts win over the calculation."""
+        monkeypatch.setenv("WEB_CONCURRENCY", "16")
+        monkeypatch.setenv("DB_POOL_MAX_SIZE", "20")
+        monkeypatch.setenv("DB_POOL_MIN_SIZE", "5")
+        monkeypatch.setenv("DB_COMMAND_TIMEOUT", "30")
+
+        settings = database.pool_settings()
+
+        assert (5, 20, 30.0) == (settings["min_size"], settings["max_size"],
+                                 settings["command_timeout"])
+
+    def test_pgbouncer_disables_statement_cache(self, monkeypatch):
+        """Test that PgBouncer mode turns off prepared statement caching."""
+        monkeypatch.setenv("DB_STATEMENT_CACHE_SIZE", "500")
+        monkeypatch.setattr(database, "DB_PGBOUNCER", True)
+        assert 0 == database.pool_settings()["statement_cache_size"]
+
+
+@pytest.mark.asyncio
+class TestAcquireTimeout:
+    """Test the bounded pool acquire."""
+
+    async def test_default_timeout_and_pool_timeout(self):
+        """Test that acquire uses DB_POOL_ACQUIRE_TIMEOUT and raises PoolTimeout."""
+        raw = MagicMock()
+        raw.acquire = AsyncMock(side_effect=asyncio.TimeoutError)
+        pool = database.InstrumentedPool(raw)
+
+        with pytest.raises(database.PoolTimeout):
+            async with pool.acquire():
+                pass
+
+        raw.acquire.assert_awaited_once_with(timeout=database.DB_POOL_ACQUIRE_TIMEOUT)
+        assert 0 == pool.waiting
+
+
+class TestPoolTimeoutResponse:
+    """Test that an exhausted pool maps to 503."""
+
+    def test_503_with_retry_after(self):
+        """Test the response when no connection frees up in time."""
+        with patch("app.routes.applications.get_pool"), \
+                patch("app.services.application_service.get_application",
+                      AsyncMock(side_effect=database.PoolTimeout("no connection free"))):
+            response = TestClient(app).get("/api/applications/RK-2026-00001")
+
+        assert 503 == response.status_code
+        assert str(database.DB_POOL_RETRY_AFTER) == response.headers["Retry-After"]
+        assert "Service busy, please retry" == response.json()["detail"]
+
+
+@pytest.mark.asyncio
+class TestInitSchema:
+    """Test that schema.sql is applied once per version under a lock."""
+
+    @staticmethod
+    async def _init(mock_pool, applied):
+        connection = mock_pool.acquire.return_value.__aenter__.return_value
+        connection.fetchval.side_effect = [applied is not None, applied]
+        with patch.object(database, "_pool", mock_pool):
+            await database._init_schema()
+        return [c.args[0] for c in connection.execute.await_args_list]
+
+    async def test_applies_new_schema_under_lock(self, mock_pool):
+        """Test that a changed script is run and its checksum recorded."""
+        statements = await self._init(mock_pool, None)
+
+        assert "SELECT pg_advisory_xact_lock($1)" == statements[0]
+        assert "CREATE TABLE IF NOT EXISTS applications" in statements[1]
+        assert "INSERT INTO schema_version" in statements[2]
+        connection = mock_pool.acquire.return_value.__aenter__.return_value
+        connection.transaction.assert_called_once_with()
+
+    async def test_skips_current_schema(self, mock_pool):
+        """Test that workers starting after the first one run no DDL."""
+        sql = (database.Path(database.__file__).resolve().parent.parent
+               / "db" / "schema.sql").read_text()
+        checksum = database.hashlib.sha256(sql.encode()).hexdigest()
+        statements = await self._init(mock_pool, checksum)
+
+        assert ["SELECT pg_advisory_xact_lock($1)"] == statements
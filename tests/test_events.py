@@ -0,0 +1,152 @@
+"""Tests for the Server-Sent Events change broadcaster."""
+
+import asyncio
+
+import pytest
+from unittest.mock import AsyncMock, patch
+
+from app import database, json_codec
+from app.events import ChangeBroadcaster, format_sse, stream_changes
+from app.request_context import RequestStats, current_request
+
+
+def parse_frame(frame: bytes) -> dict:
+    fields = dict(line.split(": ", 1) for line in frame.decode().strip().split("\n"))
+    return {"id": int(fields["id"]), "event": fields["event"], "data": json_codec.loads(fields["data"])}
+
+
+@pytest.mark.asyncio
+class TestChangeBroadcaster:
+    """Test fan-out and slow-consumer handling."""
+
+    async def test_publish_fans_out(self):
+        """Test that every subscriber receives each event."""
+        broadcaster = ChangeBroadcaster(queue_size=5)
+        first, second = broadcaster.subscribe(), broadcaster.subscribe()
+
+        broadcaster.publish({"id": "RK-2026-00001", "op": "delete"})
+
+        assert {"id": "RK-2026-00001", "op": "delete"} == first.get_nowait()
+        assert {"id": "RK-2026-00001", "op": "delete"} == second.get_nowait()
+        await broadcaster.close()
+
+    async def test_slow_consumer_is_dropped(self):
+        """Test that a full queue drops only that subscriber."""
+        broadcaster = ChangeBroadcaster(queue_size=2)
+        slow, fast = broadcaster.subscribe(), broadcaster.subscribe()
+
+        for i in range(3):
+            broadcaster.publish({"id": str(i), "op": "delete"})
+            fast.get_nowait()
+
+        assert 1 == broadcaster.subscriber_count
+        assert 1 == broadcaster.dropped
+        # The dropped client still sees its buffered events, then the drop marker
+        assert 3 == slow.qsize()
+        await broadcaster.close()
+
+    async def test_notifications_ignored_without_subscribers(self):
+        """Test that no work is queued when nobody is listening."""
+        broadcaster = ChangeBroadcaster()
+        with patch("app.services.application_service.build_change_event") as mock_build:
+            broadcaster.notify({"table": "applications", "op": "UPDATE", "id": "RK-2026-00001"})
+            await asyncio.sleep(0)
+            assert not mock_build.called
+
+    async def test_worker_builds_each_change_once(self):
+        """Test that one notification is shaped once and fanned out."""
+        broadcaster = ChangeBroadcaster()
+        first, second = broadcaster.subscribe(), broadcaster.subscribe()
+        event = {"id": "RK-2026-00001", "op": "update", "changes": {"stage": "review"}}
+
+        with patch("app.events.database.get_pool"), \
+                patch("app.services.application_service.build_change_event",
+                      AsyncMock(return_value=event)) as mock_build:
+            broadcaster.notify({"table": "applications", "op": "UPDATE",
+                                "id": "RK-2026-00001", "columns": ["stage"]})
+            received = await asyncio.wait_for(first.get(), timeout=1)
+
+        assert event == received
+        assert event == second.get_nowait()
+        assert 1 == mock_build.await_count
+        await broadcaster.close()
+
+    async def test_backlog_overflow_becomes_reset(self):
+        """Test that a full backlog is replaced by a single reset."""
+        broadcaster = ChangeBroadcaster(backlog=3)
+        queue = broadcaster.subscribe()
+        broadcaster._worker.cancel()
+
+        for i in range(5):
+            broadcaster.notify({"table": "applications", "op": "INSERT", "id": str(i)})
+
+        assert 1 == broadcaster.overflows
+        assert [database.RESET_CHANGE, {"table": "applications", "op": "INSERT", "id": "4"}] == [
+            broadcaster._changes.get_nowait() for _ in range(2)
+        ]
+        broadcaster.unsubscribe(queue)
+
+    async def test_worker_outside_request_context(self):
+        """Test that the worker does not inherit the first subscriber's request stats."""
+        stats = RequestStats()
+        token = current_request.set(stats)
+        seen = []
+
+        async def build(pool, change):
+            seen.append(current_request.get())
+            return None
+
+        broadcaster = ChangeBroadcaster()
+        try:
+            broadcaster.subscribe()
+        finally:
+            current_request.reset(token)
+        with patch("app.events.database.get_pool"), \
+                patch("app.services.application_service.build_change_event", build):
+            broadcaster.notify({"table": "applications", "op": "DELETE", "id": "RK-2026-00001"})
+            for _ in range(3):
+                await asyncio.sleep(0)
+
+        assert [None] == seen
+        await broadcaster.close()
+
+
+@pytest.mark.asyncio
+class TestStreamChanges:
+    """Test the per-client SSE generator."""
+
+    async def test_stream_frames_and_heartbeat(self):
+        """Test retry hint, heartbeats and change frames."""
+        broadcaster = ChangeBroadcaster()
+        stream = stream_changes(broadcaster, heartbeat=0.01)
+
+        assert b"retry: 3000\n\n" == await stream.__anext__()
+        assert b": ping\n\n" == await stream.__anext__()
+
+        broadcaster.publish({"id": "RK-2026-00001", "op": "delete"})
+        frame = parse_frame(await stream.__anext__())
+        assert {"id": 1, "event": "change", "data": {"id": "RK-2026-00001", "op": "delete"}} == frame
+
+        await stream.aclose()
+        assert 0 == broadcaster.subscriber_count
+        await broadcaster.close()
+
+    async def test_dropped_client_gets_reset_and_ends(self):
+        """Test that a dropped client is told to reload and the stream ends."""
+        broadcaster = ChangeBroadcaster(queue_size=1)
+        stream = stream_changes(broadcaster, heartbeat=5)
+        await stream.__anext__()
+
+        broadcaster.publish({"id": "a", "op": "delete"})
+        broadcaster.publish({"id": "b", "op": "delete"})
+
+        assert {"id": "a", "op": "delete"} == parse_frame(await stream.__anext__())["data"]
+        assert {"op": "reset"} == parse_frame(await stream.__anext__())["data"]
+        with pytest.raises(StopAsyncIteration):
+            await stream.__anext__()
+        await broadcaster.close()
+
+
+def test_format_sse():
+    """Test SSE frame layout."""
+    assert b'id: 7\nevent: change\ndata: {"op":"reset"}\n\n' == format_sse({"op": "reset"}, 7)
@@ -0,0 +1,121 @@
+"""Tests for the liveness and readiness endpoints."""
+
+import asyncio
+import pytest
+from unittest.mock import AsyncMock, MagicMock, patch
+from fastapi.testclient import TestClient
+
+from app import health
+from app.main import app
+
+
+@pytest.fixture(autouse=True)
+def reset_readiness_cache():
+    """Make every test run a fresh probe."""
+    health._cached = None
+    yield
+    health._cached = None
+
+
+@pytest.fixture
+def ready_pool(mock_pool):
+    """mock_pool with the InstrumentedPool getters readiness reports."""
+    mock_pool.get_size.return_value = 4
+    mock_pool.get_idle_size.return_value = 3
+    mock_pool.get_max_size.return_value = 10
+    mock_pool.waiting = 0
+    connection = mock_pool.acquire.return_value.__aenter__.return_value
+    connection.fetchval.return_value = 1
+    with patch("app.database.get_pool", return_value=mock_pool):
+        yield mock_pool
+
+
+class TestLiveness:
+    """Test GET /health/live."""
+
+    def test_live_without_database(self):
+        """Test that liveness never needs the pool."""
+        response = TestClient(app).get("/health/live")
+        assert 200 == response.status_code
+        assert {"status": "ok"} == response.json()
+
+
+class TestReadiness:
+    """Test GET /health/ready."""
+
+    def test_ready(self, ready_pool):
+        """Test a healthy database and pool."""
+        response = TestClient(app).get("/health/ready")
+
+        assert 200 == response.status_code
+        body = response.json()
+        assert "ok" == body["status"]
+        assert body["database"]["ok"]
+        assert {"size": 4, "idle": 3, "maxSize": 10, "inUse": 1, "waiting": 0,
+                "utilisation": 0.1} == {k: body["pool"][k] for k in
+                                        ("size", "idle", "maxSize", "inUse", "waiting", "utilisation")}
+        ready_pool.acquire.assert_called_once_with(timeout=health.READY_TIMEOUT_SECONDS)
+
+    def test_probe_is_cached(self, ready_pool):
+        """Test that repeated checks within the cache window run one query."""
+        client = TestClient(app)
+        client.get("/health/ready")
+        client.get("/health/ready")
+
+        connection = ready_pool.acquire.return_value.__aenter__.return_value
+        assert 1 == connection.fetchval.await_count
+
+    def test_database_timeout(self, ready_pool):
+        """Test that a query timeout makes the worker unready."""
+        connection = ready_pool.acquire.return_value.__aenter__.return_value
+        connection.fetchval.side_effect = asyncio.TimeoutError
+
+        response = TestClient(app).get("/health/ready")
+
+        assert 503 == response.status_code
+        assert "unavailable" == response.json()["status"]
+        assert "SELECT 1 did not return" in response.json()["reasons"][0]
+
+    def test_pool_exhausted(self, ready_pool):
+        """Test that failing to get a connection makes the worker unready."""
+        ready_pool.acquire.return_value.__aenter__.side_effect = asyncio.TimeoutError
+
+        response = TestClient(app).get("/health/ready")
+
+        assert 503 == response.status_code
+        assert "no pooled connection" in response.json()["reasons"][0]
+
+    def test_slow_acquire(self, ready_pool):
+        """Test that acquire waits over the threshold shed load."""
+        with patch.object(health, "READY_MAX_ACQUIRE_WAIT_MS", -1):
+            response = TestClient(app).get("/health/ready")
+
+        assert 503 == response.status_code
+        assert "pool acquire took" in response.json()["reasons"][0]
+
+    def test_pool_not_initialised(self):
+        """Test that readiness fails before the pool exists."""
+        with patch("app.database.get_pool", MagicMock(side_effect=RuntimeError)):
+            response = TestClient(app).get("/health/ready")
+
+        assert 503 == response.status_code
+        assert ["database pool not initialised"] == response.json()["reasons"]
+
+
+@pytest.mark.asyncio
+class TestReadinessConcurrency:
+    """Test that concurrent probes are collapsed."""
+
+    async def test_concurrent_callers_share_probe(self, ready_pool):
+        """Test that simultaneous checks wait for one probe."""
+        connection = ready_pool.acquire.return_value.__aenter__.return_value
+
+        async def slow_select(*args, **kwargs):
+            await asyncio.sleep(0.01)
+            return 1
+
+        connection.fetchval = AsyncMock(side_effect=slow_select)
+        results = await asyncio.gather(*(health.readiness() for _ in range(5)))
+
+        assert 1 == connection.fetchval.await_count
+        assert all(result is results[0] for result in results)
@@ -0,0 +1,180 @@
+"""Tests for the scheduler and the periodic database jobs."""
+
+import asyncio
+from datetime import date
+
+import pytest
+from unittest.mock import AsyncMock, patch
+
+from app import jobs, scheduler as scheduler_module
+from app.scheduler import Scheduler
+
+
+def expiring_row(app_id="RK-2026-00001", person_id=None, key="first_aid", window=30):
+    return {
+        "application_id": app_id,
+        "person_id": person_id,
+        "check_key": key,
+        "expiry_date": date(2026, 4, 1),
+        "window_days": window,
+    }
+
+
+@pytest.mark.asyncio
+class TestScheduler:
+    """Test job bookkeeping and lifecycle."""
+
+    async def test_run_job_records_result(self):
+        """Test that a run records its duration and counts."""
+        sched = Scheduler()
+        sched.add_job("demo", AsyncMock(return_value={"alerts": 3}), 60)
+
+        with patch("app.scheduler.database.get_pool"):
+            assert {"alerts": 3} == await sched.run_job(sched.jobs["demo"])
+
+        status = sched.status()["demo"]
+        assert 1 == status["runs"]
+        assert 3 == status["lastRun"]["alerts"]
+        assert "durationMs" in status["lastRun"]
+
+    async def test_failing_job_is_counted(self):
+        """Test that an exception is logged and counted, not raised."""
+        sched = Scheduler()
+        sched.add_job("boom", AsyncMock(side_effect=RuntimeError("db down")), 60)
+
+        with patch("app.scheduler.database.get_pool"):
+            assert await sched.run_job(sched.jobs["boom"]) is None
+
+        assert 1 == sched.status()["boom"]["failures"]
+        assert 0 == sched.status()["boom"]["runs"]
+
+    async def test_start_and_stop(self, monkeypatch):
+        """Test that jobs run on their interval until stopped."""
+        monkeypatch.setattr(scheduler_module, "INITIAL_DELAY_SECONDS", 0)
+        func = AsyncMock(return_value={})
+        sched = Scheduler()
+        sched.add_job("fast", func, 0.01)
+
+        with patch("app.scheduler.database.get_pool"):
+            sched.start()
+            await asyncio.sleep(0.05)
+            await sched.stop()
+
+        assert func.await_count >= 2
+        calls = func.await_count
+        await asyncio.sleep(0.02)
+        assert calls == func.await_count
+
+
+@pytest.mark.asyncio
+class TestExpiryScan:
+    """Test the certificate expiry scan."""
+
+    async def test_skips_when_locked(self, mock_pool):
+        """Test that only the worker holding the advisory lock scans."""
+        connection = mock_pool.acquire.return_value.__aenter__.return_value
+        connection.fetchval.return_value = False
+
+        assert {"skipped": True} == await jobs.scan_expiring_checks(mock_pool)
+        assert "pg_try_advisory_xact_lock" in connection.fetchval.call_args[0][0]
+        assert not connection.fetch.called
+
+    async def test_writes_alerts_in_batches(self, mock_pool):
+        """Test that each batch is written with executemany until a short batch."""
+        connection = mock_pool.acquire.return_value.__aenter__.return_value
+        connection.fetchval.return_value = True
+        connection.fetch.side_effect = [
+            [expiring_row("RK-2026-00001"), expiring_row("RK-2026-00002", "CP-001", "dbs", 7)],
+            [expiring_row("RK-2026-00003")],
+        ]
+
+        result = await jobs.scan_expiring_checks(mock_pool, [60, 30, 7], batch_size=2)
+
+        assert {"batches": 2, "alerts": 3} == result
+        sql, windows, max_window, limit = connection.fetch.call_args_list[0][0]
+        assert "FROM application_checks c" in sql
+        assert ([60, 30, 7], 60, 2) == (windows, max_window, limit)
+
+        dedupe, timeline = connection.executemany.call_args_list[:2]
+        assert "check_expiry_alerts" in dedupe[0][0]
+        assert ("RK-2026-00002", "CP-001", "dbs", date(2026, 4, 1), 7) == dedupe[0][1][1]
+        assert "'alert'" in timeline[0][0]
+        assert [
+            ("RK-2026-00001", "First aid expires on 2026-04-01 (within 30 days)"),
+            ("RK-2026-00002", "Dbs for connected person CP-001 expires on 2026-04-01 (within 7 days)"),
+        ] == timeline[0][1]
+        assert 4 == connection.executemany.call_count
+
+    async def test_nothing_expiring(self, mock_pool):
+        """Test that an empty scan writes nothing."""
+        connection = mock_pool.acquire.return_value.__aenter__.return_value
+        connection.fetchval.return_value = True
+        connection.fetch.return_value = []
+
+        assert {"batches": 0, "alerts": 0} == await jobs.scan_expiring_checks(mock_pool)
+        assert not connection.executemany.called
+
+
+class TestExpiryWindows:
+    """Test EXPIRY_ALERT_WINDOWS parsing."""
+
+    def test_parse_windows(self):
+        """Test that windows are de-duplicated and sorted."""
+        assert [7, 30, 60] == jobs._parse_windows("60, 7,30,7")
+
+    def test_invalid_windows(self):
+        """Test that empty or negative windows are rejected."""
+        for value in ("", "-1,30"):
+            with pytest.raises(ValueError):
+                jobs._parse_windows(value)
+
+
+@pytest.mark.asyncio
+class TestSlaEscalation:
+    """Test the SLA escalation job."""
+
+    async def test_escalates_in_one_statement(self, mock_pool):
+        """Test that overdue applications are escalated set-based with per-stage SLAs."""
+        connection = mock_pool.acquire.return_value.__aenter__.return_value
+        connection.fetchval.return_value = True
+        connection.fetch.return_value = [
+            {"id": "RK-2026-00001", "stage": "checks", "risk": "medium"},
+            {"id": "RK-2026-00002", "stage": "checks", "risk": "high"},
+            {"id": "RK-2026-00003", "stage": "review", "risk": "medium"},
+        ]
+
+        result = await jobs.escalate_overdue_applications(mock_pool, {"checks": 30, "review": 10})
+
+        assert {"escalated": 3, "byStage": {"checks": 2, "review": 1}} == result
+        assert 1 == connection.fetch.call_count
+        sql, stages, days = connection.fetch.call_args[0]
+        assert ["checks", "review"] == stages
+        assert [30, 10] == days
+        assert "UPDATE applications a" in sql
+        assert "INSERT INTO timeline_events" in sql
+        assert "FOR UPDATE OF a SKIP LOCKED" in sql
+        assert "last_updated =" not in sql
+        # daysInStage > limit, as in the portal, not >= limit
+        assert "make_interval(days => sla.days + 1)" in sql
+
+    async def test_skips_when_locked(self, mock_pool):
+        """Test that another worker holding the lock means no work here."""
+        connection = mock_pool.acquire.return_value.__aenter__.return_value
+        connection.fetchval.return_value = False
+
+        assert {"skipped": True} == await jobs.escalate_overdue_applications(mock_pool, {"new": 14})
+        assert not connection.fetch.called
+
+
+class TestSlaConfig:
+    """Test SLA_DAYS_BY_STAGE parsing."""
+
+    def test_parse_sla(self):
+        """Test stage=days pairs."""
+        assert {"checks": 30, "review": 10} == jobs._parse_sla("checks=30, review=10,")
+
+    def test_invalid_sla(self):
+        """Test that malformed or non-positive values are rejected."""
+        for value in ("checks", "checks=0", "checks=soon", "cheks=14"):
+            with pytest.raises(ValueError):
+                jobs._parse_sla(value)
@@ -0,0 +1,93 @@
+"""Tests for the JSON helpers and the pool's JSONB type codecs."""
+
+import pytest
+from datetime import date, datetime, timezone
+from unittest.mock import AsyncMock
+
+from app import json_codec
+from app.database import _init_connection
+
+
+class TestJsonCodec:
+    """Test JSON encode/decode helpers."""
+
+    def test_round_trip(self):
+        """Test that values survive an encode/decode cycle."""
+        value = {"dbs": {"status": "complete", "date": None}, "registers": ["0-5", "5-7"]}
+        assert value == json_codec.loads(json_codec.dumps(value))
+
+    def test_dumps_is_compact_utf8(self):
+        """Test that output is compact and keeps non-ASCII characters."""
+        assert '{"name":"Zoë","n":[1,2]}'.encode() == json_codec.dumps({"name": "Zoë", "n": [1, 2]})
+
+    def test_jsonb_binary_format(self):
+        """Test the jsonb wire format version prefix."""
+        encoded = json_codec.encode_jsonb({"a": 1})
+        assert b"\x01" == encoded[:1]
+        assert {"a": 1} == json_codec.decode_jsonb(encoded)
+
+    def test_loads_accepts_str(self):
+        """Test that text input is accepted as well as bytes."""
+        assert [1, 2] == json_codec.loads("[1, 2]")
+
+    @pytest.mark.parametrize("use_orjson", [True, False])
+    def test_backends_produce_identical_output(self, monkeypatch, use_orjson):
+        """Test that orjson and stdlib output match, including dates."""
+        monkeypatch.setattr(json_codec, "_use_orjson", use_orjson)
+        value = {
+            "name": "Zoë",
+            "dob": date(1990, 1, 15),
+            "created": datetime(2026, 1, 1, 9, 30, tzinfo=timezone.utc),
+            "checks": {"dbs": {"status": "complete"}},
+        }
+        assert (
+            '{"name":"Zoë","dob":"1990-01-15",'
+            '"created":"2026-01-01T09:30:00+00:00","checks":{"dbs":{"status":"complete"}}}'
+        ).encode() == json_codec.dumps(value)
+
+    def test_stdlib_rejects_unknown_types(self, monkeypatch):
+        """Test that unsupported objects still raise TypeError."""
+        monkeypatch.setattr(json_codec, "_use_orjson", False)
+        with pytest.raises(TypeError):
+            json_codec.dumps({"x": object()})
+
+
+class TestSelectBackend:
+    """Test JSON_ENCODER selection."""
+
+    def test_auto_prefers_orjson(self):
+        """Test that auto picks orjson when it is installed."""
+        assert "orjson" == json_codec.select_backend("auto")
+
+    def test_force_stdlib(self):
+        """Test that json forces the standard library."""
+        assert "json" == json_codec.select_backend("JSON")
+
+    def test_orjson_missing_falls_back(self, monkeypatch):
+        """Test that requesting orjson without it installed falls back to json."""
+        monkeypatch.setattr(json_codec, "orjson", None)
+        assert "json" == json_codec.select_backend("orjson")
+
+    def test_invalid_encoder(self):
+        """Test that unknown encoder names are rejected."""
+        with pytest.raises(ValueError):
+            json_codec.select_backend("ujson")
+
+
+@pytest.mark.asyncio
+class TestInitConnection:
+    """Test per-connection codec registration."""
+
+    async def test_registers_json_and_jsonb_codecs(self):
+        """Test that json and jsonb get binary codecs on every new connection."""
+        conn = AsyncMock()
+
+        await _init_connection(conn)
+
+        registered = {c.args[0]: c.kwargs for c in conn.set_type_codec.call_args_list}
+        assert {"json", "jsonb"} == set(registered)
+        assert json_codec.encode_jsonb is registered["jsonb"]["encoder"]
+        assert json_codec.decode_jsonb is registered["jsonb"]["decoder"]
+        for kwargs in registered.values():
+            assert "pg_catalog" == kwargs["schema"]
+            assert "binary" == kwargs["format"]
@@ -0,0 +1,118 @@
+"""Tests for the Prometheus metrics registry, middleware and pool instrumentation."""
+
+import pytest
+from unittest.mock import AsyncMock, MagicMock, patch
+from fastapi.testclient import TestClient
+
+from app import database, metrics
+from app.main import app
+
+
+class TestHistogram:
+    """Test Histogram and Counter rendering."""
+
+    def test_histogram_buckets_are_cumulative(self):
+        """Test that bucket counts accumulate and +Inf equals the count."""
+        histogram = metrics.Histogram("test_seconds", "Test.", ("route",), buckets=(0.1, 1.0))
+        metrics._registry.remove(histogram)
+        for value in (0.05, 0.1, 0.5, 3.0):
+            histogram.observe(value, "/a")
+
+        lines = histogram.render()
+        assert 'test_seconds_bucket{route="/a",le="0.1"} 2' in lines
+        assert 'test_seconds_bucket{route="/a",le="1.0"} 3' in lines
+        assert 'test_seconds_bucket{route="/a",le="+Inf"} 4' in lines
+        assert 'test_seconds_sum{route="/a"} 3.65' in lines
+        assert 'test_seconds_count{route="/a"} 4' in lines
+
+    def test_counter_escapes_labels(self):
+        """Test that quotes and backslashes in label values are escaped."""
+        counter = metrics.Counter("test_total", "Test.", ("path",))
+        metrics._registry.remove(counter)
+        counter.inc('a"b\\c')
+        counter.inc('a"b\\c', amount=2)
+
+        assert 'test_total{path="a\\"b\\\\c"} 3' == counter.render()[-1]
+
+
+@pytest.mark.asyncio
+class TestInstrumentedPool:
+    """Test the pool and connection proxies in app.database."""
+
+    def _pool(self):
+        conn = MagicMock()
+        conn.fetch = AsyncMock(return_value=[])
+        raw = MagicMock()
+        raw.acquire = AsyncMock(return_value=conn)
+        raw.release = AsyncMock()
+        return database.InstrumentedPool(raw), raw, conn
+
+    async def test_queries_labelled_by_service_function(self):
+        """Test that queries count towards the instrumented function that made them."""
+        pool, raw, conn = self._pool()
+
+        @metrics.instrumented
+        async def list_things(pool):
+            async with pool.acquire() as c:
+                await c.fetch("SELECT 1")
+                await c.fetch("SELECT 2")
+
+        before = metrics.DB_QUERIES.values.get(("list_things",), 0)
+        await list_things(pool)
+
+        assert before + 2 == metrics.DB_QUERIES.values[("list_things",)]
+        assert ("list_things",) in metrics.SERVICE_DURATION.series
+        assert "other" == metrics.current_function.get()
+        raw.release.assert_awaited_once_with(conn)
+
+    async def test_waiting_counts_pending_acquires(self):
+        """Test that waiting is raised only while acquire is blocked."""
+        pool, raw, conn = self._pool()
+        seen = []
+
+        async def acquire(timeout=None):
+            seen.append(pool.waiting)
+            return conn
+
+        raw.acquire = acquire
+        async with pool.acquire():
+            pass
+
+        assert [1] == seen
+        assert 0 == pool.waiting
+
+    async def test_passes_through_other_attributes(self):
+        """Test that transaction() and pool getters reach asyncpg directly."""
+        pool, raw, conn = self._pool()
+        raw.get_size.return_value = 4
+
+        async with pool.acquire() as c:
+            assert conn.transaction is c.transaction
+        assert 4 == pool.get_size()
+
+
+class TestMetricsEndpoint:
+    """Test GET /metrics and the metrics middleware."""
+
+    def test_requests_labelled_by_route_template(self):
+        """Test that ids in the path do not become label values."""
+        client = TestClient(app)
+        with patch("app.routes.applications.get_pool"), \
+                patch("app.services.application_service.get_application") as mock_get:
+            mock_get.return_value = None
+            client.get("/api/applications/RK-2026-00042")
+        client.get("/no-such-page")
+
+        response = client.get("/metrics")
+        assert 200 == response.status_code
+        assert response.headers["content-type"].startswith("text/plain; version=0.0.4")
+        body = response.text
+        assert 'http_requests_total{method="GET",route="/api/applications/{app_id}",status="404"}' in body
+        assert 'route="unmatched",status="404"' in body
+        assert "RK-2026-00042" not in body
+        assert "# TYPE http_request_duration_seconds histogram" in body
+
+    def test_pool_gauges_skipped_without_pool(self):
+        """Test that pool gauges are omitted until the pool exists."""
+        with patch.object(database, "_pool", None):
+            assert "db_pool_size" not in metrics.render()
@@ -0,0 +1,148 @@
+"""Tests for the SQL statement registry and connection warm-up."""
+
+import re
+from pathlib import Path
+
+import pytest
+from unittest.mock import AsyncMock, MagicMock, patch
+from fastapi.testclient import TestClient
+
+import asyncpg
+
+from app import database, queries
+from app.main import app
+
+
+@pytest.fixture(autouse=True)
+def reset_stats():
+    """Give every test zeroed statement counters."""
+    saved = {name: list(values) for name, values in queries._stats.items()}
+    for values in queries._stats.values():
+        values[:] = [0, 0.0, 0.0]
+    yield
+    queries._stats.update(saved)
+
+
+class TestStatementStats:
+    """Test record() and stats()."""
+
+    def test_record_registered_statement(self):
+        """Test that executions of registered SQL are counted by name."""
+        queries.record(queries.GET_APPLICATION, 0.002)
+        queries.record(queries.GET_APPLICATION, 0.004)
+
+        stats = queries.stats()["get_application"]
+        assert {"calls": 2, "totalMs": 6.0, "meanMs": 3.0, "maxMs": 4.0, "prepared": True} == stats
+        assert "get_application" == next(iter(queries.stats()))
+
+    def test_unregistered_sql_ignored(self):
+        """Test that dynamic statements and COPY table names are not tracked."""
+        queries.record("SELECT 1", 0.001)
+        queries.record("applications", 0.001)
+        assert all(entry["calls"] == 0 for entry in queries.stats().values())
+
+    def test_if_match_variants(self):
+        """Test that If-Match variants add the version condition with the next parameter."""
+        assert "{condition}" not in queries.UPDATE_CHECK
+        assert queries.UPDATE_CHECK_IF_MATCH.count("AND version = ANY($4::int[])") == 1
+        assert "AND version = ANY($5::int[])" in queries.UPDATE_PERSON_CHECK_IF_MATCH
+        assert "'{}'::jsonb" in queries.UPDATE_PERSON_CHECK
+
+    def test_read_columns_cover_schema(self):
+        """Test that full reads select every applications column except search_vector."""
+        schema = (Path(__file__).resolve().parent.parent / "db" / "schema.sql").read_text()
+        table = schema[schema.index("CREATE TABLE IF NOT EXISTS applications ("):]
+        table = table[:table.index(");")]
+        columns = set(re.findall(r"^    ([a-z_]+)\s", table, re.MULTILINE))
+        columns |= set(re.findall(r"ALTER TABLE applications ADD COLUMN IF NOT EXISTS (\w+)", schema))
+
+        assert columns - {"search_vector"} == set(queries.APPLICATION_READ_COLUMNS.split(", "))
+        assert "SELECT *" not in queries.GET_APPLICATION + queries.EXPORT_APPLICATIONS
+
+    def test_duplicate_name_rejected(self):
+        """Test that statement names are unique."""
+        with pytest.raises(ValueError):
+            queries.statement("get_application", "SELECT 2")
+
+    def test_stats_endpoint(self):
+        """Test GET /api/stats/queries."""
+        queries.record(queries.PIPELINE_STATS, 0.01)
+        response = TestClient(app).get("/api/stats/queries")
+        assert 200 == response.status_code
+        assert 1 == response.json()["pipeline_stats"]["calls"]
+
+
+class TestCachedPrepareSupport:
+    """Test the check that guards the use of asyncpg's private _prepare()."""
+
+    def test_installed_asyncpg_supported(self):
+        """Test that the pinned asyncpg still offers a cache-aware _prepare()."""
+        assert queries._supports_cached_prepare(asyncpg.Connection)
+        assert queries.CACHED_PREPARE
+
+    def test_missing_or_changed_prepare(self):
+        """Test that a removed method or a changed signature disables warm-up."""
+        class Removed:
+            pass
+
+        class Changed:
+            async def _prepare(self, query, *, timeout=None):
+                pass
+
+        assert not queries._supports_cached_prepare(Removed)
+        assert not queries._supports_cached_prepare(Changed)
+
+
+@pytest.mark.asyncio
+class TestPrepareHot:
+    """Test statement warm-up on new pooled connections."""
+
+    async def test_prepares_hot_statements_into_cache(self):
+        """Test that each hot statement is prepared through the statement cache."""
+        conn = MagicMock()
+        conn._prepare = AsyncMock()
+
+        await queries.prepare_hot(conn)
+
+        prepared = [c.args[0] for c in conn._prepare.await_args_list]
+        assert queries.GET_APPLICATION in prepared
+        assert queries.FUNNEL_DURATIONS not in prepared
+        assert all(c.kwargs == {"use_cache": True} for c in conn._prepare.await_args_list)
+
+    async def test_skips_missing_tables(self):
+        """Test that a first deploy without the schema still connects."""
+        conn = MagicMock()
+        conn._prepare = AsyncMock(side_effect=asyncpg.UndefinedTableError("missing"))
+
+        await queries.prepare_hot(conn)
+
+        assert len(queries._hot) == conn._prepare.await_count
+
+    async def test_falls_back_to_lazy_prepare(self):
+        """Test that nothing is prepared when asyncpg's _prepare() is unusable."""
+        conn = MagicMock()
+        conn._prepare = AsyncMock()
+
+        with patch.object(queries, "CACHED_PREPARE", False):
+            await queries.prepare_hot(conn)
+
+        conn._prepare.assert_not_awaited()
+
+    async def test_init_connection_skips_under_pgbouncer(self):
+        """Test that PgBouncer mode does not prepare anything."""
+        conn = MagicMock()
+        conn.set_type_codec = AsyncMock()
+        with patch.object(database, "DB_PGBOUNCER", True), \
+                patch("app.queries.prepare_hot", AsyncMock()) as mock_prepare:
+            await database._init_connection(conn)
+        mock_prepare.assert_not_awaited()
+
+    async def test_connection_proxy_records_statements(self):
+        """Test that queries through the pool proxy reach the registry."""
+        conn = MagicMock()
+        conn.fetchrow = AsyncMock(return_value=None)
+        proxy = database.InstrumentedConnection(conn)
+
+        await proxy.fetchrow(queries.GET_VERSION, "RK-2026-00001")
+
+        assert 1 == queries.stats()["get_version"]["calls"]
@@ -0,0 +1,112 @@
+"""Tests for per-request query accounting and Server-Timing headers."""
+
+import json
+import logging
+import pytest
+from unittest.mock import AsyncMock, MagicMock, patch
+from fastapi.testclient import TestClient
+
+from app import database, request_context
+from app.main import app
+from app.request_context import RequestStats, current_request
+from app.services.application_service import get_all_applications
+
+
+@pytest.fixture
+def stats():
+    """Run the test body inside a request context."""
+    stats = RequestStats()
+    token = current_request.set(stats)
+    yield stats
+    current_request.reset(token)
+
+
+@pytest.mark.asyncio
+class TestRequestStats:
+    """Test what the connection proxy and service layer add to the request."""
+
+    async def test_connection_counts_queries_and_rows(self, stats):
+        """Test that each query adds its rows and duration."""
+        conn = MagicMock()
+        conn.fetch = AsyncMock(return_value=[{"id": 1}, {"id": 2}])
+        conn.fetchrow = AsyncMock(return_value={"id": 1})
+        conn.fetchval = AsyncMock(return_value=None)
+        conn.execute = AsyncMock(return_value="UPDATE 1")
+        proxy = database.InstrumentedConnection(conn)
+
+        await proxy.fetch("SELECT 1")
+        await proxy.fetchrow("SELECT 2")
+        await proxy.fetchval("SELECT 3")
+        await proxy.execute("UPDATE 4")
+
+        assert 4 == stats.queries
+        assert 3 == stats.rows
+        assert stats.db > 0
+
+    async def test_transform_phase(self, stats, mock_pool):
+        """Test that shaping the list into dashboard dicts is timed as transform."""
+        connection = mock_pool.acquire.return_value.__aenter__.return_value
+        connection.fetch.side_effect = [
+            [{"id": "RK-2026-00001", "first_name": "Jane", "last_name": "Smith"}],
+            [],
+        ]
+
+        await get_all_applications(mock_pool)
+
+        assert stats.transform > 0
+        assert 0 == stats.serialize
+
+    async def test_no_context_outside_requests(self):
+        """Test that queries outside a request are not accounted anywhere."""
+        request_context.record_query(0.01, 5)
+        with request_context.phase("transform"):
+            pass
+        assert current_request.get() is None
+
+
+class TestRequestContextMiddleware:
+    """Test the Server-Timing header and slow-request log."""
+
+    def test_server_timing_header(self):
+        """Test that every response carries the breakdown."""
+        response = TestClient(app).get("/health")
+
+        timing = response.headers["Server-Timing"]
+        assert timing.startswith('db;dur=0.0;desc="0 queries, 0 rows", transform;dur=')
+        assert "serialize;dur=" in timing
+
+    def test_slow_request_logged(self, caplog):
+        """Test that requests over SLOW_REQUEST_MS log a JSON breakdown."""
+        with patch.object(request_context, "SLOW_REQUEST_MS", 0.000001), \
+                caplog.at_level(logging.WARNING, logger="app.request_context"):
+            TestClient(app).get("/health")
+
+        message = caplog.records[-1].getMessage()
+        assert message.startswith("Slow request: ")
+        entry = json.loads(message.removeprefix("Slow request: "))
+        assert {"method": "GET", "path": "/health", "route": "/health", "status": 200,
+                "queries": 0, "rows": 0} == {k: entry[k] for k in
+                                             ("method", "path", "route", "status", "queries", "rows")}
+
+    @pytest.mark.asyncio
+    async def test_streaming_body_not_counted(self, caplog):
+        """Test that time spent streaming after the headers does not make a request slow."""
+        import asyncio
+
+        async def streaming_app(scope, receive, send):
+            await send({"type": "http.response.start", "status": 200, "headers": []})
+            await asyncio.sleep(0.05)
+            await send({"type": "http.response.body", "body": b"data: 1\n\n"})
+
+        middleware = request_context.RequestContextMiddleware(streaming_app)
+        scope = {"type": "http", "method": "GET", "path": "/api/applications/stream", "headers": []}
+        with patch.object(request_context, "SLOW_REQUEST_MS", 20), \
+                caplog.at_level(logging.WARNING, logger="app.request_context"):
+            await middleware(scope, AsyncMock(), AsyncMock())
+        assert not caplog.records
+
+    def test_fast_request_not_logged(self, caplog):
+        """Test that requests under the threshold are not logged."""
+        with caplog.at_level(logging.WARNING, logger="app.request_context"):
+            TestClient(app).get("/health")
+        assert not caplog.records
@@ -2,14 +2,30 @@
 
 import pytest
 from unittest.mock import AsyncMock, MagicMock
-from datetime import datetime, date
+from datetime import datetime, date, timezone
 from app.services.application_service import (
+    SUMMARY_FIELDS,
     create_application,
+    decode_cursor,
+    encode_cursor,
     get_all_applications,
+    get_applications_page,
     get_application,
+    get_changes_since,
     update_application,
     delete_application,
     add_timeline_event,
+    application_values,
+    bulk_create_applications,
+    iter_applications,
+    update_check,
+    update_connected_person_check,
+    find_checks,
+    get_pipeline_stats,
+    get_funnel_stats,
+    funnel_cache,
+    search_applications,
+    decode_search_cursor,
 )
 
 
@@ -42,7 +58,10 @@ class TestCreateApplicationDB:
 
         # Verify database calls
         assert connection.fetchrow.called
-        assert connection.execute.call_count == 3  # INSERT application + 2 timeline events
+        # INSERT application + 2 timeline events + application_checks sync
+        assert connection.execute.call_count == 4
+        assert "sync_application_checks" in connection.execute.call_args[0][0]
+        assert [result] == connection.execute.call_args[0][1]
 
     async def test_create_application_db_generates_checks(self, mock_pool):
         """Test that create_application generates checks correctly."""
@@ -66,6 +85,10 @@ class TestCreateApplicationDB:
 
         # Verify execute was called with application data
         assert connection.execute.called
+        insert_args = connection.execute.call_args_list[0][0]
+        checks = insert_args[20]
+        assert "complete" == checks["first_aid"]["status"]
+        assert "2024-01-15" == checks["first_aid"]["date"]
 
     async def test_create_application_db_escapes_html(self, mock_pool):
         """Test that create_application escapes HTML in names."""
@@ -121,9 +144,9 @@ class TestGetAllApplicationsDB:
             "premises_type": "domestic",
             "premises_address": "123 Main St",
             "local_authority": "London",
-            "registers": "[]",
-            "checks": "{}",
-            "connected_persons": "[]",
+            "registers": [],
+            "checks": {},
+            "connected_persons": [],
             "ni_number": None,
             "registration_number": None,
             "ofsted_check": None,
@@ -134,6 +157,7 @@ class TestGetAllApplicationsDB:
 
         # Mock timeline events
         timeline_row = {
+            "application_id": "RK-2026-00001",
             "event": "Application started",
             "type": "action",
             "created_at": datetime.now(),
@@ -149,6 +173,297 @@ class TestGetAllApplicationsDB:
         assert 1 == len(result)
         assert "RK-2026-00001" == result[0]["id"]
         assert "John Doe" == result[0]["name"]
+        assert ["Application started"] == [t["event"] for t in result[0]["timeline"]]
+
+    async def test_get_all_applications_batches_timeline_queries(self, mock_pool):
+        """Test that timelines for every row are fetched in a single query."""
+        connection = mock_pool.acquire.return_value.__aenter__.return_value
+
+        app_rows = [
+            {"id": f"RK-2026-0000{i}", "name": f"Applicant {i}", "last_updated": datetime.now()}
+            for i in range(1, 4)
+        ]
+        timeline_rows = [
+            {"application_id": "RK-2026-00001", "event": "Started", "type": "action",
+             "created_at": datetime(2026, 1, 1, 9, 0)},
+            {"application_id": "RK-2026-00003", "event": "Started", "type": "action",
+             "created_at": datetime(2026, 1, 2, 9, 0)},
+            {"application_id": "RK-2026-00001", "event": "Submitted", "type": "complete",
+             "created_at": datetime(2026, 1, 3, 9, 0)},
+        ]
+        connection.fetch.side_effect = [app_rows, timeline_rows]
+
+        result = await get_all_applications(mock_pool)
+
+        # One query for the rows, one for all of their timelines
+        assert 2 == connection.fetch.call_count
+        timeline_args = connection.fetch.call_args_list[1][0]
+        assert ["RK-2026-00001", "RK-2026-00002", "RK-2026-00003"] == timeline_args[1]
+
+        assert ["Submitted", "Started"] == [t["event"] for t in result[0]["timeline"]]
+        assert [] == result[1]["timeline"]
+        assert ["Started"] == [t["event"] for t in result[2]["timeline"]]
+
+    async def test_get_all_applications_empty_skips_timeline_query(self, mock_pool):
+        """Test that no timeline query is issued when there are no rows."""
+        connection = mock_pool.acquire.return_value.__aenter__.return_value
+        connection.fetch.return_value = []
+
+        await get_all_applications(mock_pool)
+
+        assert 1 == connection.fetch.call_count
+
+
+@pytest.mark.asyncio
+class TestGetApplicationsPageDB:
+    """Test keyset pagination in get_applications_page."""
+
+    @staticmethod
+    def _rows(count):
+        return [
+            {
+                "id": f"RK-2026-{i:05d}",
+                "name": f"Applicant {i}",
+                "created_at": datetime(2026, 1, 31 - i, 12, 0),
+                "last_updated": datetime.now(),
+            }
+            for i in range(1, count + 1)
+        ]
+
+    async def test_page_returns_next_cursor_when_more_rows(self, mock_pool):
+        """Test that fetching limit + 1 rows yields a cursor for the last item."""
+        connection = mock_pool.acquire.return_value.__aenter__.return_value
+        rows = self._rows(3)
+        connection.fetch.side_effect = [rows, []]
+
+        items, next_cursor = await get_applications_page(mock_pool, 2)
+
+        assert ["RK-2026-00001", "RK-2026-00002"] == [a["id"] for a in items]
+        assert (rows[1]["created_at"], "RK-2026-00002") == decode_cursor(next_cursor)
+
+        sql, *args = connection.fetch.call_args_list[0][0]
+        assert "ORDER BY created_at DESC, id DESC" in sql
+        assert [3] == args
+
+    async def test_last_page_has_no_cursor(self, mock_pool):
+        """Test that the final page returns no cursor."""
+        connection = mock_pool.acquire.return_value.__aenter__.return_value
+        connection.fetch.side_effect = [self._rows(1), []]
+
+        items, next_cursor = await get_applications_page(mock_pool, 2)
+
+        assert 1 == len(items)
+        assert next_cursor is None
+
+    async def test_page_applies_filters_and_cursor(self, mock_pool):
+        """Test that filters and the keyset predicate are parameterised."""
+        connection = mock_pool.acquire.return_value.__aenter__.return_value
+        connection.fetch.return_value = []
+        after = (datetime(2026, 1, 10, 9, 0), "RK-2026-00010")
+
+        await get_applications_page(
+            mock_pool, 10, after, {"stage": "checks", "local_authority": "Leeds", "risk": None},
+        )
+
+        sql, *args = connection.fetch.call_args[0]
+        assert "stage = $1" in sql
+        assert "local_authority = $2" in sql
+        assert "(created_at, id) < ($3, $4)" in sql
+        assert "risk =" not in sql
+        assert "search_vector" not in sql
+        assert ["checks", "Leeds", after[0], after[1], 11] == args
+
+
+@pytest.mark.asyncio
+class TestSummaryProjectionDB:
+    """Test the slim list projection."""
+
+    async def test_summary_selects_only_needed_columns(self, mock_pool):
+        """Test that a projection avoids SELECT * and the timeline query."""
+        from app.services.application_service import SUMMARY_FIELDS
+
+        connection = mock_pool.acquire.return_value.__aenter__.return_value
+        connection.fetch.return_value = [{
+            "id": "RK-2026-00001",
+            "created_at": datetime(2026, 1, 1),
+            "name": "John Doe",
+            "stage": "checks",
+            "risk": None,
+            "progress": 40,
+            "last_updated": datetime.now(),
+            "local_authority": "Leeds",
+        }]
+
+        result = await get_all_applications(mock_pool, None, SUMMARY_FIELDS)
+
+        sql = connection.fetch.call_args[0][0]
+        assert sql.startswith(
+            "SELECT id, created_at, name, stage, risk, progress, last_updated, local_authority FROM"
+        )
+        assert 1 == connection.fetch.call_count
+        assert [{
+            "id": "RK-2026-00001",
+            "name": "John Doe",
+            "stage": "checks",
+            "risk": "low",
+            "progress": 40,
+            "daysInStage": 0,
+            "localAuthority": "Leeds",
+        }] == result
+
+
+@pytest.mark.asyncio
+class TestBulkCreateApplicationsDB:
+    """Test bulk_create_applications COPY path."""
+
+    async def test_bulk_create_reserves_ids_and_copies(self, mock_pool):
+        """Test one sequence call, then COPY into both tables."""
+        from app.services.application_service import APPLICATION_COLUMNS
+
+        connection = mock_pool.acquire.return_value.__aenter__.return_value
+        connection.fetch.return_value = [{"val": 200}, {"val": 201}]
+        bodies = [
+            {"personal": {"firstName": "John", "lastName": "Doe", "email": "john@example.com",
+                          "dob": "1990-01-15"}},
+            {"personal": {"firstName": "<b>Jane</b>", "lastName": "Roe", "email": "jane@example.com"}},
+        ]
+
+        app_ids = await bulk_create_applications(
+            mock_pool, [application_values(body) for body in bodies],
+        )
+
+        year = datetime.now().year
+        assert [f"RK-{year}-00200", f"RK-{year}-00201"] == app_ids
+        assert "generate_series(1, $1)" in connection.fetch.call_args[0][0]
+        assert 2 == connection.fetch.call_args[0][1]
+
+        apps_call, timeline_call = connection.copy_records_to_table.call_args_list
+        assert "applications" == apps_call[0][0]
+        assert APPLICATION_COLUMNS == apps_call[1]["columns"]
+        assert "name" not in APPLICATION_COLUMNS
+        records = [dict(zip(APPLICATION_COLUMNS, r)) for r in apps_call[1]["records"]]
+        assert date(1990, 1, 15) == records[0]["dob"]
+        assert "&lt;b&gt;Jane&lt;/b&gt;" == records[1]["first_name"]
+
+        assert "timeline_events" == timeline_call[0][0]
+        assert 4 == len(timeline_call[1]["records"])
+        sync_sql, sync_ids = connection.execute.call_args[0]
+        assert "sync_application_checks" in sync_sql
+        assert app_ids == sync_ids
+        assert connection.transaction.called
+
+    async def test_bulk_create_empty(self, mock_pool):
+        """Test that an empty batch does not touch the database."""
+        assert [] == await bulk_create_applications(mock_pool, [])
+        assert not mock_pool.acquire.called
+
+
+class _AsyncRows:
+    """Stand-in for an asyncpg cursor: an async iterator over fixed rows."""
+
+    def __init__(self, rows):
+        self._rows = iter(rows)
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        try:
+            return next(self._rows)
+        except StopIteration:
+            raise StopAsyncIteration
+
+
+@pytest.mark.asyncio
+class TestIterApplicationsDB:
+    """Test the streaming export query."""
+
+    async def test_iter_applications_uses_cursor_in_transaction(self, mock_pool):
+        """Test rows are read through a server-side cursor and shaped without timeline."""
+        connection = mock_pool.acquire.return_value.__aenter__.return_value
+        connection.cursor = MagicMock(return_value=_AsyncRows([
+            {"id": "RK-2026-00001", "name": "John Doe", "checks": {"dbs": {"status": "complete"}}},
+            {"id": "RK-2026-00002", "name": "Jane Roe"},
+        ]))
+
+        apps = [app async for app in iter_applications(mock_pool)]
+
+        assert ["RK-2026-00001", "RK-2026-00002"] == [a["id"] for a in apps]
+        assert "timeline" not in apps[0]
+        assert "complete" == apps[0]["checks"]["dbs"]["status"]
+        assert connection.transaction.called
+        sql = connection.cursor.call_args[0][0]
+        assert "ORDER BY created_at, id" in sql
+        assert "prefetch" in connection.cursor.call_args[1]
+
+
+@pytest.mark.asyncio
+class TestGetChangesSinceDB:
+    """Test delta sync for ?since=."""
+
+    async def test_changes_since(self, mock_pool):
+        """Test changed rows, tombstones and the next watermark."""
+        connection = mock_pool.acquire.return_value.__aenter__.return_value
+        connection.fetchval.return_value = datetime(2026, 3, 1, 12, 0, 30, tzinfo=timezone.utc)
+        connection.fetch.side_effect = [
+            [{
+                "id": "RK-2026-00003",
+                "created_at": datetime(2026, 1, 1),
+                "name": "Jane Roe",
+                "stage": "review",
+                "risk": "medium",
+                "progress": 80,
+                "last_updated": datetime.now(),
+                "local_authority": "Leeds",
+            }],
+            [{"id": "RK-2026-00001"}, {"id": "RK-2026-00002"}],
+        ]
+        since = datetime(2026, 3, 1, 12, 0, 0, tzinfo=timezone.utc)
+
+        result = await get_changes_since(mock_pool, since, SUMMARY_FIELDS)
+
+        assert ["RK-2026-00003"] == [a["id"] for a in result["items"]]
+        assert ["RK-2026-00001", "RK-2026-00002"] == result["deleted"]
+        assert "2026-03-01T12:00:30Z" == result["watermark"]
+
+        sql, *args = connection.fetch.call_args_list[0][0]
+        assert "last_updated > $1" in sql
+        assert "FROM timeline_events WHERE created_at > $1" in sql
+        # The lower bound is pulled back by the overlap window.
+        assert [datetime(2026, 3, 1, 11, 59, 55, tzinfo=timezone.utc)] == args
+        deleted_sql = connection.fetch.call_args_list[1][0][0]
+        assert "FROM deleted_applications" in deleted_sql
+
+    async def test_no_changes(self, mock_pool):
+        """Test that an idle period returns empty lists."""
+        connection = mock_pool.acquire.return_value.__aenter__.return_value
+        connection.fetchval.return_value = datetime(2026, 3, 1, 12, 0, tzinfo=timezone.utc)
+        connection.fetch.side_effect = [[], []]
+
+        result = await get_changes_since(mock_pool, datetime(2026, 3, 1, tzinfo=timezone.utc))
+
+        assert {"items": [], "deleted": [], "watermark": "2026-03-01T12:00:00Z"} == result
+
+
+class TestCursorEncoding:
+    """Test opaque cursor encoding."""
+
+    def test_cursor_round_trip(self):
+        """Test that a cursor decodes back to the same key."""
+        created = datetime(2026, 2, 1, 8, 15, 30, 123456)
+        assert (created, "RK-2026-00042") == decode_cursor(encode_cursor(created, "RK-2026-00042"))
+
+    def test_cursor_is_url_safe(self):
+        """Test that cursors need no URL escaping."""
+        cursor = encode_cursor(datetime(2026, 2, 1), "RK-2026-00042")
+        assert "=" not in cursor
+        assert "+" not in cursor and "/" not in cursor
+
+    def test_decode_invalid_cursor(self):
+        """Test that garbage cursors raise ValueError."""
+        for bad in ("", "not-a-cursor", "e30"):
+            with pytest.raises(ValueError):
+                decode_cursor(bad)
 
 
 @pytest.mark.asyncio
@@ -183,9 +498,9 @@ class TestGetApplicationDB:
             "premises_type": "domestic",
             "premises_address": "123 Main St",
             "local_authority": "London",
-            "registers": "[]",
-            "checks": "{}",
-            "connected_persons": "[]",
+            "registers": [],
+            "checks": {},
+            "connected_persons": [],
             "ni_number": None,
             "registration_number": None,
             "ofsted_check": None,
@@ -228,6 +543,15 @@ class TestUpdateApplicationDB:
 
         assert result is False
 
+    async def test_update_scalar_fields_skip_check_sync(self, mock_pool):
+        """Test that updates not touching checks leave application_checks alone."""
+        connection = mock_pool.acquire.return_value.__aenter__.return_value
+        connection.execute.return_value = "UPDATE 1"
+
+        await update_application(mock_pool, "RK-2026-00001", {"stage": "review"})
+
+        assert 1 == connection.execute.call_count
+
     async def test_update_application_no_valid_fields(self, mock_pool):
         """Test updating application with no valid fields."""
         updates = {"invalid_field": "value"}
@@ -262,6 +586,361 @@ class TestUpdateApplicationDB:
         result = await update_application(mock_pool, "RK-2026-00001", updates)
 
         assert result is True
+        # JSONB values are passed through as Python objects for the pool codec
+        assert updates["checks"] == connection.execute.call_args_list[0][0][1]
+        # Writing the checks document re-syncs the normalised rows in the same transaction
+        assert "sync_application_checks" in connection.execute.call_args[0][0]
+        assert connection.transaction.called
+
+
+@pytest.mark.asyncio
+class TestVersionPreconditionDB:
+    """Test If-Match version checks in the write path."""
+
+    async def test_update_bumps_version(self, mock_pool):
+        """Test that every update increments the version."""
+        connection = mock_pool.acquire.return_value.__aenter__.return_value
+        connection.execute.return_value = "UPDATE 1"
+
+        await update_application(mock_pool, "RK-2026-00001", {"risk": "high"})
+
+        sql = connection.execute.call_args[0][0]
+        assert "version = version + 1" in sql
+        assert "ANY(" not in sql
+
+    async def test_update_checks_version_in_where(self, mock_pool):
+        """Test that the expected version is part of the UPDATE itself."""
+        connection = mock_pool.acquire.return_value.__aenter__.return_value
+        connection.execute.return_value = "UPDATE 1"
+
+        assert await update_application(mock_pool, "RK-2026-00001", {"risk": "high"}, [3]) is True
+
+        sql, *args = connection.execute.call_args[0]
+        assert "WHERE id = $2 AND version = ANY($3::int[])" in sql
+        assert ["high", "RK-2026-00001", [3]] == args
+        assert not connection.fetchval.called
+
+    async def test_update_version_conflict(self, mock_pool):
+        """Test that a mismatch on an existing row raises VersionConflict."""
+        from app.services.application_service import VersionConflict
+
+        connection = mock_pool.acquire.return_value.__aenter__.return_value
+        connection.execute.return_value = "UPDATE 0"
+        connection.fetchval.return_value = 5
+
+        with pytest.raises(VersionConflict) as exc_info:
+            await update_application(mock_pool, "RK-2026-00001", {"risk": "high"}, [3])
+        assert 5 == exc_info.value.current_version
+
+    async def test_update_missing_row_with_if_match(self, mock_pool):
+        """Test that a missing row is still reported as not found."""
+        connection = mock_pool.acquire.return_value.__aenter__.return_value
+        connection.execute.return_value = "UPDATE 0"
+        connection.fetchval.return_value = None
+
+        assert await update_application(mock_pool, "RK-2026-99999", {"risk": "high"}, [3]) is False
+
+    async def test_delete_version_conflict(self, mock_pool):
+        """Test that DELETE checks the version in its WHERE clause."""
+        from app.services.application_service import VersionConflict
+
+        connection = mock_pool.acquire.return_value.__aenter__.return_value
+        connection.execute.return_value = "DELETE 0"
+        connection.fetchval.return_value = 2
+
+        with pytest.raises(VersionConflict):
+            await delete_application(mock_pool, "RK-2026-00001", [1])
+        assert "AND version = ANY($2::int[])" in connection.execute.call_args[0][0]
+
+    async def test_timeline_event_bumps_version(self, mock_pool):
+        """Test that adding a timeline entry bumps the version in the same statement."""
+        connection = mock_pool.acquire.return_value.__aenter__.return_value
+        connection.fetchrow.return_value = {
+            "event": "Note", "type": "action", "created_at": None, "version": 3,
+        }
+
+        entry = await add_timeline_event(mock_pool, "RK-2026-00001", "Note")
+
+        sql = connection.fetchrow.call_args[0][0]
+        assert "UPDATE applications SET version = version + 1" in sql
+        assert "INSERT INTO timeline_events" in sql
+        assert "RETURNING *" not in sql
+        assert 3 == entry["version"]
+
+    async def test_timeline_event_missing_application(self, mock_pool):
+        """Test that no row comes back when the application does not exist."""
+        connection = mock_pool.acquire.return_value.__aenter__.return_value
+        connection.fetchrow.return_value = None
+
+        assert await add_timeline_event(mock_pool, "RK-2026-99999", "Note") is None
+
+
+@pytest.mark.asyncio
+class TestUpdateCheckDB:
+    """Test single-check JSONB patches."""
+
+    async def test_update_check(self, mock_pool):
+        """Test that one check is patched with jsonb_set and progress recomputed in SQL."""
+        connection = mock_pool.acquire.return_value.__aenter__.return_value
+        connection.fetchrow.return_value = {
+            "check": {"status": "complete", "date": "2026-03-01"}, "progress": 18, "version": 4,
+        }
+
+        result = await update_check(
+            mock_pool, "RK-2026-00001", "dbs", {"status": "complete", "date": "2026-03-01"},
+        )
+
+        assert {
+            "check": {"status": "complete", "date": "2026-03-01"}, "progress": 18, "version": 4,
+        } == result
+        sql, *args = connection.fetchrow.call_args[0]
+        assert sql.lstrip().startswith("UPDATE applications")
+        assert "jsonb_set(checks" in sql
+        assert "progress = checks_progress(" in sql
+        assert ["RK-2026-00001", "dbs", {"status": "complete", "date": "2026-03-01"}] == args
+        assert 1 == connection.fetchrow.call_count
+        assert "sync_application_checks" in connection.execute.call_args[0][0]
+
+    async def test_update_check_not_found(self, mock_pool):
+        """Test that a missing application or check returns None."""
+        connection = mock_pool.acquire.return_value.__aenter__.return_value
+        connection.fetchrow.return_value = None
+
+        assert await update_check(mock_pool, "RK-2026-00001", "nope", {"status": "complete"}) is None
+        assert not connection.execute.called
+
+    async def test_update_check_evicts_cache(self, mock_pool):
+        """Test that the cached detail is dropped after a check update."""
+        from app.services.application_service import detail_cache
+
+        detail_cache.set("RK-2026-00001", {"id": "RK-2026-00001"})
+        connection = mock_pool.acquire.return_value.__aenter__.return_value
+        connection.fetchrow.return_value = {"check": {"status": "pending"}, "progress": 0, "version": 2}
+
+        await update_check(mock_pool, "RK-2026-00001", "dbs", {"status": "pending"})
+
+        assert detail_cache.get("RK-2026-00001") is None
+
+    async def test_update_connected_person_check(self, mock_pool):
+        """Test that only the matching array element is rewritten, in order."""
+        connection = mock_pool.acquire.return_value.__aenter__.return_value
+        connection.fetchrow.return_value = {"check": {"status": "complete"}, "version": 2}
+
+        result = await update_connected_person_check(
+            mock_pool, "RK-2026-00001", "CP-001", "dbs", {"status": "complete"},
+        )
+
+        assert {"check": {"status": "complete"}, "version": 2} == result
+        sql, *args = connection.fetchrow.call_args[0]
+        assert "WITH ORDINALITY" in sql
+        assert "ORDER BY i" in sql
+        assert "progress" not in sql
+        assert ["RK-2026-00001", "CP-001", "dbs", {"status": "complete"}] == args
+
+    async def test_update_connected_person_check_not_found(self, mock_pool):
+        """Test that a missing person returns None."""
+        connection = mock_pool.acquire.return_value.__aenter__.return_value
+        connection.fetchrow.return_value = None
+
+        assert await update_connected_person_check(
+            mock_pool, "RK-2026-00001", "CP-999", "dbs", {"status": "complete"},
+        ) is None
+
+
+@pytest.mark.asyncio
+class TestFindChecksDB:
+    """Test compliance queries over application_checks."""
+
+    async def test_find_checks_filters(self, mock_pool):
+        """Test that key, status and expiry window are parameterised."""
+        connection = mock_pool.acquire.return_value.__aenter__.return_value
+        connection.fetch.return_value = [{
+            "application_id": "RK-2026-00001",
+            "name": "John Doe",
+            "stage": "checks",
+            "person_id": None,
+            "check_key": "first_aid",
+            "status": "complete",
+            "date": date(2024, 8, 20),
+            "expiry_date": date(2026, 4, 1),
+        }]
+
+        result = await find_checks(mock_pool, "first_aid", "complete", 60, 100)
+
+        sql, *args = connection.fetch.call_args[0]
+        assert "FROM application_checks c" in sql
+        assert "c.check_key = $1" in sql
+        assert "c.status = $2" in sql
+        assert "CURRENT_DATE + $3::int" in sql
+        assert "LIMIT $4" in sql
+        assert ["first_aid", "complete", 60, 100] == args
+        assert [{
+            "applicationId": "RK-2026-00001",
+            "name": "John Doe",
+            "stage": "checks",
+            "personId": None,
+            "key": "first_aid",
+            "status": "complete",
+            "date": "2024-08-20",
+            "expiryDate": "2026-04-01",
+        }] == result
+
+    async def test_find_checks_unfiltered(self, mock_pool):
+        """Test that no filters means no WHERE clause."""
+        connection = mock_pool.acquire.return_value.__aenter__.return_value
+        connection.fetch.return_value = []
+
+        assert [] == await find_checks(mock_pool)
+
+        sql, *args = connection.fetch.call_args[0]
+        assert "WHERE" not in sql
+        assert [500] == args
+
+
+@pytest.mark.asyncio
+class TestPipelineStatsDB:
+    """Test the summary-table backed pipeline statistics."""
+
+    async def test_pipeline_stats_rollup(self, mock_pool):
+        """Test bucket averages and stage/risk roll-ups."""
+        now = 1_760_000_000.0
+        day = 86400.0
+        connection = mock_pool.acquire.return_value.__aenter__.return_value
+        connection.fetch.return_value = [
+            {"stage": "checks", "risk": "low", "local_authority": "Leeds",
+             "applications": 2, "progress_sum": 90, "updated_epoch_sum": 2 * now - 6 * day,
+             "now_epoch": now},
+            {"stage": "review", "risk": "high", "local_authority": "",
+             "applications": 1, "progress_sum": 80, "updated_epoch_sum": now - 9 * day,
+             "now_epoch": now},
+        ]
+
+        stats = await get_pipeline_stats(mock_pool)
+
+        assert "FROM pipeline_stats" in connection.fetch.call_args[0][0]
+        assert 3 == stats["total"]
+        assert {"checks": 2, "review": 1} == stats["byStage"]
+        assert {"low": 2, "high": 1} == stats["byRisk"]
+        assert 56.7 == stats["averageProgress"]
+        assert 5.0 == stats["averageDaysInStage"]
+        assert {
+            "stage": "checks", "risk": "low", "localAuthority": "Leeds",
+            "count": 2, "averageProgress": 45.0, "averageDaysInStage": 3.0,
+        } == stats["buckets"][0]
+
+    async def test_pipeline_stats_empty(self, mock_pool):
+        """Test that an empty pipeline reports zeros."""
+        connection = mock_pool.acquire.return_value.__aenter__.return_value
+        connection.fetch.return_value = []
+
+        stats = await get_pipeline_stats(mock_pool)
+
+        assert 0 == stats["total"]
+        assert 0.0 == stats["averageDaysInStage"]
+        assert [] == stats["buckets"]
+
+
+@pytest.mark.asyncio
+class TestFunnelStatsDB:
+    """Test the stage funnel and cycle-time statistics."""
+
+    def _configure(self, connection):
+        connection.fetch.side_effect = [
+            [{"stage": "new", "transitions": 4, "median_days": 2.04, "p90_days": 6.5},
+             {"stage": "checks", "transitions": 2, "median_days": 10.0, "p90_days": 18.26}],
+            # furthest stage position -> applications: 2 still new, 2 in checks, 1 registered
+            [{"position": 1, "applications": 2}, {"position": 3, "applications": 2},
+             {"position": 6, "applications": 1}],
+        ]
+        connection.fetchrow.return_value = {"registered": 1, "median_days": 41.0, "p90_days": 41.0}
+
+    async def test_funnel_stats(self, mock_pool):
+        """Test cumulative reach, conversion and per-stage percentiles."""
+        connection = mock_pool.acquire.return_value.__aenter__.return_value
+        self._configure(connection)
+
+        funnel = await get_funnel_stats(mock_pool)
+
+        assert "type = 'stage'" in connection.fetch.call_args_list[0][0][0]
+        assert "LAG(t.created_at)" in connection.fetch.call_args_list[0][0][0]
+        stages = {s["stage"]: s for s in funnel["stages"]}
+        assert [5, 3, 3, 1, 1, 1] == [s["reached"] for s in funnel["stages"]]
+        assert {"stage": "new", "reached": 5, "conversionToNext": 0.6, "transitions": 4,
+                "medianDays": 2.0, "p90Days": 6.5} == stages["new"]
+        assert 18.3 == stages["checks"]["p90Days"]
+        assert stages["review"]["medianDays"] is None
+        assert stages["registered"]["conversionToNext"] is None
+        assert {"registered": 1, "medianDays": 41.0, "p90Days": 41.0} == funnel["timeToRegistration"]
+
+    async def test_funnel_stats_cached_until_stage_change(self, mock_pool):
+        """Test that the result is cached and evicted by stage changes only."""
+        from app.services.application_service import _evict_funnel
+
+        connection = mock_pool.acquire.return_value.__aenter__.return_value
+        self._configure(connection)
+        first = await get_funnel_stats(mock_pool)
+        assert first is await get_funnel_stats(mock_pool)
+
+        _evict_funnel({"table": "applications", "op": "UPDATE", "id": "RK-2026-00001",
+                       "columns": ["checks", "progress"]})
+        assert funnel_cache.get("funnel") is first
+
+        _evict_funnel({"table": "applications", "op": "UPDATE", "id": "RK-2026-00001",
+                       "columns": ["stage", "last_updated"]})
+        assert funnel_cache.get("funnel") is None
+
+    async def test_funnel_stats_empty(self, mock_pool):
+        """Test that an empty pipeline reports zero reach and no percentiles."""
+        connection = mock_pool.acquire.return_value.__aenter__.return_value
+        connection.fetch.side_effect = [[], []]
+        connection.fetchrow.return_value = {"registered": 0, "median_days": None, "p90_days": None}
+
+        funnel = await get_funnel_stats(mock_pool)
+
+        assert all(s["reached"] == 0 and s["conversionToNext"] is None for s in funnel["stages"])
+        assert funnel["timeToRegistration"]["medianDays"] is None
+
+
+@pytest.mark.asyncio
+class TestSearchApplicationsDB:
+    """Test ranked application search."""
+
+    async def test_search_applications(self, mock_pool):
+        """Test full-text plus trigram matching and keyset paging on rank."""
+        connection = mock_pool.acquire.return_value.__aenter__.return_value
+        connection.fetch.return_value = [
+            {"id": "RK-2026-00002", "name": "Jane Smith", "email": "jane@example.com",
+             "stage": "checks", "risk": "low", "local_authority": "Leeds",
+             "created_at": None, "rank": 1.25},
+            {"id": "RK-2026-00001", "name": "Janet Smyth", "email": "js@example.com",
+             "stage": "new", "risk": "low", "local_authority": "Leeds",
+             "created_at": None, "rank": 0.5},
+        ]
+
+        items, next_cursor = await search_applications(mock_pool, "Jane Smi", 1)
+
+        sql, *args = connection.fetch.call_args[0]
+        assert "search_vector @@ to_tsquery('simple', $2)" in sql
+        assert "$1 <% name" in sql and "$1 <% email" in sql
+        assert "ORDER BY rank DESC, id DESC LIMIT $3" in sql
+        assert ["Jane Smi", "jane:* & smi:*", 2] == args
+        assert [{"id": "RK-2026-00002", "name": "Jane Smith", "email": "jane@example.com",
+                 "stage": "checks", "risk": "low", "localAuthority": "Leeds"}] == items
+        assert (1.25, "RK-2026-00002") == decode_search_cursor(next_cursor)
+
+    async def test_search_after_cursor(self, mock_pool):
+        """Test that the next page starts after the cursor's (rank, id)."""
+        connection = mock_pool.acquire.return_value.__aenter__.return_value
+        connection.fetch.return_value = []
+
+        items, next_cursor = await search_applications(
+            mock_pool, "smith", 20, (1.25, "RK-2026-00002"),
+        )
+
+        sql, *args = connection.fetch.call_args[0]
+        assert "WHERE (rank, id) < ($3, $4)" in sql
+        assert ["smith", "smith:*", 1.25, "RK-2026-00002", 21] == args
+        assert ([], None) == (items, next_cursor)
 
 
 @pytest.mark.asyncio
@@ -354,3 +1033,112 @@ class TestAddTimelineEventDB:
         )
 
         assert result is not None
+
+
+@pytest.mark.asyncio
+class TestBuildChangeEventDB:
+    """Test turning change notifications into stream events."""
+
+    async def test_reset(self, mock_pool):
+        """Test that a listener reset becomes a reset event."""
+        from app.services.application_service import build_change_event
+
+        assert {"op": "reset"} == await build_change_event(mock_pool, {"op": "RESET"})
+
+    async def test_delete(self, mock_pool):
+        """Test that deletes need no query."""
+        from app.services.application_service import build_change_event
+
+        event = await build_change_event(
+            mock_pool, {"table": "applications", "op": "DELETE", "id": "RK-2026-00001"},
+        )
+        assert {"id": "RK-2026-00001", "op": "delete"} == event
+        assert not mock_pool.acquire.called
+
+    async def test_update_sends_only_changed_fields(self, mock_pool):
+        """Test that only dashboard keys for the changed columns are sent."""
+        from app.services.application_service import build_change_event
+
+        connection = mock_pool.acquire.return_value.__aenter__.return_value
+        connection.fetchrow.return_value = {
+            "id": "RK-2026-00001",
+            "name": "John Doe",
+            "stage": "review",
+            "risk": "low",
+            "checks": {"dbs": {"status": "complete"}},
+            "last_updated": datetime.now(),
+            "version": 3,
+        }
+
+        event = await build_change_event(mock_pool, {
+            "table": "applications", "op": "UPDATE", "id": "RK-2026-00001",
+            "columns": ["stage", "checks", "last_updated", "version"],
+        })
+
+        assert "update" == event["op"]
+        assert {
+            "stage": "review",
+            "checks": {"dbs": {"status": "complete"}},
+            "lastUpdated": date.today().isoformat(),
+            "daysInStage": 0,
+            "version": 3,
+        } == event["changes"]
+
+    async def test_update_of_hidden_columns_is_skipped(self, mock_pool):
+        """Test that changes to columns the dashboard never shows emit nothing."""
+        from app.services.application_service import build_change_event
+
+        event = await build_change_event(mock_pool, {
+            "table": "applications", "op": "UPDATE", "id": "RK-2026-00001",
+            "columns": ["declaration"],
+        })
+        assert event is None
+        assert not mock_pool.acquire.called
+
+    async def test_timeline_insert(self, mock_pool):
+        """Test that a new timeline row is sent in dashboard format."""
+        from app.services.application_service import build_change_event
+
+        connection = mock_pool.acquire.return_value.__aenter__.return_value
+        connection.fetchrow.return_value = {
+            "event": "Reference received", "type": "complete",
+            "created_at": datetime(2026, 3, 1, 14, 5),
+        }
+
+        event = await build_change_event(mock_pool, {
+            "table": "timeline_events", "op": "INSERT", "id": "RK-2026-00001", "eventId": 42,
+        })
+
+        assert {
+            "id": "RK-2026-00001",
+            "op": "timeline",
+            "timeline": [{"date": "2026-03-01 14:05", "event": "Reference received", "type": "complete"}],
+        } == event
+        assert 42 == connection.fetchrow.call_args[0][1]
+
+    async def test_timeline_insert_from_payload(self, mock_pool):
+        """Test that entries carried in the notification need no query."""
+        from app.services.application_service import build_change_event
+
+        event = await build_change_event(mock_pool, {
+            "table": "timeline_events", "op": "INSERT", "id": "RK-2026-00001", "eventId": 42,
+            "event": "Reference received", "type": "complete",
+            "createdAt": "2026-03-01T15:05:00.123456+01:00",
+        })
+
+        assert [{"date": "2026-03-01 14:05", "event": "Reference received", "type": "complete"}] \
+            == event["timeline"]
+        assert not mock_pool.acquire.called
+
+    async def test_insert_sends_full_application(self, mock_pool):
+        """Test that new applications are sent whole."""
+        from app.services.application_service import build_change_event
+
+        connection = mock_pool.acquire.return_value.__aenter__.return_value
+        connection.fetchrow.return_value = {"id": "RK-2026-00009", "name": "New Person"}
+
+        event = await build_change_event(
+            mock_pool, {"table": "applications", "op": "INSERT", "id": "RK-2026-00009"},
+        )
+        assert "insert" == event["op"]
+        assert "New Person" == event["application"]["name"]
@@ -9,6 +9,7 @@ from app.services.application_service import (
     build_connected_persons,
     build_premises_address,
     generate_id,
+    search_tsquery,
 )
 
 
@@ -417,3 +418,20 @@ class TestGenerateId:
         year = datetime.now().year
         result = generate_id(100000)
         assert f"RK-{year}-100000" == result
+
+
+class TestSearchTsquery:
+    """Test search_tsquery function."""
+
+    def test_prefix_matches_every_word(self):
+        """Test that each word becomes a prefix term."""
+        assert "jan:* & smi:*" == search_tsquery("Jan  Smi")
+
+    def test_strips_operators(self):
+        """Test that only word characters reach to_tsquery."""
+        assert "o:* & brien:*" == search_tsquery("O'Brien")
+        assert "jane:* & example:* & com:*" == search_tsquery("jane@example.com")
+
+    def test_no_words(self):
+        """Test that a query without words matches by trigram only."""
+        assert search_tsquery("!&|") is None
@@ -0,0 +1,140 @@
+"""Tests for the pre-compressed portal page cache."""
+
+import asyncio
+import gzip
+import os
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app import static_pages
+from app.main import app
+from app.static_pages import StaticPage, negotiate_encoding
+
+
+@pytest.fixture
+def client():
+    """Create a TestClient instance."""
+    return TestClient(app)
+
+
+@pytest.fixture
+def page(tmp_path):
+    """A StaticPage backed by a temporary HTML file."""
+    path = tmp_path / "page.html"
+    path.write_text("<html><body>" + "hello " * 500 + "</body></html>")
+    page = StaticPage(path)
+    page.load()
+    return page
+
+
+class TestNegotiateEncoding:
+    """Test Accept-Encoding negotiation."""
+
+    def test_no_header(self):
+        """Test that a missing header falls back to identity."""
+        assert "identity" == negotiate_encoding(None, {"identity", "gzip"})
+
+    def test_prefers_brotli(self):
+        """Test that br wins over gzip when both are acceptable and available."""
+        assert "br" == negotiate_encoding("gzip, deflate, br", {"identity", "gzip", "br"})
+
+    def test_gzip_when_brotli_unavailable(self):
+        """Test that unavailable encodings are skipped."""
+        assert "gzip" == negotiate_encoding("gzip, br", {"identity", "gzip"})
+
+    def test_quality_values(self):
+        """Test that q-values are honoured."""
+        assert "gzip" == negotiate_encoding("br;q=0.5, gzip", {"identity", "gzip", "br"})
+        assert "identity" == negotiate_encoding("gzip;q=0", {"identity", "gzip"})
+
+    def test_wildcard(self):
+        """Test that * accepts any encoding."""
+        assert "gzip" == negotiate_encoding("*", {"identity", "gzip"})
+
+
+class TestStaticPage:
+    """Test loading, ETags and reloads."""
+
+    def test_gzip_variant_round_trips(self, page):
+        """Test that the gzip variant decompresses to the original bytes."""
+        assert page.path.read_bytes() == gzip.decompress(page.variants["gzip"])
+        assert len(page.variants["gzip"]) < len(page.variants["identity"])
+
+    def test_etag_depends_on_content(self, page):
+        """Test that ETags are content hashes that change with the file."""
+        before = page.etag("identity")
+        page.path.write_text("<html>changed</html>")
+        page.load()
+        assert before != page.etag("identity")
+        assert page.etag("identity").strip('"') in page.etag("gzip")
+
+    def test_matches(self, page):
+        """Test If-None-Match handling across encodings and list syntax."""
+        assert page.matches(page.etag("identity"))
+        assert page.matches(f'"other", {page.etag("gzip")}')
+        assert page.matches(f"W/{page.etag('identity')}")
+        assert page.matches("*")
+        assert not page.matches('"stale"')
+        assert not page.matches(None)
+
+    def test_brotli_variant_when_available(self, page, monkeypatch):
+        """Test that a brotli variant is built when the module is importable."""
+
+        class FakeBrotli:
+            @staticmethod
+            def compress(data, quality):
+                return b"br:" + data[:10]
+
+        monkeypatch.setattr(static_pages, "brotli", FakeBrotli)
+        page.load()
+        assert page.variants["br"].startswith(b"br:")
+
+    @pytest.mark.asyncio
+    async def test_watch_pages_reloads_changed_files(self, page, monkeypatch):
+        """Test that the dev watcher reloads a page when its mtime changes."""
+        monkeypatch.setattr(static_pages, "PAGES", {"test": page})
+        old_digest = page.digest
+
+        page.path.write_text("<html>edited</html>")
+        os.utime(page.path, (page.mtime + 5, page.mtime + 5))
+
+        watcher = asyncio.create_task(static_pages.watch_pages(interval=0.01))
+        await asyncio.sleep(0.05)
+        watcher.cancel()
+
+        assert old_digest != page.digest
+        assert b"<html>edited</html>" == page.variants["identity"]
+
+
+class TestPortalPages:
+    """Test the /register and /admin routes."""
+
+    def test_admin_gzip(self, client):
+        """Test that the admin page is served pre-compressed with an ETag."""
+        response = client.get("/admin", headers={"Accept-Encoding": "gzip"})
+        assert 200 == response.status_code
+        assert "gzip" == response.headers["content-encoding"]
+        assert "Accept-Encoding" == response.headers["vary"]
+        assert response.headers["etag"].endswith('-gzip"')
+        assert "text/html; charset=utf-8" == response.headers["content-type"]
+        assert (static_pages.PUBLIC_DIR / "cma-portal-v2.html").read_text() == response.text
+
+    def test_register_identity(self, client):
+        """Test that clients without gzip get the raw page."""
+        response = client.get("/register", headers={"Accept-Encoding": "identity"})
+        assert 200 == response.status_code
+        assert "content-encoding" not in response.headers
+        assert "<html" in response.text.lower()
+
+    def test_if_none_match_returns_304(self, client):
+        """Test conditional requests with a current ETag."""
+        first = client.get("/admin", headers={"Accept-Encoding": "gzip"})
+        second = client.get(
+            "/admin",
+            headers={"Accept-Encoding": "gzip", "If-None-Match": first.headers["etag"]},
+        )
+        assert 304 == second.status_code
+        assert b"" == second.content
+        assert first.headers["etag"] == second.headers["etag"]
+        assert "DENY" == second.headers["x-frame-options"]